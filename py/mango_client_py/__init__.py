@@ -1,8 +1,144 @@
 # mango_client_py/accounts/__init__.py
 
-from .mango_account import MangoAccounts
-from .oracles import Oracles
-from .bank import Bank
-from .group import Group
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ['MangoAccounts', 'Oracles', 'Bank', 'Group']
+if TYPE_CHECKING:
+    from .oracles import Oracles
+    from .health import HealthCache, HealthChanges, simulate_health_ratio
+    from .liquidation import LiquidationEngine, LiquidationCandidate
+    from .token_conditional_swap import (
+        TokenConditionalSwapScanner,
+        TokenConditionalSwapEntry,
+        TokenConditionalSwapArrays,
+        evaluate_token_conditional_swaps,
+    )
+    from .perp_settle import PerpSettler, PerpSettlePair, compute_settleable_pnl, find_perp_settle_pairs
+    from .crank import PerpCrank, EventQueue, plan_consume_events
+    from .price_impact import PriceImpactTable, PriceImpactLoader
+    from .risk import ShockGrid, RiskGrid, compute_risk_grid, get_risk_stats
+    from .stats import StatsTable, account_stats, perp_position_stats, get_largest_perp_positions
+    from .rebalance import RebalancePlanner, RebalancePlan, compute_net_positions, pack_transactions
+    from .metrics import LatencyHistogram, MetricsRegistry, start_prometheus_exporter
+    from .router import (
+        SwapRouter,
+        SwapQuote,
+        SwapMode,
+        QuoteProvider,
+        JupiterQuoteProvider,
+        RecordedQuoteProvider,
+    )
+    from .idl_cache import load_idl
+    from .workers import HealthWorkerPool, raw_accounts_from_program_accounts
+    from .account_table import MangoAccountTable
+
+# Name -> Untermodul. Die Untermodule (und damit anchorpy, solana und numpy) werden erst
+# beim ersten Zugriff auf einen Namen importiert (PEP 562), sodass `import mango_client_py`
+# praktisch nichts kostet.
+_LAZY_IMPORTS = {
+    'Oracles': '.oracles',
+    'HealthCache': '.health',
+    'HealthChanges': '.health',
+    'simulate_health_ratio': '.health',
+    'LiquidationEngine': '.liquidation',
+    'LiquidationCandidate': '.liquidation',
+    'TokenConditionalSwapScanner': '.token_conditional_swap',
+    'TokenConditionalSwapEntry': '.token_conditional_swap',
+    'TokenConditionalSwapArrays': '.token_conditional_swap',
+    'evaluate_token_conditional_swaps': '.token_conditional_swap',
+    'PerpSettler': '.perp_settle',
+    'PerpSettlePair': '.perp_settle',
+    'compute_settleable_pnl': '.perp_settle',
+    'find_perp_settle_pairs': '.perp_settle',
+    'PerpCrank': '.crank',
+    'EventQueue': '.crank',
+    'plan_consume_events': '.crank',
+    'PriceImpactTable': '.price_impact',
+    'PriceImpactLoader': '.price_impact',
+    'ShockGrid': '.risk',
+    'RiskGrid': '.risk',
+    'compute_risk_grid': '.risk',
+    'get_risk_stats': '.risk',
+    'StatsTable': '.stats',
+    'account_stats': '.stats',
+    'perp_position_stats': '.stats',
+    'get_largest_perp_positions': '.stats',
+    'RebalancePlanner': '.rebalance',
+    'RebalancePlan': '.rebalance',
+    'compute_net_positions': '.rebalance',
+    'pack_transactions': '.rebalance',
+    'LatencyHistogram': '.metrics',
+    'MetricsRegistry': '.metrics',
+    'start_prometheus_exporter': '.metrics',
+    'SwapRouter': '.router',
+    'SwapQuote': '.router',
+    'SwapMode': '.router',
+    'QuoteProvider': '.router',
+    'JupiterQuoteProvider': '.router',
+    'RecordedQuoteProvider': '.router',
+    'load_idl': '.idl_cache',
+    'HealthWorkerPool': '.workers',
+    'raw_accounts_from_program_accounts': '.workers',
+    'MangoAccountTable': '.account_table',
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+__all__ = [
+    'Oracles',
+    'HealthCache',
+    'HealthChanges',
+    'simulate_health_ratio',
+    'LiquidationEngine',
+    'LiquidationCandidate',
+    'TokenConditionalSwapScanner',
+    'TokenConditionalSwapEntry',
+    'TokenConditionalSwapArrays',
+    'evaluate_token_conditional_swaps',
+    'PerpSettler',
+    'PerpSettlePair',
+    'compute_settleable_pnl',
+    'find_perp_settle_pairs',
+    'PerpCrank',
+    'EventQueue',
+    'plan_consume_events',
+    'PriceImpactTable',
+    'PriceImpactLoader',
+    'ShockGrid',
+    'RiskGrid',
+    'compute_risk_grid',
+    'get_risk_stats',
+    'StatsTable',
+    'account_stats',
+    'perp_position_stats',
+    'get_largest_perp_positions',
+    'SwapRouter',
+    'SwapQuote',
+    'SwapMode',
+    'QuoteProvider',
+    'JupiterQuoteProvider',
+    'RecordedQuoteProvider',
+    'RebalancePlanner',
+    'RebalancePlan',
+    'compute_net_positions',
+    'pack_transactions',
+    'LatencyHistogram',
+    'MetricsRegistry',
+    'start_prometheus_exporter',
+    'load_idl',
+    'HealthWorkerPool',
+    'raw_accounts_from_program_accounts',
+    'MangoAccountTable',
+]
@@ -0,0 +1,270 @@
+# mango_client_py/account_table.py
+
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from solana.publickey import PublicKey
+
+from .types import HealthType, MangoAccount, PerpPosition, Serum3Orders, TokenPosition
+from .health import HealthBatch, HealthTables, health_batch_from_rows
+
+# ----------------------------
+# MangoAccountTable
+# ----------------------------
+
+def _pubkey_rows(pubkeys: List[PublicKey]) -> np.ndarray:
+    return np.frombuffer(b''.join(bytes(pk) for pk in pubkeys), dtype=np.uint8).reshape(-1, 32)
+
+
+def _offsets(counts: List[int]) -> np.ndarray:
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+@dataclass
+class MangoAccountTable:
+    """
+    Struct-of-Arrays-Ablage vieler MangoAccounts.
+
+    Je Konto gibt es eine Zeile in den Konto-Spalten; die aktiven Token-, Serum3- und
+    Perp-Positionen aller Konten liegen hintereinander in zusammenhängenden, typisierten
+    Arrays. `*_offsets[i]:*_offsets[i + 1]` sind die Positionszeilen von Konto `i`.
+    Ein Konto kostet so nur einige hundert Bytes statt einiger Kilobytes an Python-Objekten,
+    und Abfragen über alle Konten sind Array-Operationen.
+
+    Token-Conditional-Swaps und Perp-Open-Orders werden nicht abgelegt.
+    """
+    public_keys: np.ndarray  # (N, 32) uint8
+    owners: np.ndarray  # (N, 32) uint8
+    delegates: np.ndarray  # (N, 32) uint8
+    sequence_number: np.ndarray  # (N,)
+    account_num: np.ndarray  # (N,)
+
+    token_offsets: np.ndarray  # (N + 1,)
+    token_index: np.ndarray  # (T,) uint16
+    token_indexed_position: np.ndarray  # (T,) float64
+    token_in_use_count: np.ndarray  # (T,) uint16
+
+    serum3_offsets: np.ndarray  # (N + 1,)
+    serum3_market_index: np.ndarray  # (S,) uint16
+    serum3_open_orders: np.ndarray  # (S, 32) uint8
+    serum3_base_token_index: np.ndarray  # (S,) uint16
+    serum3_quote_token_index: np.ndarray  # (S,) uint16
+    serum3_base_free_native: np.ndarray  # (S,) float64
+    serum3_quote_free_native: np.ndarray
+    serum3_base_reserved_native: np.ndarray
+    serum3_quote_reserved_native: np.ndarray
+
+    perp_offsets: np.ndarray  # (N + 1,)
+    perp_market_index: np.ndarray  # (P,) uint16
+    perp_base_position_lots: np.ndarray  # (P,) int64
+    perp_quote_position_native: np.ndarray  # (P,) float64
+    perp_quote_entry_native: np.ndarray
+    perp_realized_pnl_for_position_native: np.ndarray
+    perp_settle_pnl_limit_window: np.ndarray  # (P,) int64
+    perp_settle_pnl_limit_settled_in_current_window_native: np.ndarray
+    perp_recurring_settle_pnl_allowance: np.ndarray
+    perp_oneshot_settle_pnl_allowance: np.ndarray
+
+    @classmethod
+    def from_mango_accounts(cls, mango_accounts: Iterable[MangoAccount]) -> 'MangoAccountTable':
+        """
+        Baut die Tabelle aus MangoAccounts (veränderlich oder `FrozenMangoAccount`); nur aktive Positionen werden übernommen.
+        """
+        mango_accounts = list(mango_accounts)
+        tokens: List[TokenPosition] = []
+        serum3: List[Serum3Orders] = []
+        perps: List[PerpPosition] = []
+        token_counts: List[int] = []
+        serum3_counts: List[int] = []
+        perp_counts: List[int] = []
+        for mango_account in mango_accounts:
+            active_tokens = mango_account.tokens_active()
+            active_serum3 = mango_account.serum3_active()
+            active_perps = mango_account.perp_active()
+            tokens.extend(active_tokens)
+            serum3.extend(active_serum3)
+            perps.extend(active_perps)
+            token_counts.append(len(active_tokens))
+            serum3_counts.append(len(active_serum3))
+            perp_counts.append(len(active_perps))
+
+        def column(items: list, name: str, dtype: type) -> np.ndarray:
+            return np.array([getattr(item, name) for item in items], dtype=dtype)
+
+        default_pk = PublicKey(bytes(32))
+        return cls(
+            public_keys=_pubkey_rows([a.public_key for a in mango_accounts]),
+            owners=_pubkey_rows([a.owner for a in mango_accounts]),
+            delegates=_pubkey_rows([a.delegate for a in mango_accounts]),
+            sequence_number=column(mango_accounts, 'sequence_number', np.int64),
+            account_num=column(mango_accounts, 'account_num', np.int64),
+            token_offsets=_offsets(token_counts),
+            token_index=column(tokens, 'token_index', np.uint16),
+            token_indexed_position=column(tokens, 'indexed_position', np.float64),
+            token_in_use_count=column(tokens, 'in_use_count', np.uint16),
+            serum3_offsets=_offsets(serum3_counts),
+            serum3_market_index=column(serum3, 'market_index', np.uint16),
+            serum3_open_orders=_pubkey_rows([s.open_orders or default_pk for s in serum3]),
+            serum3_base_token_index=column(serum3, 'base_token_index', np.uint16),
+            serum3_quote_token_index=column(serum3, 'quote_token_index', np.uint16),
+            serum3_base_free_native=column(serum3, 'base_free_native', np.float64),
+            serum3_quote_free_native=column(serum3, 'quote_free_native', np.float64),
+            serum3_base_reserved_native=column(serum3, 'base_reserved_native', np.float64),
+            serum3_quote_reserved_native=column(serum3, 'quote_reserved_native', np.float64),
+            perp_offsets=_offsets(perp_counts),
+            perp_market_index=column(perps, 'market_index', np.uint16),
+            perp_base_position_lots=column(perps, 'base_position_lots', np.int64),
+            perp_quote_position_native=column(perps, 'quote_position_native', np.float64),
+            perp_quote_entry_native=column(perps, 'quote_entry_native', np.float64),
+            perp_realized_pnl_for_position_native=column(perps, 'realized_pnl_for_position_native', np.float64),
+            perp_settle_pnl_limit_window=column(perps, 'settle_pnl_limit_window', np.int64),
+            perp_settle_pnl_limit_settled_in_current_window_native=column(perps, 'settle_pnl_limit_settled_in_current_window_native', np.float64),
+            perp_recurring_settle_pnl_allowance=column(perps, 'recurring_settle_pnl_allowance', np.float64),
+            perp_oneshot_settle_pnl_allowance=column(perps, 'oneshot_settle_pnl_allowance', np.float64),
+        )
+
+    def __post_init__(self) -> None:
+        self._index_by_key: Optional[Dict[bytes, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.sequence_number)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f.name).nbytes for f in fields(self))
+
+    # ----------------------------
+    # Zugriff auf einzelne Konten
+    # ----------------------------
+
+    def index_of(self, public_key: PublicKey) -> Optional[int]:
+        """
+        Gibt die Zeile eines Kontos zurück; der Index wird beim ersten Aufruf gebaut.
+        """
+        if self._index_by_key is None:
+            self._index_by_key = {}
+            for i, row in enumerate(self.public_keys):
+                self._index_by_key.setdefault(row.tobytes(), i)
+        return self._index_by_key.get(bytes(public_key))
+
+    def get(self, i: int) -> MangoAccount:
+        """
+        Erzeugt den MangoAccount in Zeile `i` (nur aktive Positionen).
+        """
+        t0, t1 = self.token_offsets[i], self.token_offsets[i + 1]
+        s0, s1 = self.serum3_offsets[i], self.serum3_offsets[i + 1]
+        p0, p1 = self.perp_offsets[i], self.perp_offsets[i + 1]
+        return MangoAccount(
+            public_key=PublicKey(self.public_keys[i].tobytes()),
+            owner=PublicKey(self.owners[i].tobytes()),
+            sequence_number=int(self.sequence_number[i]),
+            account_num=int(self.account_num[i]),
+            delegate=PublicKey(self.delegates[i].tobytes()),
+            tokens=[
+                TokenPosition(int(self.token_index[j]), float(self.token_indexed_position[j]), int(self.token_in_use_count[j]))
+                for j in range(t0, t1)
+            ],
+            serum3=[
+                Serum3Orders(
+                    market_index=int(self.serum3_market_index[j]),
+                    open_orders=PublicKey(self.serum3_open_orders[j].tobytes()),
+                    base_token_index=int(self.serum3_base_token_index[j]),
+                    quote_token_index=int(self.serum3_quote_token_index[j]),
+                    base_free_native=float(self.serum3_base_free_native[j]),
+                    quote_free_native=float(self.serum3_quote_free_native[j]),
+                    base_reserved_native=float(self.serum3_base_reserved_native[j]),
+                    quote_reserved_native=float(self.serum3_quote_reserved_native[j]),
+                )
+                for j in range(s0, s1)
+            ],
+            perps=[
+                PerpPosition(
+                    market_index=int(self.perp_market_index[j]),
+                    base_position_lots=int(self.perp_base_position_lots[j]),
+                    quote_position_native=float(self.perp_quote_position_native[j]),
+                    quote_entry_native=float(self.perp_quote_entry_native[j]),
+                    realized_pnl_for_position_native=float(self.perp_realized_pnl_for_position_native[j]),
+                    settle_pnl_limit_window=int(self.perp_settle_pnl_limit_window[j]),
+                    settle_pnl_limit_settled_in_current_window_native=float(self.perp_settle_pnl_limit_settled_in_current_window_native[j]),
+                    recurring_settle_pnl_allowance=float(self.perp_recurring_settle_pnl_allowance[j]),
+                    oneshot_settle_pnl_allowance=float(self.perp_oneshot_settle_pnl_allowance[j]),
+                )
+                for j in range(p0, p1)
+            ],
+        )
+
+    def __getitem__(self, i: int) -> MangoAccount:
+        return self.get(i)
+
+    # ----------------------------
+    # Vektorisierte Abfragen
+    # ----------------------------
+
+    def token_rows_account(self) -> np.ndarray:
+        """Kontoindex jeder Token-Zeile."""
+        return np.repeat(np.arange(len(self)), np.diff(self.token_offsets))
+
+    def serum3_rows_account(self) -> np.ndarray:
+        """Kontoindex jeder Serum3-Zeile."""
+        return np.repeat(np.arange(len(self)), np.diff(self.serum3_offsets))
+
+    def perp_rows_account(self) -> np.ndarray:
+        """Kontoindex jeder Perp-Zeile."""
+        return np.repeat(np.arange(len(self)), np.diff(self.perp_offsets))
+
+    def token_balances(self, tables: HealthTables) -> np.ndarray:
+        """
+        Native Salden aller Token-Zeilen (positiv = Einlage, negativ = Kredit).
+        """
+        idx = self.token_index.astype(np.int64)
+        pos = self.token_indexed_position
+        return pos * np.where(pos >= 0, tables.token_deposit_index[idx], tables.token_borrow_index[idx])
+
+    def accounts_with_token(self, token_index: int) -> np.ndarray:
+        """
+        Gibt die Kontoindizes mit einer aktiven Position im Token zurück.
+        """
+        return np.unique(self.token_rows_account()[self.token_index == token_index])
+
+    def accounts_with_perp_market(self, perp_market_index: int) -> np.ndarray:
+        return np.unique(self.perp_rows_account()[self.perp_market_index == perp_market_index])
+
+    def perp_base_position_lots_by_account(self, perp_market_index: int) -> np.ndarray:
+        """
+        Gibt die Basisposition in Lots je Konto im PerpMarket zurück (0 ohne Position).
+        """
+        mask = self.perp_market_index == perp_market_index
+        return np.bincount(
+            self.perp_rows_account()[mask],
+            weights=self.perp_base_position_lots[mask],
+            minlength=len(self),
+        ).astype(np.int64)
+
+    def compute_health(self, tables: HealthTables, health_type: HealthType = HealthType.MAINT) -> HealthBatch:
+        """
+        Berechnet die Health aller Konten direkt aus den Spalten, ohne MangoAccounts zu erzeugen.
+        """
+        serum3_acc = self.serum3_rows_account()
+        return health_batch_from_rows(
+            tables,
+            health_type,
+            len(self),
+            token_acc=self.token_rows_account(),
+            token_idx=self.token_index.astype(np.int64),
+            token_pos=self.token_indexed_position,
+            free_acc=np.concatenate([serum3_acc, serum3_acc]),
+            free_idx=np.concatenate([self.serum3_base_token_index, self.serum3_quote_token_index]).astype(np.int64),
+            free_amt=np.concatenate([self.serum3_base_free_native, self.serum3_quote_free_native]),
+            serum3_acc=serum3_acc,
+            serum3_base_idx=self.serum3_base_token_index.astype(np.int64),
+            serum3_quote_idx=self.serum3_quote_token_index.astype(np.int64),
+            serum3_base_reserved=self.serum3_base_reserved_native,
+            serum3_quote_reserved=self.serum3_quote_reserved_native,
+            perp_acc=self.perp_rows_account(),
+            perp_idx=self.perp_market_index.astype(np.int64),
+            perp_lots=self.perp_base_position_lots.astype(np.float64),
+            perp_quote=self.perp_quote_position_native,
+        )
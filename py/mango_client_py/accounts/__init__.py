@@ -1,4 +1,4 @@
-# mango_client_py/accounts.py
+# mango_client_py/accounts/__init__.py
 
 from typing import Optional, List
 from solana.publickey import PublicKey
@@ -7,9 +7,9 @@ from solana.keypair import Keypair
 from spl.token.constants import NATIVE_MINT
 from spl.token.instructions import create_close_account_instruction
 
-from .utils import unpack_account, create_account, to_native
-from .types import Group, MangoAccount, TokenIndex, HealthCheckKind, MangoSignatureStatus
-from .utils import create_associated_token_account_idempotent_instruction
+from ..utils import unpack_account, create_account, to_native
+from ..types import Group, MangoAccount, TokenIndex, HealthCheckKind, MangoSignatureStatus
+from ..utils import create_associated_token_account_idempotent_instruction
 
 class Accounts:
     def __init__(self, client):
@@ -27,7 +27,7 @@ class Accounts:
         if not bank.force_withdraw:
             raise ValueError('Bank is not in force-withdraw mode')
 
-        owner_ata_token_account = await get_associated_token_address(
+        owner_ata_token_account = self.client.pda_cache.get_associated_token_address(
             bank.mint,
             mango_account.owner,
             True,
@@ -107,7 +107,7 @@ class Accounts:
         bank = group.get_first_bank_by_mint(mint_pk)
         admin_pk = self.client.wallet_pk
 
-        dust_vault_pk = await get_associated_token_address(bank.mint, admin_pk)
+        dust_vault_pk = self.client.pda_cache.get_associated_token_address(bank.mint, admin_pk)
         ai = await self.client.connection.get_account_info(dust_vault_pk)
         pre_instructions: List[TransactionInstruction] = []
         if ai is None:
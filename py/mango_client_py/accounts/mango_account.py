@@ -1,19 +1,43 @@
 # mango_client_py/accounts/mango_account.py
 
-from typing import Optional, List
+import base64
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from solana.publickey import PublicKey
 from solana.transaction import TransactionInstruction
 from solana.keypair import Keypair
 from spl.token.constants import NATIVE_MINT
 from spl.token.instructions import create_close_account_instruction
 
-from ..utils import unpack_account, create_account, to_native
-from ..types import Group, MangoAccount, TokenIndex, HealthCheckKind, MangoSignatureStatus
+from ..utils import unpack_account, create_account, to_native, uniq, derive_fallback_oracle_contexts
+from ..types import (
+    Group,
+    MangoAccount,
+    TokenIndex,
+    HealthCheckKind,
+    MangoSignatureStatus,
+    Bank,
+    PerpMarket,
+    Serum3Market,
+    TokenPosition,
+    PerpPosition,
+    Serum3Orders,
+    FallbackOracleConfig,
+)
 from ..utils import create_associated_token_account_idempotent_instruction
+from ..utils.rate_limit import RpcPriority, rpc_priority
+from ..utils.snapshot import AccountSnapshot, get_account_snapshot
+
+DEFAULT_PUBLIC_KEY = PublicKey("11111111111111111111111111111111")
+
 
 class MangoAccounts:
+    HEALTH_REMAINING_ACCOUNTS_CACHE_SIZE = 1024
+
     def __init__(self, client):
         self.client = client
+        # (Gruppe, Konten, Extras) -> ((Gruppe, Bank-Layout-Version), Positions-Signatur, geordnete Konten)
+        self._health_remaining_accounts_cache: 'OrderedDict[Tuple[Any, ...], Tuple[Tuple[int, int], Tuple[Any, ...], List[PublicKey]]]' = OrderedDict()
 
     async def create_mango_account(
         self,
@@ -155,12 +179,9 @@ class MangoAccounts:
         min_health_value: float,
         check_kind: HealthCheckKind,
     ) -> TransactionInstruction:
-        health_remaining_accounts: List[PublicKey] = await self.client.accounts.build_health_remaining_accounts(
+        health_remaining_accounts: List[PublicKey] = await self.build_health_remaining_accounts(
             group,
             [mango_account],
-            [],
-            [],
-            [],
         )
 
         return await self.client.program.methods.health_check(min_health_value, check_kind).accounts({
@@ -170,6 +191,204 @@ class MangoAccounts:
             {"pubkey": pk, "is_signer": False, "is_writable": False} for pk in health_remaining_accounts
         ]).instruction()
 
+    async def build_health_remaining_accounts(
+        self,
+        group: Group,
+        mango_accounts: List[MangoAccount],
+        banks: Optional[List[Bank]] = None,
+        perp_markets: Optional[List[PerpMarket]] = None,
+        open_orders_for_market: Optional[List[Tuple[Serum3Market, PublicKey]]] = None,
+    ) -> List[PublicKey]:
+        """
+        Baut die geordnete Liste der Remaining Accounts für Health-Prüfungen.
+
+        Die Reihenfolge entspricht dem Programm: Banks, Oracles, PerpMarkets,
+        Perp-Oracles, Serum3-Open-Orders und zuletzt Fallback-Oracles. Die Liste ohne
+        Fallback-Oracles wird je Kontenkombination zwischengespeichert und wiederverwendet,
+        solange sich die Positionsbelegung der Konten und die Bank-Zuordnung der Gruppe
+        (`Group.bank_layout_version`) nicht ändern. Die `sequence_number` taugt dafür nicht,
+        da sie sich nur durch `sequence_check` ändert.
+
+        Args:
+            group (Group): Die Gruppe, zu der die Konten gehören.
+            mango_accounts (List[MangoAccount]): Die beteiligten MangoAccounts.
+            banks (Optional[List[Bank]]): Banks, für die noch keine Position existiert, aber eröffnet werden könnte.
+            perp_markets (Optional[List[PerpMarket]]): PerpMarkets, für die noch keine Position existiert.
+            open_orders_for_market (Optional[List[Tuple[Serum3Market, PublicKey]]]): Zusätzliche Open-Orders-Konten je Serum3-Markt.
+
+        Returns:
+            List[PublicKey]: Die geordnete Liste der Remaining Accounts.
+        """
+        banks = banks or []
+        perp_markets = perp_markets or []
+        open_orders_for_market = open_orders_for_market or []
+
+        cache_key = (
+            group.public_key.to_base58(),
+            tuple(mango_account.public_key.to_base58() for mango_account in mango_accounts),
+            tuple(bank.token_index for bank in banks),
+            tuple(perp_market.market_index for perp_market in perp_markets),
+            tuple((serum3_market.market_index, oo.to_base58()) for serum3_market, oo in open_orders_for_market),
+        )
+        layout = (id(group), group.bank_layout_version)
+        signature = self._active_positions_signature(mango_accounts)
+
+        cached = self._health_remaining_accounts_cache.get(cache_key)
+        if cached is not None and cached[0] == layout and cached[1] == signature:
+            self._health_remaining_accounts_cache.move_to_end(cache_key)
+            health_remaining_accounts = list(cached[2])
+        else:
+            health_remaining_accounts = self._build_health_remaining_accounts_uncached(
+                group, mango_accounts, banks, perp_markets, open_orders_for_market,
+            )
+            self._health_remaining_accounts_cache[cache_key] = (
+                layout, signature, list(health_remaining_accounts),
+            )
+            self._health_remaining_accounts_cache.move_to_end(cache_key)
+            if len(self._health_remaining_accounts_cache) > self.HEALTH_REMAINING_ACCOUNTS_CACHE_SIZE:
+                self._health_remaining_accounts_cache.popitem(last=False)
+
+        return await self._append_fallback_oracles(group, health_remaining_accounts)
+
+    def invalidate_health_remaining_accounts(self, mango_account: Optional[MangoAccount] = None) -> None:
+        """
+        Verwirft zwischengespeicherte Remaining Accounts, z.B. nach einem Neuladen der Gruppe.
+
+        Args:
+            mango_account (Optional[MangoAccount]): Nur Einträge dieses Kontos verwerfen; bei None alle.
+        """
+        if mango_account is None:
+            self._health_remaining_accounts_cache.clear()
+            return
+        account_key = mango_account.public_key.to_base58()
+        for cache_key in [k for k in self._health_remaining_accounts_cache if account_key in k[1]]:
+            del self._health_remaining_accounts_cache[cache_key]
+
+    @staticmethod
+    def _active_positions_signature(mango_accounts: List[MangoAccount]) -> Tuple[Any, ...]:
+        return tuple(
+            (
+                tuple(token.token_index for token in mango_account.tokens),
+                tuple(perp.market_index for perp in mango_account.perps),
+                tuple(
+                    (serum3.market_index, serum3.open_orders.to_base58() if serum3.open_orders else None)
+                    for serum3 in mango_account.serum3
+                ),
+            )
+            for mango_account in mango_accounts
+        )
+
+    @staticmethod
+    def _build_health_remaining_accounts_uncached(
+        group: Group,
+        mango_accounts: List[MangoAccount],
+        banks: List[Bank],
+        perp_markets: List[PerpMarket],
+        open_orders_for_market: List[Tuple[Serum3Market, PublicKey]],
+    ) -> List[PublicKey]:
+        health_remaining_accounts: List[PublicKey] = []
+
+        # Zusätzliche Banks in freie Token-Positionen einfügen
+        token_position_indices = [
+            token.token_index for mango_account in mango_accounts for token in mango_account.tokens
+        ]
+        for bank in banks:
+            if bank.token_index in token_position_indices:
+                continue
+            try:
+                free_slot = token_position_indices.index(TokenPosition.TOKEN_INDEX_UNSET)
+            except ValueError:
+                raise ValueError(
+                    "All token positions are occupied, either expand mango account, or close an existing "
+                    "token position, e.g. by withdrawing token deposits, or repaying all borrows!"
+                )
+            token_position_indices[free_slot] = bank.token_index
+
+        active_banks = [
+            group.banks_map_by_token_index[token_index][0]
+            for token_index in uniq(
+                [i for i in token_position_indices if i != TokenPosition.TOKEN_INDEX_UNSET],
+                key=lambda i: i,
+            )
+        ]
+        health_remaining_accounts.extend(bank.public_key for bank in active_banks)
+        health_remaining_accounts.extend(bank.oracle for bank in active_banks)
+
+        # Zusätzliche PerpMarkets in freie Perp-Positionen einfügen
+        perp_market_indices = [
+            perp.market_index for mango_account in mango_accounts for perp in mango_account.perps
+        ]
+        for perp_market in perp_markets:
+            if perp_market.market_index in perp_market_indices:
+                continue
+            if PerpPosition.PERP_MARKET_INDEX_UNSET in perp_market_indices:
+                free_slot = perp_market_indices.index(PerpPosition.PERP_MARKET_INDEX_UNSET)
+                perp_market_indices[free_slot] = perp_market.market_index
+
+        active_perp_markets = [
+            group.get_perp_market_by_market_index(market_index)
+            for market_index in uniq(
+                [i for i in perp_market_indices if i != PerpPosition.PERP_MARKET_INDEX_UNSET],
+                key=lambda i: i,
+            )
+        ]
+        health_remaining_accounts.extend(perp_market.public_key for perp_market in active_perp_markets)
+        health_remaining_accounts.extend(perp_market.oracle for perp_market in active_perp_markets)
+
+        # Zusätzliche Open-Orders-Konten in freie Serum3-Positionen einfügen
+        serum3_positions = [
+            [serum3.market_index, serum3.open_orders]
+            for mango_account in mango_accounts
+            for serum3 in mango_account.serum3
+        ]
+        for serum3_market, open_orders_pk in open_orders_for_market:
+            if any(position[0] == serum3_market.market_index for position in serum3_positions):
+                continue
+            free_slot = next(
+                (
+                    position for position in serum3_positions
+                    if position[0] == Serum3Orders.SERUM3_MARKET_INDEX_UNSET
+                ),
+                None,
+            )
+            if free_slot is not None:
+                free_slot[0] = serum3_market.market_index
+                free_slot[1] = open_orders_pk
+
+        health_remaining_accounts.extend(
+            open_orders for market_index, open_orders in serum3_positions
+            if market_index != Serum3Orders.SERUM3_MARKET_INDEX_UNSET
+        )
+
+        return health_remaining_accounts
+
+    async def _append_fallback_oracles(
+        self,
+        group: Group,
+        health_remaining_accounts: List[PublicKey],
+    ) -> List[PublicKey]:
+        fallback_oracle_config = self.client.opts.fallback_oracle_config
+        if isinstance(fallback_oracle_config, FallbackOracleConfig):
+            fallback_oracle_config = fallback_oracle_config.value
+        if fallback_oracle_config == FallbackOracleConfig.NEVER.value:
+            return health_remaining_accounts
+
+        with rpc_priority(RpcPriority.ORACLE):
+            fallback_map = await derive_fallback_oracle_contexts(
+                group,
+                fallback_oracle_config,
+                self.client.connection,
+            )
+        fallbacks: List[PublicKey] = []
+        for pk in health_remaining_accounts:
+            fallbacks.extend(fallback_map.get(pk.to_base58(), []))
+
+        present = set(pk.to_base58() for pk in health_remaining_accounts)
+        for fallback in uniq(fallbacks, key=lambda pk: pk.to_base58()):
+            if fallback.to_base58() not in present and fallback != DEFAULT_PUBLIC_KEY:
+                health_remaining_accounts.append(fallback)
+        return health_remaining_accounts
+
     async def get_mango_account(
         self,
         mango_account_pk: PublicKey,
@@ -194,7 +413,14 @@ class MangoAccounts:
         mango_account_pk: PublicKey,
         account_info: Any,
     ) -> MangoAccount:
-        decoded_mango_account = self.client.program.coder.accounts.decode('mangoAccount', account_info.data)
+        return self.get_mango_account_from_data(mango_account_pk, account_info.data)
+
+    def get_mango_account_from_data(
+        self,
+        mango_account_pk: PublicKey,
+        data: bytes,
+    ) -> MangoAccount:
+        decoded_mango_account = self.client.program.coder.accounts.decode('mangoAccount', data)
         return MangoAccount.from_account(mango_account_pk, decoded_mango_account)
 
     async def get_mango_account_with_slot(
@@ -210,4 +436,50 @@ class MangoAccounts:
             await mango_account.reload_serum3_open_orders(self.client)
         return {'slot': resp.context.slot, 'value': mango_account}
 
+    async def get_mango_account_snapshot(
+        self,
+        group: Group,
+        mango_account_pk: PublicKey,
+        extra_pks: Optional[List[PublicKey]] = None,
+        commitment: Optional[str] = None,
+        min_context_slot: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Liest Gruppe, Banken, Oracles, PerpMarkets und den MangoAccount zu einem gemeinsamen Slot.
+
+        Anders als `get_mango_account_with_slot` sind alle Eingaben der Health-Berechnung
+        damit slot-konsistent (siehe `get_account_snapshot`).
+
+        Args:
+            group (Group): Die Gruppe.
+            mango_account_pk (PublicKey): Der MangoAccount.
+            extra_pks (Optional[List[PublicKey]]): Weitere Konten, z.B. Serum3 OpenOrders.
+            commitment (Optional[str]): Das Commitment.
+            min_context_slot (Optional[int]): Untergrenze für den Snapshot-Slot.
+
+        Returns:
+            Dict[str, Any]: {'slot': Snapshot-Slot, 'value': MangoAccount, 'snapshot': AccountSnapshot}.
+        """
+        pks = [group.public_key, mango_account_pk]
+        for banks in group.banks_map_by_token_index.values():
+            for bank in banks:
+                pks.extend([bank.public_key, bank.oracle])
+        for perp_market in group.perp_markets_map_by_market_index.values():
+            pks.append(perp_market.public_key)
+            if perp_market.oracle is not None:
+                pks.append(perp_market.oracle)
+        pks.extend(extra_pks or [])
+
+        snapshot: AccountSnapshot = await get_account_snapshot(
+            self.client.connection,
+            pks,
+            commitment=commitment,
+            min_context_slot=min_context_slot,
+        )
+        value = snapshot.get(mango_account_pk)
+        if value is None:
+            raise ValueError("MangoAccount not found")
+        mango_account = self.get_mango_account_from_data(mango_account_pk, base64.b64decode(value['data'][0]))
+        return {'slot': snapshot.slot, 'value': mango_account, 'snapshot': snapshot}
+
     # Weitere account-bezogene Methoden können hier hinzugefügt werden
@@ -4,7 +4,7 @@ import asyncio
 from typing import List, Optional, Dict, Any, Callable
 from dataclasses import dataclass
 
-from anchorpy import Program, Provider, Wallet, Idl
+from anchorpy import Program, Provider, Wallet
 from solana.publickey import PublicKey
 from solana.keypair import Keypair
 from solana.transaction import Transaction, TransactionInstruction
@@ -12,6 +12,7 @@ from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Commitment
 from solana.rpc.types import TxOpts
 
+from .idl_cache import load_idl
 from .types import (
     Group,
     MangoAccount,
@@ -27,6 +28,7 @@ from .utils import (
     get_recent_prioritization_fees,
     to_native_sell_per_buy_token_price,
     uniq,
+    PdaCache,
 )
 from .param_builder import (
     TokenRegisterParams,
@@ -43,6 +45,14 @@ from .accounts.mango_account import MangoAccounts
 from .accounts.oracles import Oracles
 from .accounts.serum3 import Serum3
 from .accounts.perp import Perp
+from .perp_settle import PerpSettler
+from .crank import PerpCrank
+from .price_impact import PriceImpactLoader
+from .router import SwapRouter
+from .metrics import MetricsRegistry, TransactionTimer, start_prometheus_exporter
+from .utils.connection import CustomAsyncClient
+from .utils.rpc_pool import PooledAsyncClient
+from .workers import HealthWorkerPool
 
 # ----------------------------
 # Optionen für den MangoClient
@@ -61,6 +71,17 @@ class MangoClientOptions:
     multiple_connections: Optional[List[AsyncClient]] = None
     fallback_oracle_config: FallbackOracleConfig = FallbackOracleConfig.NEVER  # 'never', 'all', 'dynamic', List[PublicKey]
     turn_off_price_impact_loading: bool = False
+    price_impact_source: Optional[str] = None  # Pfad oder JSON-String mit PriceImpact-Einträgen
+    price_impact_ttl_seconds: float = 3600.0
+    metrics: Optional[MetricsRegistry] = None
+    prometheus_port: Optional[int] = None  # Startet den Prometheus-Exporter, falls gesetzt
+    tx_confirmation_timeout_seconds: float = 60.0
+    rpc_endpoints: Optional[List[str]] = None  # Ersetzt `connection` durch einen PooledAsyncClient, falls gesetzt
+    rpc_hedge_percentile: Optional[float] = 95.0  # None deaktiviert abgesicherte Leseanfragen
+    rpc_rate_limit: Optional[float] = None  # Aufrufe pro Sekunde je Endpoint, siehe RpcRateLimiter
+    rpc_rate_burst: Optional[float] = None
+    rpc_batch_account_reads: bool = True  # Single-Flight und Bündelung von getAccountInfo
+    health_worker_processes: Optional[int] = None  # Startet einen HealthWorkerPool, falls gesetzt (0 = alle Kerne)
 
     def __post_init__(self):
         if self.prepended_global_additional_instructions is None:
@@ -80,6 +101,7 @@ class MangoClient:
 
     MAX_RECENT_PRIORITY_FEE_ACCOUNTS = 64
     MAX_RECENT_PRIORITY_FEES = 20
+    TX_STATUS_POLL_INTERVAL = 0.25
 
     class AccountRetriever:
         Scanning = 0
@@ -96,12 +118,39 @@ class MangoClient:
         self.program_id = program_id
         self.cluster = cluster
         self.opts = opts
+        self.pda_cache = PdaCache()
 
         # Initialize Submodule
         self.accounts = MangoAccounts(self)
         self.oracles = Oracles(self)
         self.serum3 = Serum3(self)
         self.perp = Perp(self)
+        self.perp_settler = PerpSettler(self)
+        self.crank = PerpCrank(self)
+        self.router = SwapRouter(self)
+        self.metrics = opts.metrics or MetricsRegistry()
+        if opts.rpc_endpoints:
+            self.program.provider.connection = PooledAsyncClient(
+                opts.rpc_endpoints,
+                commitment=self.connection._commitment,
+                metrics=self.metrics,
+                hedge_percentile=opts.rpc_hedge_percentile,
+            )
+        if isinstance(self.connection, CustomAsyncClient) and self.connection.metrics is None:
+            self.connection.metrics = self.metrics
+        if opts.rpc_rate_limit is not None and isinstance(self.connection, CustomAsyncClient):
+            self.connection.set_rate_limit(opts.rpc_rate_limit, opts.rpc_rate_burst)
+        if opts.rpc_batch_account_reads and isinstance(self.connection, CustomAsyncClient):
+            self.connection.enable_account_batching()
+        self.prometheus_server = None
+        if opts.prometheus_port is not None:
+            self.prometheus_server = start_prometheus_exporter(self.metrics, opts.prometheus_port)
+        self.health_workers: Optional[HealthWorkerPool] = None
+        if opts.health_worker_processes is not None:
+            self.health_workers = HealthWorkerPool(opts.health_worker_processes or None)
+        self.price_impact: Optional[PriceImpactLoader] = None
+        if opts.price_impact_source and not opts.turn_off_price_impact_loading:
+            self.price_impact = PriceImpactLoader(opts.price_impact_source, opts.price_impact_ttl_seconds)
 
         # Beispielhafte Erhöhung des StackTrace-Limits in Python
         import sys
@@ -115,7 +164,28 @@ class MangoClient:
     def wallet_pk(self) -> PublicKey:
         return self.program.provider.wallet.public_key
 
-        async def register_token(self, params: TokenRegisterParams) -> MangoSignatureStatus:
+    def warm_pda_cache(
+        self,
+        group: Group,
+        owners: Optional[List[PublicKey]] = None,
+        mango_accounts: Optional[List[MangoAccount]] = None,
+    ) -> None:
+        """
+        Leitet alle PDAs und ATAs einer geladenen Gruppe im Voraus ab.
+
+        Args:
+            group (Group): Die geladene Gruppe.
+            owners (Optional[List[PublicKey]]): Besitzer für die ATAs, standardmäßig das eigene Wallet.
+            mango_accounts (Optional[List[MangoAccount]]): MangoAccounts für die Serum3-Open-Orders-PDAs.
+        """
+        self.pda_cache.warm_for_group(
+            group,
+            self.program_id,
+            owners or [self.wallet_pk],
+            [mango_account.public_key for mango_account in mango_accounts or []],
+        )
+
+    async def register_token(self, params: TokenRegisterParams) -> MangoSignatureStatus:
         """
         Beispielhafte Methode zum Registrieren eines Tokens mit den gegebenen Parametern.
         """
@@ -173,6 +243,15 @@ class MangoClient:
         status = await self.send_and_confirm_transaction([ix, ix_gate_ix])
         return status
         
+    async def reload_price_impact_data(self) -> None:
+        """
+        Lädt die Price-Impact-Daten und startet deren Aktualisierung im Hintergrund.
+        """
+        if self.price_impact is None:
+            return
+        await self.price_impact.reload()
+        self.price_impact.start()
+
     async def send_and_confirm_transaction(
         self,
         ixs: List[TransactionInstruction],
@@ -181,6 +260,9 @@ class MangoClient:
         """
         Sendet eine Transaktion und bestätigt sie.
 
+        Die Dauer der Stufen build, fee_estimate, blockhash, sign, send, first_seen und
+        confirm wird in `self.metrics` erfasst und in `MangoSignatureStatus.timings` zurückgegeben.
+
         Args:
             ixs (List[TransactionInstruction]): Die Anweisungen, die die Transaktion ausmachen.
             opts (Optional[Dict[str, Any]]): Zusätzliche Optionen.
@@ -188,27 +270,41 @@ class MangoClient:
         Returns:
             MangoSignatureStatus: Der Status der Transaktionssignatur.
         """
+        timer = TransactionTimer(self.metrics)
         opts = opts or {}
-        prioritization_fee = opts.get('prioritization_fee', self.opts.prioritization_fee)
 
+        # Erstellen der Transaktion
+        transaction = Transaction()
+        transaction.instructions = self.opts.prepended_global_additional_instructions + ixs
+        timer.mark('build')
+
+        prioritization_fee = opts.get('prioritization_fee', self.opts.prioritization_fee)
         if self.opts.estimate_fee or opts.get('estimate_fee', False):
             prioritization_fee = await self.estimate_prioritization_fee(ixs)
+            timer.mark('fee_estimate')
         else:
             prioritization_fee = self.opts.prioritization_fee
 
-        # Erstellen der Transaktion
-        transaction = Transaction()
-        transaction.instructions = self.opts.prepended_global_additional_instructions + ixs
-
         # Hinzufügen Priorisierungsgebühr als zusätzliche Anweisung, falls erforderlich
         if prioritization_fee > 0:
             # Beispielhafte Hinzufügung einer Priorisierungsgebühr-Anweisung
             # Dies muss entsprechend Ihrer Anwendung implementiert werden
             pass
 
-        # Senden und Bestätigen der Transaktion
+        # Senden der Transaktion, in Stufen aufgeteilt wie in `Provider.send`
+        signature = ""
         try:
-            signature = await self.program.provider.send(transaction, opts=TxOpts(skip_preflight=False, preflight_commitment=self.opts.tx_confirmation_commitment))
+            blockhash_resp = await self.connection.get_recent_blockhash(self.opts.tx_confirmation_commitment)
+            transaction.recent_blockhash = blockhash_resp['result']['value']['blockhash']
+            timer.mark('blockhash')
+            self.program.provider.wallet.sign_transaction(transaction)
+            timer.mark('sign')
+            send_resp = await self.connection.send_raw_transaction(
+                transaction.serialize(),
+                opts=TxOpts(skip_preflight=False, preflight_commitment=self.opts.tx_confirmation_commitment),
+            )
+            signature = send_resp['result']
+            timer.mark('send')
             status = MangoSignatureStatus(signature=signature, status="success")
         except Exception as e:
             status = MangoSignatureStatus(signature="", status=str(e))
@@ -218,15 +314,46 @@ class MangoClient:
             self.opts.post_send_tx_callback(status)
 
         # Bestätigen der Transaktion
-        try:
-            await self.program.provider.connection.confirm_transaction(signature, self.opts.tx_confirmation_commitment)
-            if self.opts.post_tx_confirmation_callback:
-                self.opts.post_tx_confirmation_callback(status)
-        except Exception as e:
-            status.status = f"confirmation_failed: {str(e)}"
-
+        if signature:
+            try:
+                await self._await_confirmation(signature, timer)
+                if self.opts.post_tx_confirmation_callback:
+                    self.opts.post_tx_confirmation_callback(status)
+            except Exception as e:
+                status.status = f"confirmation_failed: {str(e)}"
+
+        status.timings = timer.finish("success" if status.status == "success" else "failed")
         return status
 
+    async def _await_confirmation(self, signature: str, timer: TransactionTimer) -> None:
+        """
+        Fragt den Signaturstatus ab, bis die Transaktion die konfigurierte Commitment-Stufe erreicht.
+
+        Der erste Status markiert die Stufe first_seen, das Erreichen der Commitment-Stufe confirm.
+        """
+        levels = ['processed', 'confirmed', 'finalized']
+        commitment = str(self.opts.tx_confirmation_commitment)
+        required = levels.index(commitment) if commitment in levels else 0
+        deadline = asyncio.get_running_loop().time() + self.opts.tx_confirmation_timeout_seconds
+        seen = False
+        while True:
+            resp = await self.connection.get_signature_statuses([signature])
+            value = resp['result']['value'][0]
+            if value is not None:
+                if not seen:
+                    timer.mark('first_seen')
+                    seen = True
+                if value.get('err') is not None:
+                    timer.mark('confirm')
+                    raise RuntimeError(f"transaction failed: {value['err']}")
+                confirmation_status = value.get('confirmationStatus') or 'processed'
+                if levels.index(confirmation_status) >= required:
+                    timer.mark('confirm')
+                    return
+            if asyncio.get_running_loop().time() > deadline:
+                raise TimeoutError(f"transaction {signature} not confirmed")
+            await asyncio.sleep(self.TX_STATUS_POLL_INTERVAL)
+
     async def send_and_confirm_transaction_for_group(
         self,
         group: Group,
@@ -354,16 +481,8 @@ class MangoClient:
         Returns:
             MangoClient: Der verbundene MangoClient.
         """
-        # Laden Sie das IDL (Interface Definition Language) korrekt
-        # Dies muss an Ihre spezifische Implementierung angepasst werden
-        # Beispiel: Laden aus einer JSON-Datei
-        import json
-        import os
-
-        idl_path = os.path.join(os.path.dirname(__file__), 'idl.json')
-        with open(idl_path, 'r') as f:
-            idl_json = json.load(f)
-        idl = Idl.from_json(idl_json)
+        # Das IDL wird je Prozess nur einmal geladen (siehe idl_cache.load_idl)
+        idl = load_idl()
 
         # Erstellen Sie das Keypair für das Wallet (hier als Platzhalter ein generiertes Keypair)
         # In der Praxis sollten Sie das Keypair sicher laden
@@ -371,7 +490,7 @@ class MangoClient:
         wallet = Wallet(wallet_keypair)
 
         # Erstellen Sie den AsyncClient und den Provider
-        connection = AsyncClient(cluster_url)
+        connection = CustomAsyncClient(cluster_url)
         provider = Provider(connection, wallet, Provider.default_options())
 
         # Initialisieren Sie das Program-Objekt
@@ -404,14 +523,8 @@ class MangoClient:
         Returns:
             MangoClient: Der verbundene MangoClient.
         """
-        # Laden Sie das IDL korrekt
-        import json
-        import os
-
-        idl_path = os.path.join(os.path.dirname(__file__), 'idl.json')
-        with open(idl_path, 'r') as f:
-            idl_json = json.load(f)
-        idl = Idl.from_json(idl_json)
+        # Das IDL wird je Prozess nur einmal geladen (siehe idl_cache.load_idl)
+        idl = load_idl()
 
         # Finden Sie die entsprechende Group PublicKey basierend auf dem Namen
         # Dies könnte eine Mapping-Tabelle sein oder eine API-Abfrage
@@ -432,7 +545,7 @@ class MangoClient:
         wallet = Wallet(wallet_keypair)
 
         # Erstellen Sie den AsyncClient und den Provider
-        connection = AsyncClient("https://api.mainnet-beta.solana.com")  # Anpassen nach Bedarf
+        connection = CustomAsyncClient("https://api.mainnet-beta.solana.com")  # Anpassen nach Bedarf
         provider = Provider(connection, wallet, Provider.default_options())
 
         # Initialisieren Sie das Program-Objekt
@@ -513,6 +626,7 @@ class MangoClient:
         max_sell_native: int,
         max_buy: float,
         max_sell: float,
+        price_impact_fn: Optional[Callable[[int, float], float]] = None,
     ) -> float:
         """
         Berechnet den Preisaufschlag für einen Conditional Swap.
@@ -525,11 +639,15 @@ class MangoClient:
             max_sell_native (int): Maximale Verkaufmenge in nativer Darstellung.
             max_buy (float): Maximale Kaufmenge.
             max_sell (float): Maximale Verkaufmenge.
+            price_impact_fn (Optional[Callable[[int, float], float]]): Preis-Impact in Prozent je (Token-Index, USD-Betrag),
+                standardmäßig aus den geladenen Price-Impact-Daten.
 
         Returns:
-            float: Der berechnete Preisaufschlag.
+            float: Der berechnete Preisaufschlag in Prozent.
         """
         from .utils import compute_premium
+        if price_impact_fn is None and self.price_impact is not None:
+            price_impact_fn = self.price_impact.price_impact_fn(group)
         return compute_premium(
             group=group,
             buy_bank=buy_bank,
@@ -537,7 +655,8 @@ class MangoClient:
             max_buy_native=max_buy_native,
             max_sell_native=max_sell_native,
             max_buy=max_buy,
-            max_sell=max_sell
+            max_sell=max_sell,
+            price_impact_fn=price_impact_fn,
         )
 
 # ----------------------------
@@ -0,0 +1,422 @@
+# mango_client_py/crank.py
+
+import asyncio
+import base64
+import logging
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from solana.publickey import PublicKey
+from solana.transaction import TransactionInstruction
+
+from .types import Group, PerpMarket, MangoSignatureStatus
+from .utils import set_compute_unit_limit_ix
+
+if TYPE_CHECKING:
+    from .client import MangoClient
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# EventQueue
+# ----------------------------
+
+# Layout aus programs/mango-v4/src/state/orderbook/queue.rs
+ACCOUNT_DISCRIMINATOR_SIZE = 8
+MAX_NUM_EVENTS = 488
+EVENT_SIZE = 208
+EVENT_QUEUE_HEADER = struct.Struct('<IIQ')  # head, count, seq_num
+
+FILL_EVENT_TYPE = 0
+OUT_EVENT_TYPE = 1
+LIQUIDATE_EVENT_TYPE = 2
+
+# Compute-Schätzungen wie in lib/client/src/context.rs
+CU_PERP_CONSUME_EVENTS_BASE = 10_000
+CU_PERP_CONSUME_EVENTS_PER_EVENT = 18_000
+CU_PERP_UPDATE_FUNDING = 40_000
+MAX_TRANSACTION_CU = 1_400_000
+
+
+@dataclass
+class FillEvent:
+    taker_side: int
+    maker_out: bool
+    maker_slot: int
+    timestamp: int
+    seq_num: int
+    maker: PublicKey
+    taker: PublicKey
+    price: int
+    quantity: int
+    event_type: int = FILL_EVENT_TYPE
+
+
+@dataclass
+class OutEvent:
+    side: int
+    owner_slot: int
+    timestamp: int
+    seq_num: int
+    owner: PublicKey
+    quantity: int
+    event_type: int = OUT_EVENT_TYPE
+
+
+@dataclass
+class LiquidateEvent:
+    timestamp: int
+    seq_num: int
+    event_type: int = LIQUIDATE_EVENT_TYPE
+
+
+PerpEvent = Union[FillEvent, OutEvent, LiquidateEvent]
+
+
+def decode_perp_event(raw: bytes) -> PerpEvent:
+    """
+    Dekodiert ein 208-Byte-Event der EventQueue.
+
+    Args:
+        raw (bytes): Die Rohdaten eines `AnyEvent`.
+
+    Returns:
+        PerpEvent: Das dekodierte Event.
+    """
+    event_type = raw[0]
+    if event_type == FILL_EVENT_TYPE:
+        taker_side, maker_out, maker_slot = raw[1], raw[2], raw[3]
+        timestamp, seq_num = struct.unpack_from('<QQ', raw, 8)
+        price, quantity = struct.unpack_from('<qq', raw, 168)
+        return FillEvent(
+            taker_side=taker_side,
+            maker_out=maker_out == 1,
+            maker_slot=maker_slot,
+            timestamp=timestamp,
+            seq_num=seq_num,
+            maker=PublicKey(raw[24:56]),
+            taker=PublicKey(raw[96:128]),
+            price=price,
+            quantity=quantity,
+        )
+    if event_type == OUT_EVENT_TYPE:
+        timestamp, seq_num = struct.unpack_from('<QQ', raw, 8)
+        (quantity,) = struct.unpack_from('<q', raw, 56)
+        return OutEvent(
+            side=raw[1],
+            owner_slot=raw[2],
+            timestamp=timestamp,
+            seq_num=seq_num,
+            owner=PublicKey(raw[24:56]),
+            quantity=quantity,
+        )
+    if event_type == LIQUIDATE_EVENT_TYPE:
+        timestamp, seq_num = struct.unpack_from('<QQ', raw, 8)
+        return LiquidateEvent(timestamp=timestamp, seq_num=seq_num)
+    raise ValueError(f"Unknown event with event_type {event_type}!")
+
+
+@dataclass
+class EventQueue:
+    head: int
+    count: int
+    seq_num: int
+    raw: bytes = field(repr=False)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'EventQueue':
+        """
+        Dekodiert die Kontodaten einer EventQueue (inklusive Anchor-Diskriminator).
+        """
+        head, count, seq_num = EVENT_QUEUE_HEADER.unpack_from(data, ACCOUNT_DISCRIMINATOR_SIZE)
+        offset = ACCOUNT_DISCRIMINATOR_SIZE + EVENT_QUEUE_HEADER.size
+        return cls(head=head, count=count, seq_num=seq_num, raw=data[offset:offset + MAX_NUM_EVENTS * EVENT_SIZE])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def unconsumed_events(self, limit: Optional[int] = None) -> List[PerpEvent]:
+        """
+        Dekodiert die noch nicht verarbeiteten Events in Queue-Reihenfolge.
+
+        Es werden nur die benötigten Slots dekodiert.
+
+        Args:
+            limit (Optional[int]): Maximale Anzahl an Events ab dem Kopf der Queue.
+
+        Returns:
+            List[PerpEvent]: Die Events.
+        """
+        n = self.count if limit is None else min(self.count, limit)
+        events: List[PerpEvent] = []
+        for i in range(n):
+            slot = (self.head + i) % MAX_NUM_EVENTS
+            events.append(decode_perp_event(self.raw[slot * EVENT_SIZE:(slot + 1) * EVENT_SIZE]))
+        return events
+
+
+def event_accounts(event: PerpEvent) -> List[PublicKey]:
+    """
+    Gibt die MangoAccounts zurück, die `perp_consume_events` für ein Event beschreibt.
+    """
+    if isinstance(event, FillEvent):
+        return [event.maker, event.taker]
+    if isinstance(event, OutEvent):
+        return [event.owner]
+    return []
+
+# ----------------------------
+# Planung
+# ----------------------------
+
+@dataclass
+class ConsumeEventsBatch:
+    accounts: List[PublicKey]
+    num_events: int
+
+    @property
+    def compute_units(self) -> int:
+        return CU_PERP_CONSUME_EVENTS_BASE + self.num_events * CU_PERP_CONSUME_EVENTS_PER_EVENT
+
+
+def plan_consume_events(
+    events: List[PerpEvent],
+    max_events_per_ix: int = 10,
+    max_accounts_per_ix: int = 20,
+    max_compute_units: int = MAX_TRANSACTION_CU,
+) -> List[ConsumeEventsBatch]:
+    """
+    Teilt Events in aufeinanderfolgende Batches für `perp_consume_events`.
+
+    Das Programm verarbeitet Events strikt ab dem Kopf der Queue und bricht ab,
+    sobald ein benötigtes MangoAccount fehlt. Deshalb werden die Batches in
+    Queue-Reihenfolge gebildet und jedes Batch enthält alle Konten seiner Events.
+
+    Args:
+        events (List[PerpEvent]): Events ab dem Kopf der Queue.
+        max_events_per_ix (int): Maximale Events je Anweisung.
+        max_accounts_per_ix (int): Maximale Anzahl an Remaining Accounts je Anweisung.
+        max_compute_units (int): Compute-Unit-Obergrenze je Anweisung.
+
+    Returns:
+        List[ConsumeEventsBatch]: Die Batches.
+    """
+    max_events_by_cu = (max_compute_units - CU_PERP_CONSUME_EVENTS_BASE) // CU_PERP_CONSUME_EVENTS_PER_EVENT
+    max_events = max(1, min(max_events_per_ix, max_events_by_cu))
+
+    batches: List[ConsumeEventsBatch] = []
+    accounts: Dict[str, PublicKey] = {}
+    num_events = 0
+    for event in events:
+        new_accounts = {pk.to_base58(): pk for pk in event_accounts(event) if pk.to_base58() not in accounts}
+        if num_events and (num_events >= max_events or len(accounts) + len(new_accounts) > max_accounts_per_ix):
+            batches.append(ConsumeEventsBatch(list(accounts.values()), num_events))
+            accounts = {}
+            num_events = 0
+            new_accounts = {pk.to_base58(): pk for pk in event_accounts(event)}
+        accounts.update(new_accounts)
+        num_events += 1
+    if num_events:
+        batches.append(ConsumeEventsBatch(list(accounts.values()), num_events))
+    return batches
+
+# ----------------------------
+# Crank
+# ----------------------------
+
+class PerpCrank:
+    """
+    Verarbeitet die EventQueues und aktualisiert das Funding von PerpMarkets.
+    """
+
+    def __init__(self, client: 'MangoClient'):
+        self.client = client
+
+    async def load_event_queue(self, perp_market: PerpMarket) -> EventQueue:
+        """
+        Lädt und dekodiert die EventQueue eines PerpMarkets.
+        """
+        account_info = await self.client.connection.get_account_info(perp_market.event_queue)
+        value = account_info['result']['value']
+        if value is None:
+            raise ValueError(f"EventQueue {perp_market.event_queue} not found")
+        return EventQueue.decode(base64.b64decode(value['data'][0]))
+
+    async def perp_consume_events_ix(
+        self,
+        group: Group,
+        perp_market: PerpMarket,
+        accounts: List[PublicKey],
+        limit: int,
+    ) -> TransactionInstruction:
+        return await self.client.program.methods.perp_consume_events(limit).accounts({
+            'group': group.public_key,
+            'perp_market': perp_market.public_key,
+            'event_queue': perp_market.event_queue,
+        }).remaining_accounts([
+            {"pubkey": pk, "is_signer": False, "is_writable": True} for pk in accounts
+        ]).instruction()
+
+    async def perp_update_funding_ix(
+        self,
+        group: Group,
+        perp_market: PerpMarket,
+    ) -> TransactionInstruction:
+        return await self.client.program.methods.perp_update_funding().accounts({
+            'group': group.public_key,
+            'perp_market': perp_market.public_key,
+            'bids': perp_market.bids,
+            'asks': perp_market.asks,
+            'oracle': perp_market.oracle,
+        }).instruction()
+
+    async def build_consume_events_ixs(
+        self,
+        group: Group,
+        perp_market: PerpMarket,
+        max_events: int = 40,
+        max_events_per_ix: int = 10,
+        max_accounts_per_ix: int = 20,
+    ) -> Tuple[List[List[TransactionInstruction]], int]:
+        """
+        Liest die EventQueue und baut sendefertige Anweisungslisten für die nächsten Events.
+
+        Args:
+            group (Group): Die Gruppe.
+            perp_market (PerpMarket): Der PerpMarket.
+            max_events (int): Maximale Anzahl an Events ab dem Kopf der Queue.
+            max_events_per_ix (int): Maximale Events je Anweisung.
+            max_accounts_per_ix (int): Maximale Remaining Accounts je Anweisung.
+
+        Returns:
+            Tuple[List[List[TransactionInstruction]], int]: Je Batch eine Anweisungsliste sowie die Anzahl der
+                Events, die danach noch in der Queue verbleiben.
+        """
+        event_queue = await self.load_event_queue(perp_market)
+        batches = plan_consume_events(
+            event_queue.unconsumed_events(max_events),
+            max_events_per_ix,
+            max_accounts_per_ix,
+        )
+        ixs: List[List[TransactionInstruction]] = []
+        for batch in batches:
+            ix = await self.perp_consume_events_ix(group, perp_market, batch.accounts, batch.num_events)
+            ixs.append([set_compute_unit_limit_ix(batch.compute_units), ix])
+        return ixs, len(event_queue) - sum(batch.num_events for batch in batches)
+
+    async def consume_events(
+        self,
+        group: Group,
+        perp_market: PerpMarket,
+        max_events: int = 40,
+        max_events_per_ix: int = 10,
+        max_accounts_per_ix: int = 20,
+    ) -> Tuple[List[MangoSignatureStatus], int]:
+        """
+        Verarbeitet bis zu `max_events` Events und gibt die Status sowie die verbleibende Queue-Länge zurück.
+
+        Die Limits je Anweisung werden an `build_consume_events_ixs` weitergegeben.
+        """
+        ixs, remaining = await self.build_consume_events_ixs(
+            group,
+            perp_market,
+            max_events,
+            max_events_per_ix,
+            max_accounts_per_ix,
+        )
+        statuses: List[MangoSignatureStatus] = []
+        for batch_ixs in ixs:
+            statuses.append(await self.client.send_and_confirm_transaction_for_group(group, batch_ixs))
+        return statuses, remaining
+
+    async def update_funding(self, group: Group, perp_market: PerpMarket) -> MangoSignatureStatus:
+        ix = await self.perp_update_funding_ix(group, perp_market)
+        return await self.client.send_and_confirm_transaction_for_group(
+            group, [set_compute_unit_limit_ix(CU_PERP_UPDATE_FUNDING), ix]
+        )
+
+    async def loop_consume_events(
+        self,
+        group: Group,
+        perp_market: PerpMarket,
+        interval: float = 5.0,
+        max_events: int = 40,
+        stop: Optional[asyncio.Event] = None,
+        max_backoff: float = 60.0,
+    ) -> None:
+        """
+        Verarbeitet die EventQueue eines Markts periodisch.
+
+        Nur wenn alle Transaktionen eines Durchlaufs bestätigt wurden und noch Events in der Queue
+        liegen, wird ohne Wartezeit weitergearbeitet. Nach einem Fehlschlag verdoppelt sich die
+        Wartezeit bis `max_backoff`.
+        """
+        stop = stop or asyncio.Event()
+        delay = interval
+        while not stop.is_set():
+            remaining = 0
+            confirmed = False
+            try:
+                statuses, remaining = await self.consume_events(group, perp_market, max_events)
+                failed = [status for status in statuses if status.status != "success"]
+                for status in failed:
+                    logger.error(f"consume_events market={perp_market.name} error={status.status}")
+                confirmed = bool(statuses) and not failed
+                delay = min(delay * 2, max_backoff) if failed else interval
+            except Exception as e:
+                logger.error(f"consume_events market={perp_market.name} error={e}")
+                delay = min(delay * 2, max_backoff)
+            if confirmed and remaining > 0:
+                continue
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def loop_update_funding(
+        self,
+        group: Group,
+        perp_market: PerpMarket,
+        interval: float = 60.0,
+        stop: Optional[asyncio.Event] = None,
+    ) -> None:
+        """
+        Aktualisiert das Funding eines Markts periodisch.
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.update_funding(group, perp_market)
+            except Exception as e:
+                logger.error(f"update_funding market={perp_market.name} error={e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(
+        self,
+        group: Group,
+        perp_markets: Optional[List[PerpMarket]] = None,
+        interval_consume_events: float = 5.0,
+        interval_update_funding: float = 60.0,
+        stop: Optional[asyncio.Event] = None,
+    ) -> None:
+        """
+        Startet je PerpMarket eine Consume-Events- und eine Funding-Schleife, bis `stop` gesetzt wird.
+
+        Args:
+            group (Group): Die Gruppe.
+            perp_markets (Optional[List[PerpMarket]]): Die Märkte, standardmäßig alle der Gruppe.
+            interval_consume_events (float): Intervall der Consume-Events-Schleife in Sekunden.
+            interval_update_funding (float): Intervall der Funding-Schleife in Sekunden.
+            stop (Optional[asyncio.Event]): Beendet alle Schleifen, sobald gesetzt.
+        """
+        stop = stop or asyncio.Event()
+        perp_markets = perp_markets or list(group.perp_markets_map_by_market_index.values())
+        tasks: List[Any] = []
+        for perp_market in perp_markets:
+            tasks.append(self.loop_consume_events(group, perp_market, interval_consume_events, stop=stop))
+            tasks.append(self.loop_update_funding(group, perp_market, interval_update_funding, stop=stop))
+        await asyncio.gather(*tasks)
@@ -0,0 +1,1132 @@
+# mango_client_py/health.py
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .types import (
+    Group,
+    MangoAccount,
+    HealthType,
+    Bank,
+    PerpMarket,
+    PerpOrderSide,
+    Serum3Side,
+)
+
+# Obergrenze für das Health-Verhältnis von Konten ohne nennenswerte Verbindlichkeiten
+MAX_HEALTH_RATIO = float('inf')
+MIN_LIABS_FOR_RATIO = 0.001
+
+# ----------------------------
+# Gewichtungen
+# ----------------------------
+
+def weight_row(health_type: HealthType) -> int:
+    """
+    Gibt die Zeile der Gewichtungs-Arrays für einen Health-Typ zurück (0 = maint, 1 = init).
+
+    LiquidationEnd verwendet wie im Programm die Init-Gewichte.
+    """
+    return 0 if health_type == HealthType.MAINT else 1
+
+
+def token_health_contributions(
+    balances: np.ndarray,
+    prices: np.ndarray,
+    asset_weights: np.ndarray,
+    liab_weights: np.ndarray,
+) -> np.ndarray:
+    """
+    Berechnet die gewichteten Health-Beiträge nativer Token-Salden.
+
+    Args:
+        balances (np.ndarray): Native Salden.
+        prices (np.ndarray): Oracle-Preise in nativen Quote-Einheiten.
+        asset_weights (np.ndarray): Gewichte für positive Salden.
+        liab_weights (np.ndarray): Gewichte für negative Salden.
+
+    Returns:
+        np.ndarray: Die Health-Beiträge in nativen Quote-Einheiten.
+    """
+    value = balances * prices
+    return np.where(value > 0, value * asset_weights, value * liab_weights)
+
+
+def perp_health_unsettled_pnl(
+    base_native: np.ndarray,
+    quote_native: np.ndarray,
+    prices: np.ndarray,
+    base_asset_weights: np.ndarray,
+    base_liab_weights: np.ndarray,
+    overall_asset_weights: np.ndarray,
+) -> np.ndarray:
+    """
+    Berechnet den gewichteten, unrealisierten PnL von Perp-Positionen in nativen Quote-Einheiten.
+
+    Args:
+        base_native (np.ndarray): Basisposition in nativen Einheiten.
+        quote_native (np.ndarray): Quote-Position in nativen Einheiten.
+        prices (np.ndarray): Oracle-Preise pro nativer Basiseinheit.
+        base_asset_weights (np.ndarray): Gewichte für Long-Positionen.
+        base_liab_weights (np.ndarray): Gewichte für Short-Positionen.
+        overall_asset_weights (np.ndarray): Gewichte für positiven PnL.
+
+    Returns:
+        np.ndarray: Der gewichtete PnL.
+    """
+    base_value = base_native * prices
+    weighted = quote_native + np.where(
+        base_value > 0, base_value * base_asset_weights, base_value * base_liab_weights
+    )
+    return np.where(weighted > 0, weighted * overall_asset_weights, weighted)
+
+
+def serum3_reserved_contributions(
+    reserved_base: np.ndarray,
+    reserved_quote: np.ndarray,
+    base_prices: np.ndarray,
+    quote_prices: np.ndarray,
+    base_asset_weights: np.ndarray,
+    quote_asset_weights: np.ndarray,
+) -> np.ndarray:
+    """
+    Berechnet den Health-Beitrag reservierter Serum3-Beträge.
+
+    Reservierte Beträge können vollständig in Basis- oder Quote-Token ausgeführt
+    werden; gezählt wird der ungünstigere der beiden Fälle.
+    """
+    value = reserved_base * base_prices + reserved_quote * quote_prices
+    return np.minimum(value * base_asset_weights, value * quote_asset_weights)
+
+
+def spot_amount_taken_for_health_zero(
+    health: float,
+    starting_spot: float,
+    asset_weighted_price: float,
+    liab_weighted_price: float,
+) -> float:
+    """
+    Gibt die Menge eines Tokens zurück, die entnommen werden kann, bis die Health null erreicht.
+
+    Args:
+        health (float): Aktuelle Health in nativen Quote-Einheiten.
+        starting_spot (float): Aktueller nativer Saldo des Tokens.
+        asset_weighted_price (float): Preis mal Asset-Gewicht.
+        liab_weighted_price (float): Preis mal Liability-Gewicht.
+
+    Returns:
+        float: Die entnehmbare native Menge.
+    """
+    if health <= 0:
+        return 0.0
+    taken = 0.0
+    if starting_spot > 0:
+        if asset_weighted_price > 0:
+            asset_max = health / asset_weighted_price
+            if asset_max <= starting_spot:
+                return asset_max
+        taken = starting_spot
+        health -= starting_spot * asset_weighted_price
+    if health > 0:
+        taken += health / liab_weighted_price
+    return taken
+
+
+def spot_amounts_taken_for_health_zero(
+    health: np.ndarray,
+    starting_spot: np.ndarray,
+    asset_weighted_price: np.ndarray,
+    liab_weighted_price: np.ndarray,
+) -> np.ndarray:
+    """
+    Vektorisierte Form von `spot_amount_taken_for_health_zero`, elementweise über alle Argumente.
+    """
+    health = np.asarray(health, dtype=np.float64)
+    spot = np.maximum(np.asarray(starting_spot, dtype=np.float64), 0.0)
+    asset_weighted_price = np.asarray(asset_weighted_price, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        asset_max = np.where(asset_weighted_price > 0, health / asset_weighted_price, np.inf)
+        # Erst die Einlage aufbrauchen, den Rest als Kredit aufnehmen
+        remaining = np.maximum(health - spot * asset_weighted_price, 0.0)
+        taken = np.where(asset_max <= spot, asset_max, spot + remaining / liab_weighted_price)
+    return np.where(health > 0, taken, 0.0)
+
+
+def health_ratio_from_assets_and_liabs(assets: np.ndarray, liabs: np.ndarray) -> np.ndarray:
+    """
+    Berechnet das Health-Verhältnis 100 * (Assets - Liabs) / Liabs.
+    """
+    assets = np.asarray(assets, dtype=np.float64)
+    liabs = np.asarray(liabs, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = 100.0 * (assets - liabs) / liabs
+    return np.where(liabs > MIN_LIABS_FOR_RATIO, ratio, MAX_HEALTH_RATIO)
+
+
+# ----------------------------
+# Lookup-Tabellen der Gruppe
+# ----------------------------
+
+@dataclass
+class HealthTables:
+    """
+    Dichte, nach Token- bzw. Marktindex adressierte Arrays mit Preisen und Gewichten einer Gruppe.
+    """
+    token_known: np.ndarray
+    token_prices: np.ndarray
+    token_deposit_index: np.ndarray
+    token_borrow_index: np.ndarray
+    token_asset_weights: np.ndarray  # Form (2, n): maint, init
+    token_liab_weights: np.ndarray
+    perp_known: np.ndarray
+    perp_prices: np.ndarray
+    perp_base_lot_size: np.ndarray
+    perp_settle_token_index: np.ndarray
+    perp_base_asset_weights: np.ndarray
+    perp_base_liab_weights: np.ndarray
+    perp_overall_asset_weights: np.ndarray
+
+    @classmethod
+    def from_group(cls, group: Group) -> 'HealthTables':
+        """
+        Baut die Tabellen aus den Banks und PerpMarkets einer geladenen Gruppe.
+
+        Args:
+            group (Group): Die Gruppe.
+
+        Returns:
+            HealthTables: Die Lookup-Tabellen.
+        """
+        banks: List[Bank] = [banks[0] for banks in group.banks_map_by_token_index.values() if banks]
+        n_tokens = max((bank.token_index for bank in banks), default=-1) + 1
+        token_known = np.zeros(n_tokens, dtype=bool)
+        token_prices = np.zeros(n_tokens)
+        token_deposit_index = np.ones(n_tokens)
+        token_borrow_index = np.ones(n_tokens)
+        token_asset_weights = np.zeros((2, n_tokens))
+        token_liab_weights = np.ones((2, n_tokens))
+        for bank in banks:
+            i = bank.token_index
+            token_known[i] = True
+            token_prices[i] = bank.price
+            token_deposit_index[i] = bank.deposit_index
+            token_borrow_index[i] = bank.borrow_index
+            token_asset_weights[:, i] = (bank.maint_asset_weight, bank.init_asset_weight)
+            token_liab_weights[:, i] = (bank.maint_liab_weight, bank.init_liab_weight)
+
+        perp_markets: List[PerpMarket] = list(group.perp_markets_map_by_market_index.values())
+        n_perps = max((pm.market_index for pm in perp_markets), default=-1) + 1
+        perp_known = np.zeros(n_perps, dtype=bool)
+        perp_prices = np.zeros(n_perps)
+        perp_base_lot_size = np.ones(n_perps)
+        perp_settle_token_index = np.zeros(n_perps, dtype=np.int64)
+        perp_base_asset_weights = np.zeros((2, n_perps))
+        perp_base_liab_weights = np.ones((2, n_perps))
+        perp_overall_asset_weights = np.zeros((2, n_perps))
+        for pm in perp_markets:
+            i = pm.market_index
+            perp_known[i] = True
+            perp_prices[i] = pm.price
+            perp_base_lot_size[i] = pm.base_lot_size
+            perp_settle_token_index[i] = pm.settle_token_index
+            perp_base_asset_weights[:, i] = (pm.maint_base_asset_weight, pm.init_base_asset_weight)
+            perp_base_liab_weights[:, i] = (pm.maint_base_liab_weight, pm.init_base_liab_weight)
+            perp_overall_asset_weights[:, i] = (pm.maint_overall_asset_weight, pm.init_overall_asset_weight)
+
+        return cls(
+            token_known=token_known,
+            token_prices=token_prices,
+            token_deposit_index=token_deposit_index,
+            token_borrow_index=token_borrow_index,
+            token_asset_weights=token_asset_weights,
+            token_liab_weights=token_liab_weights,
+            perp_known=perp_known,
+            perp_prices=perp_prices,
+            perp_base_lot_size=perp_base_lot_size,
+            perp_settle_token_index=perp_settle_token_index,
+            perp_base_asset_weights=perp_base_asset_weights,
+            perp_base_liab_weights=perp_base_liab_weights,
+            perp_overall_asset_weights=perp_overall_asset_weights,
+        )
+
+
+# ----------------------------
+# HealthCache
+# ----------------------------
+
+class HealthCache:
+    """
+    Array-basierte Health-Berechnung für ein einzelnes MangoAccount.
+
+    Vereinfachte Portierung von `healthCache.ts`: Token-Salden werden um den
+    gewichteten Perp-PnL ihres Settle-Tokens ergänzt, freie Serum3-Beträge zählen
+    als Token-Salden und reservierte Beträge im ungünstigeren Ausführungsfall.
+    """
+
+    def __init__(
+        self,
+        token_indexes: np.ndarray,
+        token_prices: np.ndarray,
+        token_balances: np.ndarray,
+        token_asset_weights: np.ndarray,
+        token_liab_weights: np.ndarray,
+        perp_market_indexes: np.ndarray,
+        perp_settle_info_index: np.ndarray,
+        perp_base_native: np.ndarray,
+        perp_quote_native: np.ndarray,
+        perp_prices: np.ndarray,
+        perp_base_asset_weights: np.ndarray,
+        perp_base_liab_weights: np.ndarray,
+        perp_overall_asset_weights: np.ndarray,
+        serum3_base_info_index: np.ndarray,
+        serum3_quote_info_index: np.ndarray,
+        serum3_reserved_base: np.ndarray,
+        serum3_reserved_quote: np.ndarray,
+    ):
+        self.token_indexes = token_indexes
+        self.token_prices = token_prices
+        self.token_balances = token_balances
+        self.token_asset_weights = token_asset_weights
+        self.token_liab_weights = token_liab_weights
+        self.perp_market_indexes = perp_market_indexes
+        self.perp_settle_info_index = perp_settle_info_index
+        self.perp_base_native = perp_base_native
+        self.perp_quote_native = perp_quote_native
+        self.perp_prices = perp_prices
+        self.perp_base_asset_weights = perp_base_asset_weights
+        self.perp_base_liab_weights = perp_base_liab_weights
+        self.perp_overall_asset_weights = perp_overall_asset_weights
+        self.serum3_base_info_index = serum3_base_info_index
+        self.serum3_quote_info_index = serum3_quote_info_index
+        self.serum3_reserved_base = serum3_reserved_base
+        self.serum3_reserved_quote = serum3_reserved_quote
+
+    @classmethod
+    def from_mango_account(
+        cls,
+        group: Optional[Group],
+        mango_account: MangoAccount,
+        tables: Optional[HealthTables] = None,
+    ) -> 'HealthCache':
+        """
+        Baut den HealthCache aus den aktiven Positionen eines MangoAccounts.
+
+        Args:
+            group (Group): Die geladene Gruppe (entfällt, wenn `tables` übergeben wird).
+            mango_account (MangoAccount): Das MangoAccount.
+            tables (Optional[HealthTables]): Bereits gebaute Lookup-Tabellen der Gruppe.
+
+        Returns:
+            HealthCache: Der HealthCache.
+        """
+        tables = tables or HealthTables.from_group(group)
+
+        token_indexes: List[int] = []
+        balances: List[float] = []
+        info_index: Dict[int, int] = {}
+
+        def info_for(token_index: int) -> int:
+            if token_index not in info_index:
+                if token_index >= len(tables.token_known) or not tables.token_known[token_index]:
+                    raise ValueError(f"Bank for token index {token_index} not found!")
+                info_index[token_index] = len(token_indexes)
+                token_indexes.append(token_index)
+                balances.append(0.0)
+            return info_index[token_index]
+
+        for token in mango_account.tokens_active():
+            i = token.token_index
+            index = tables.token_deposit_index[i] if token.indexed_position >= 0 else tables.token_borrow_index[i]
+            balances[info_for(i)] += token.indexed_position * index
+
+        serum3_rows: List[Tuple[int, int, float, float]] = []
+        for serum3 in mango_account.serum3_active():
+            base_info = info_for(serum3.base_token_index)
+            quote_info = info_for(serum3.quote_token_index)
+            balances[base_info] += serum3.base_free_native
+            balances[quote_info] += serum3.quote_free_native
+            serum3_rows.append((base_info, quote_info, serum3.base_reserved_native, serum3.quote_reserved_native))
+
+        perp_rows: List[Tuple[int, int, float, float]] = []
+        for perp in mango_account.perp_active():
+            m = perp.market_index
+            if m >= len(tables.perp_known) or not tables.perp_known[m]:
+                raise ValueError(f"PerpMarket for market index {m} not found!")
+            settle_info = info_for(int(tables.perp_settle_token_index[m]))
+            perp_rows.append((
+                m,
+                settle_info,
+                perp.base_position_lots * tables.perp_base_lot_size[m],
+                perp.quote_position_native,
+            ))
+
+        token_index_arr = np.array(token_indexes, dtype=np.int64)
+        perp_index_arr = np.array([row[0] for row in perp_rows], dtype=np.int64)
+        return cls(
+            token_indexes=token_index_arr,
+            token_prices=tables.token_prices[token_index_arr],
+            token_balances=np.array(balances, dtype=np.float64),
+            token_asset_weights=tables.token_asset_weights[:, token_index_arr],
+            token_liab_weights=tables.token_liab_weights[:, token_index_arr],
+            perp_market_indexes=perp_index_arr,
+            perp_settle_info_index=np.array([row[1] for row in perp_rows], dtype=np.int64),
+            perp_base_native=np.array([row[2] for row in perp_rows], dtype=np.float64),
+            perp_quote_native=np.array([row[3] for row in perp_rows], dtype=np.float64),
+            perp_prices=tables.perp_prices[perp_index_arr],
+            perp_base_asset_weights=tables.perp_base_asset_weights[:, perp_index_arr],
+            perp_base_liab_weights=tables.perp_base_liab_weights[:, perp_index_arr],
+            perp_overall_asset_weights=tables.perp_overall_asset_weights[:, perp_index_arr],
+            serum3_base_info_index=np.array([row[0] for row in serum3_rows], dtype=np.int64),
+            serum3_quote_info_index=np.array([row[1] for row in serum3_rows], dtype=np.int64),
+            serum3_reserved_base=np.array([row[2] for row in serum3_rows], dtype=np.float64),
+            serum3_reserved_quote=np.array([row[3] for row in serum3_rows], dtype=np.float64),
+        )
+
+    def find_token_info_index(self, token_index: int) -> int:
+        """
+        Gibt die Position eines Tokens in den Token-Arrays zurück, oder -1.
+        """
+        matches = np.flatnonzero(self.token_indexes == token_index)
+        return int(matches[0]) if len(matches) else -1
+
+    def perp_health_unsettled_pnl(self, health_type: HealthType) -> np.ndarray:
+        """
+        Gibt den gewichteten, unrealisierten PnL jeder Perp-Position zurück.
+        """
+        row = weight_row(health_type)
+        return perp_health_unsettled_pnl(
+            self.perp_base_native,
+            self.perp_quote_native,
+            self.perp_prices,
+            self.perp_base_asset_weights[row],
+            self.perp_base_liab_weights[row],
+            self.perp_overall_asset_weights[row],
+        )
+
+    def effective_token_balances(self, health_type: HealthType) -> np.ndarray:
+        """
+        Gibt die Token-Salden inklusive des Perp-PnL im jeweiligen Settle-Token zurück.
+        """
+        balances = self.token_balances.copy()
+        if len(self.perp_market_indexes):
+            settle_prices = self.token_prices[self.perp_settle_info_index]
+            pnl = self.perp_health_unsettled_pnl(health_type) / np.where(settle_prices > 0, settle_prices, 1.0)
+            np.add.at(balances, self.perp_settle_info_index, pnl)
+        return balances
+
+    def _contributions(self, health_type: HealthType, balances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        row = weight_row(health_type)
+        token_contribs = token_health_contributions(
+            balances,
+            self.token_prices,
+            self.token_asset_weights[row],
+            self.token_liab_weights[row],
+        )
+        serum3_contribs = serum3_reserved_contributions(
+            self.serum3_reserved_base,
+            self.serum3_reserved_quote,
+            self.token_prices[self.serum3_base_info_index],
+            self.token_prices[self.serum3_quote_info_index],
+            self.token_asset_weights[row][self.serum3_base_info_index],
+            self.token_asset_weights[row][self.serum3_quote_info_index],
+        )
+        return token_contribs, serum3_contribs
+
+    def health(self, health_type: HealthType) -> float:
+        """
+        Gibt die Health in nativen Quote-Einheiten zurück.
+        """
+        token_contribs, serum3_contribs = self._contributions(
+            health_type, self.effective_token_balances(health_type)
+        )
+        return float(token_contribs.sum() + serum3_contribs.sum())
+
+    def perp_max_settle(self, settle_token_index: int) -> float:
+        """
+        Gibt zurück, wie viel negativer Perp-PnL im Settle-Token abgerechnet werden kann, bevor die Maint-Health null erreicht.
+
+        Args:
+            settle_token_index (int): Token-Index des Settle-Tokens.
+
+        Returns:
+            float: Die abrechenbare native Menge.
+        """
+        health_type = HealthType.MAINT
+        info_index = self.find_token_info_index(settle_token_index)
+        if info_index < 0:
+            return 0.0
+        row = weight_row(health_type)
+        price = self.token_prices[info_index]
+        return spot_amount_taken_for_health_zero(
+            self.health(health_type),
+            float(self.effective_token_balances(health_type)[info_index]),
+            price * self.token_asset_weights[row][info_index],
+            price * self.token_liab_weights[row][info_index],
+        )
+
+    def health_assets_and_liabs(self, health_type: HealthType) -> Tuple[float, float]:
+        """
+        Gibt die gewichteten Assets und Verbindlichkeiten in nativen Quote-Einheiten zurück.
+        """
+        token_contribs, serum3_contribs = self._contributions(
+            health_type, self.effective_token_balances(health_type)
+        )
+        contribs = np.concatenate([token_contribs, serum3_contribs])
+        return float(contribs[contribs > 0].sum()), float(-contribs[contribs < 0].sum())
+
+    def health_ratio(self, health_type: HealthType) -> float:
+        """
+        Gibt das Health-Verhältnis in Prozent zurück.
+        """
+        assets, liabs = self.health_assets_and_liabs(health_type)
+        return float(health_ratio_from_assets_and_liabs(assets, liabs))
+
+    def clone(self) -> 'HealthCache':
+        """
+        Gibt eine flache Kopie zurück, die sich die Arrays mit `self` teilt (Copy-on-Write).
+
+        Die Arrays der Kopie sind schreibgeschützte Sichten; Änderungen müssen neue Arrays
+        zuweisen statt bestehende zu verändern, wie es `with_token` & Co. tun.
+        """
+        def read_only(values: np.ndarray) -> np.ndarray:
+            view = values.view()
+            view.flags.writeable = False
+            return view
+        return HealthCache(**{name: read_only(values) for name, values in vars(self).items()})
+
+    def with_token(self, tables: HealthTables, token_index: int) -> Tuple['HealthCache', int]:
+        """
+        Gibt einen HealthCache zurück, der das Token enthält, sowie dessen Position in den Token-Arrays.
+
+        Fehlt das Token, wird eine Kopie mit einem leeren Eintrag angehängt; `self` bleibt unverändert.
+        """
+        info_index = self.find_token_info_index(token_index)
+        if info_index >= 0:
+            return self, info_index
+        if token_index >= len(tables.token_known) or not tables.token_known[token_index]:
+            raise ValueError(f"Bank for token index {token_index} not found!")
+        clone = HealthCache(**{**vars(self),
+            'token_indexes': np.append(self.token_indexes, token_index),
+            'token_prices': np.append(self.token_prices, tables.token_prices[token_index]),
+            'token_balances': np.append(self.token_balances, 0.0),
+            'token_asset_weights': np.hstack([self.token_asset_weights, tables.token_asset_weights[:, [token_index]]]),
+            'token_liab_weights': np.hstack([self.token_liab_weights, tables.token_liab_weights[:, [token_index]]]),
+        })
+        return clone, len(self.token_indexes)
+
+    def with_perp_market(self, tables: HealthTables, perp_market_index: int) -> Tuple['HealthCache', int]:
+        """
+        Wie `with_token`, aber für eine Perp-Position (inklusive ihres Settle-Tokens).
+        """
+        matches = np.flatnonzero(self.perp_market_indexes == perp_market_index)
+        if len(matches):
+            return self, int(matches[0])
+        if perp_market_index >= len(tables.perp_known) or not tables.perp_known[perp_market_index]:
+            raise ValueError(f"PerpMarket for market index {perp_market_index} not found!")
+        cache, settle_info = self.with_token(tables, int(tables.perp_settle_token_index[perp_market_index]))
+        m = perp_market_index
+        clone = HealthCache(**{**vars(cache),
+            'perp_market_indexes': np.append(cache.perp_market_indexes, m),
+            'perp_settle_info_index': np.append(cache.perp_settle_info_index, settle_info),
+            'perp_base_native': np.append(cache.perp_base_native, 0.0),
+            'perp_quote_native': np.append(cache.perp_quote_native, 0.0),
+            'perp_prices': np.append(cache.perp_prices, tables.perp_prices[m]),
+            'perp_base_asset_weights': np.hstack([cache.perp_base_asset_weights, tables.perp_base_asset_weights[:, [m]]]),
+            'perp_base_liab_weights': np.hstack([cache.perp_base_liab_weights, tables.perp_base_liab_weights[:, [m]]]),
+            'perp_overall_asset_weights': np.hstack([cache.perp_overall_asset_weights, tables.perp_overall_asset_weights[:, [m]]]),
+        })
+        return clone, len(cache.perp_market_indexes)
+
+    def with_serum3(self, tables: HealthTables, base_token_index: int, quote_token_index: int) -> Tuple['HealthCache', int, int, int]:
+        """
+        Wie `with_token`, aber für einen Serum3-Eintrag; gibt zusätzlich die Token-Positionen von Basis und Quote zurück.
+        """
+        cache, base_info = self.with_token(tables, base_token_index)
+        cache, quote_info = cache.with_token(tables, quote_token_index)
+        matches = np.flatnonzero(
+            (cache.serum3_base_info_index == base_info) & (cache.serum3_quote_info_index == quote_info)
+        )
+        if len(matches):
+            return cache, int(matches[0]), base_info, quote_info
+        clone = HealthCache(**{**vars(cache),
+            'serum3_base_info_index': np.append(cache.serum3_base_info_index, base_info),
+            'serum3_quote_info_index': np.append(cache.serum3_quote_info_index, quote_info),
+            'serum3_reserved_base': np.append(cache.serum3_reserved_base, 0.0),
+            'serum3_reserved_quote': np.append(cache.serum3_reserved_quote, 0.0),
+        })
+        return clone, len(cache.serum3_base_info_index), base_info, quote_info
+
+    def candidate_health(
+        self,
+        health_type: HealthType,
+        token_deltas: Optional[np.ndarray] = None,
+        perp_base_deltas: Optional[np.ndarray] = None,
+        perp_quote_deltas: Optional[np.ndarray] = None,
+        serum3_base_deltas: Optional[np.ndarray] = None,
+        serum3_quote_deltas: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Bewertet K Varianten des Caches auf einmal.
+
+        Jede Delta-Matrix hat die Form (K, n) mit n = Anzahl der Token-, Perp- bzw.
+        Serum3-Einträge; fehlende Matrizen bedeuten keine Änderung.
+
+        Args:
+            health_type (HealthType): Der Health-Typ.
+            token_deltas (Optional[np.ndarray]): Änderungen der nativen Token-Salden.
+            perp_base_deltas (Optional[np.ndarray]): Änderungen der nativen Perp-Basisposition.
+            perp_quote_deltas (Optional[np.ndarray]): Änderungen der nativen Perp-Quote-Position.
+            serum3_base_deltas (Optional[np.ndarray]): Änderungen der reservierten Basis-Beträge.
+            serum3_quote_deltas (Optional[np.ndarray]): Änderungen der reservierten Quote-Beträge.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Health, gewichtete Assets und Verbindlichkeiten je Variante.
+        """
+        deltas = [token_deltas, perp_base_deltas, perp_quote_deltas, serum3_base_deltas, serum3_quote_deltas]
+        k = next((len(d) for d in deltas if d is not None), 1)
+        row = weight_row(health_type)
+
+        balances = self.token_balances + (np.zeros((k, len(self.token_balances))) if token_deltas is None else token_deltas)
+
+        if len(self.perp_market_indexes):
+            base = self.perp_base_native if perp_base_deltas is None else self.perp_base_native + perp_base_deltas
+            quote = self.perp_quote_native if perp_quote_deltas is None else self.perp_quote_native + perp_quote_deltas
+            pnl = perp_health_unsettled_pnl(
+                base,
+                quote,
+                self.perp_prices,
+                self.perp_base_asset_weights[row],
+                self.perp_base_liab_weights[row],
+                self.perp_overall_asset_weights[row],
+            )
+            settle_prices = self.token_prices[self.perp_settle_info_index]
+            settle = np.zeros((len(self.perp_market_indexes), len(self.token_balances)))
+            settle[np.arange(len(self.perp_market_indexes)), self.perp_settle_info_index] = 1.0
+            balances = balances + (pnl / np.where(settle_prices > 0, settle_prices, 1.0)) @ settle
+
+        contribs = token_health_contributions(
+            balances,
+            self.token_prices,
+            self.token_asset_weights[row],
+            self.token_liab_weights[row],
+        )
+        reserved_base = self.serum3_reserved_base if serum3_base_deltas is None else self.serum3_reserved_base + serum3_base_deltas
+        reserved_quote = self.serum3_reserved_quote if serum3_quote_deltas is None else self.serum3_reserved_quote + serum3_quote_deltas
+        serum3_contribs = np.atleast_2d(serum3_reserved_contributions(
+            reserved_base,
+            reserved_quote,
+            self.token_prices[self.serum3_base_info_index],
+            self.token_prices[self.serum3_quote_info_index],
+            self.token_asset_weights[row][self.serum3_base_info_index],
+            self.token_asset_weights[row][self.serum3_quote_info_index],
+        ))
+
+        health = contribs.sum(axis=1) + serum3_contribs.sum(axis=1)
+        assets = np.maximum(contribs, 0.0).sum(axis=1) + np.maximum(serum3_contribs, 0.0).sum(axis=1)
+        liabs = np.maximum(-contribs, 0.0).sum(axis=1) + np.maximum(-serum3_contribs, 0.0).sum(axis=1)
+        return health, assets, liabs
+
+    def get_max_withdraw_with_borrow_for_token(
+        self,
+        tables: HealthTables,
+        token_index: int,
+        loan_origination_fee_rate: float = 0.0,
+        borrows_reduce_only: bool = False,
+        vault_amount: Optional[float] = None,
+    ) -> float:
+        """
+        Gibt die maximale native Menge eines Tokens zurück, die abgehoben werden kann, ohne die Init-Health unter null zu bringen.
+
+        Bestehende Einlagen werden zuerst abgehoben, der Rest wird inklusive
+        Loan-Origination-Fee geliehen.
+
+        Args:
+            tables (HealthTables): Lookup-Tabellen der Gruppe.
+            token_index (int): Das Token.
+            loan_origination_fee_rate (float): Gebühr auf den geliehenen Anteil.
+            borrows_reduce_only (bool): Ob für das Token keine neuen Kredite erlaubt sind.
+            vault_amount (Optional[float]): Verfügbare Menge im Vault, falls bekannt.
+
+        Returns:
+            float: Die ganzzahlige native Menge.
+        """
+        health_type = HealthType.INIT
+        if self.health(health_type) <= 0:
+            return 0.0
+        cache, info_index = self.with_token(tables, token_index)
+        deposits = max(float(cache.token_balances[info_index]), 0.0)
+        n_tokens = len(cache.token_indexes)
+
+        def health_after(amounts: np.ndarray) -> np.ndarray:
+            from_deposits = np.minimum(amounts, deposits)
+            borrow_cost = (amounts - from_deposits) * (1 + loan_origination_fee_rate)
+            token_deltas = np.zeros((len(amounts), n_tokens))
+            token_deltas[:, info_index] = -(from_deposits + borrow_cost)
+            return cache.candidate_health(health_type, token_deltas)[0]
+
+        amount = _search_max_amount(lambda amounts: health_after(amounts) >= 0)
+        if borrows_reduce_only:
+            amount = min(amount, np.floor(deposits))
+        if vault_amount is not None:
+            amount = min(amount, vault_amount)
+        return max(amount, 0.0)
+
+    def get_max_serum3_order_for_health_ratio(
+        self,
+        tables: HealthTables,
+        base_token_index: int,
+        quote_token_index: int,
+        side: Serum3Side,
+        min_ratio: float = 2.0,
+    ) -> float:
+        """
+        Gibt die maximale native Menge (Quote für Bids, Basis für Asks) einer Serum3-Order zurück, bei der das Init-Health-Verhältnis mindestens `min_ratio` bleibt.
+
+        Die Order verschiebt den Betrag aus dem Token-Saldo in die reservierten Serum3-Beträge.
+        """
+        health_type = HealthType.INIT
+        cache, slot, base_info, quote_info = self.with_serum3(tables, base_token_index, quote_token_index)
+        is_bid = side == Serum3Side.BUY
+        info_index = quote_info if is_bid else base_info
+        n_tokens = len(cache.token_indexes)
+        n_serum3 = len(cache.serum3_base_info_index)
+
+        def passes(amounts: np.ndarray) -> np.ndarray:
+            token_deltas = np.zeros((len(amounts), n_tokens))
+            token_deltas[:, info_index] = -amounts
+            reserved = np.zeros((len(amounts), n_serum3))
+            reserved[:, slot] = amounts
+            zeros = np.zeros((len(amounts), n_serum3))
+            health, assets, liabs = cache.candidate_health(
+                health_type,
+                token_deltas,
+                serum3_base_deltas=zeros if is_bid else reserved,
+                serum3_quote_deltas=reserved if is_bid else zeros,
+            )
+            return health_ratio_from_assets_and_liabs(assets, liabs) >= min_ratio
+
+        return _search_max_amount(passes)
+
+    def get_max_perp_for_health_ratio(
+        self,
+        tables: HealthTables,
+        perp_market_index: int,
+        price: float,
+        side: PerpOrderSide,
+        min_ratio: float = 2.0,
+    ) -> float:
+        """
+        Gibt die maximale Anzahl an Basis-Lots einer Perp-Order zum Preis `price` zurück, bei der das Init-Health-Verhältnis mindestens `min_ratio` bleibt.
+
+        Args:
+            tables (HealthTables): Lookup-Tabellen der Gruppe.
+            perp_market_index (int): Der PerpMarket.
+            price (float): Ausführungspreis in nativen Quote-Einheiten pro nativer Basiseinheit.
+            side (PerpOrderSide): BUY oder SELL.
+            min_ratio (float): Minimales Health-Verhältnis in Prozent.
+
+        Returns:
+            float: Die Anzahl an Basis-Lots.
+        """
+        health_type = HealthType.INIT
+        cache, slot = self.with_perp_market(tables, perp_market_index)
+        direction = 1.0 if side == PerpOrderSide.BUY else -1.0
+        base_lot_size = float(tables.perp_base_lot_size[perp_market_index])
+        n_perps = len(cache.perp_market_indexes)
+
+        def passes(lots: np.ndarray) -> np.ndarray:
+            base_deltas = np.zeros((len(lots), n_perps))
+            quote_deltas = np.zeros((len(lots), n_perps))
+            base_deltas[:, slot] = direction * lots * base_lot_size
+            quote_deltas[:, slot] = -direction * lots * base_lot_size * price
+            _, assets, liabs = cache.candidate_health(health_type, perp_base_deltas=base_deltas, perp_quote_deltas=quote_deltas)
+            return health_ratio_from_assets_and_liabs(assets, liabs) >= min_ratio
+
+        return _search_max_amount(passes)
+
+
+def _search_max_amount(
+    passes,
+    max_amount: float = float(2 ** 63),
+    grid_size: int = 64,
+) -> float:
+    """
+    Sucht die größte ganze Menge, für die `passes` wahr ist, über vektorisierte Gitter statt serieller Bisektion.
+
+    Zuerst wird ein geometrisches Gitter 0, 1, 2, 4, ... bis `max_amount` ausgewertet;
+    zwischen dem letzten erfüllten und dem folgenden Punkt wird mit linearen Gittern
+    verfeinert, bis der Abstand eine native Einheit beträgt.
+
+    Args:
+        passes (Callable[[np.ndarray], np.ndarray]): Bewertet viele Kandidaten auf einmal.
+        max_amount (float): Obergrenze der Suche.
+        grid_size (int): Anzahl der Kandidaten je Verfeinerung.
+
+    Returns:
+        float: Die größte erfüllende Menge (0, falls schon 0 scheitert).
+    """
+    candidates = np.concatenate([[0.0], 2.0 ** np.arange(0, int(np.log2(max_amount)) + 1)])
+    ok = passes(candidates)
+    if not ok[0]:
+        return 0.0
+    last = int(np.flatnonzero(ok)[-1])
+    if last == len(candidates) - 1:
+        return float(candidates[last])
+    low, high = candidates[last], candidates[last + 1]
+    while high - low > 1:
+        candidates = np.unique(np.floor(np.linspace(low, high, grid_size)))
+        if len(candidates) <= 2:
+            # Auflösung von float64 erreicht
+            break
+        ok = passes(candidates)
+        passing = np.flatnonzero(ok)
+        # Nur der zusammenhängende Bereich ab `low` zählt
+        failing = np.flatnonzero(~ok)
+        first_fail = int(failing[0]) if len(failing) else len(candidates)
+        last = int(passing[passing < first_fail][-1])
+        low = candidates[last]
+        high = candidates[first_fail] if first_fail < len(candidates) else high
+    return float(low)
+
+
+# ----------------------------
+# Simulation
+# ----------------------------
+
+@dataclass
+class HealthChanges:
+    """
+    K Szenarien von Positionsänderungen, z.B. die kumulierten Stufen einer Quote-Leiter.
+
+    Jeder Eintrag gilt für alle Szenarien; Beträge sind Skalare oder Arrays der Länge K.
+    Mehrere Einträge für dieselbe Position werden addiert.
+    """
+    num_scenarios: int = 1
+    tokens: List[Tuple[int, np.ndarray]] = field(default_factory=list)
+    serum3_orders: List[Tuple[int, int, Serum3Side, np.ndarray]] = field(default_factory=list)
+    perp_orders: List[Tuple[int, PerpOrderSide, np.ndarray, np.ndarray]] = field(default_factory=list)
+
+    def _column(self, values: Any) -> np.ndarray:
+        return np.broadcast_to(np.asarray(values, dtype=np.float64), (self.num_scenarios,))
+
+    def token(self, token_index: int, native_amounts: Any) -> 'HealthChanges':
+        """
+        Ändert den nativen Token-Saldo (positiv = Einzahlung, negativ = Abhebung oder Kredit).
+        """
+        self.tokens.append((token_index, self._column(native_amounts)))
+        return self
+
+    def serum3_order(self, base_token_index: int, quote_token_index: int, side: Serum3Side, native_amounts: Any) -> 'HealthChanges':
+        """
+        Platziert eine Serum3-Order über native Quote- (BUY) bzw. Basis-Mengen (SELL).
+        """
+        self.serum3_orders.append((base_token_index, quote_token_index, side, self._column(native_amounts)))
+        return self
+
+    def perp_order(self, perp_market_index: int, side: PerpOrderSide, base_lots: Any, price: Any) -> 'HealthChanges':
+        """
+        Simuliert die vollständige Ausführung einer Perp-Order von `base_lots` zum nativen Preis `price`.
+        """
+        self.perp_orders.append((perp_market_index, side, self._column(base_lots), self._column(price)))
+        return self
+
+
+def simulate_health_ratio(
+    account: Union[MangoAccount, HealthCache],
+    changes: HealthChanges,
+    tables: HealthTables,
+    health_type: HealthType = HealthType.INIT,
+) -> np.ndarray:
+    """
+    Berechnet das Health-Verhältnis nach jeder der K simulierten Änderungen, wie `simHealthRatioWith*Changes` (TS).
+
+    Gerechnet wird auf einer Copy-on-Write-Kopie des HealthCache; das Konto und ein
+    übergebener Cache bleiben unverändert, es wird nichts tief kopiert. Für wiederholte
+    Aufrufe (z.B. je Quote-Leiter) sollte ein vorab gebauter HealthCache übergeben werden.
+
+    Args:
+        account (Union[MangoAccount, HealthCache]): Das Konto oder sein HealthCache.
+        changes (HealthChanges): Die Szenarien.
+        tables (HealthTables): Lookup-Tabellen der Gruppe.
+        health_type (HealthType): Der Health-Typ.
+
+    Returns:
+        np.ndarray: Das Health-Verhältnis in Prozent je Szenario.
+    """
+    if isinstance(account, HealthCache):
+        cache = account.clone()
+    else:
+        cache = HealthCache.from_mango_account(None, account, tables)
+
+    # Zuerst alle benötigten Einträge anlegen, damit die Indizes stabil bleiben
+    for token_index, _ in changes.tokens:
+        cache, _ = cache.with_token(tables, token_index)
+    for base_token_index, quote_token_index, _, _ in changes.serum3_orders:
+        cache, _, _, _ = cache.with_serum3(tables, base_token_index, quote_token_index)
+    for perp_market_index, _, _, _ in changes.perp_orders:
+        cache, _ = cache.with_perp_market(tables, perp_market_index)
+
+    k = changes.num_scenarios
+    token_deltas = np.zeros((k, len(cache.token_indexes)))
+    serum3_base_deltas = np.zeros((k, len(cache.serum3_base_info_index)))
+    serum3_quote_deltas = np.zeros((k, len(cache.serum3_base_info_index)))
+    perp_base_deltas = np.zeros((k, len(cache.perp_market_indexes)))
+    perp_quote_deltas = np.zeros((k, len(cache.perp_market_indexes)))
+
+    for token_index, amounts in changes.tokens:
+        token_deltas[:, cache.find_token_info_index(token_index)] += amounts
+    for base_token_index, quote_token_index, side, amounts in changes.serum3_orders:
+        _, slot, base_info, quote_info = cache.with_serum3(tables, base_token_index, quote_token_index)
+        if side == Serum3Side.BUY:
+            token_deltas[:, quote_info] -= amounts
+            serum3_quote_deltas[:, slot] += amounts
+        else:
+            token_deltas[:, base_info] -= amounts
+            serum3_base_deltas[:, slot] += amounts
+    for perp_market_index, side, base_lots, prices in changes.perp_orders:
+        _, slot = cache.with_perp_market(tables, perp_market_index)
+        base_native = base_lots * tables.perp_base_lot_size[perp_market_index]
+        if side == PerpOrderSide.SELL:
+            base_native = -base_native
+        perp_base_deltas[:, slot] += base_native
+        perp_quote_deltas[:, slot] -= base_native * prices
+
+    _, assets, liabs = cache.candidate_health(
+        health_type,
+        token_deltas,
+        perp_base_deltas,
+        perp_quote_deltas,
+        serum3_base_deltas,
+        serum3_quote_deltas,
+    )
+    return health_ratio_from_assets_and_liabs(assets, liabs)
+
+
+# ----------------------------
+# Batch-Berechnung
+# ----------------------------
+
+@dataclass
+class HealthBatch:
+    """
+    Health-Kennzahlen vieler MangoAccounts, ein Eintrag pro Konto in Eingabereihenfolge.
+    """
+    health: np.ndarray
+    assets: np.ndarray
+    liabs: np.ndarray
+    health_ratio: np.ndarray
+    largest_asset_token_index: np.ndarray  # -1, falls keine Einlage existiert
+    largest_asset_value: np.ndarray
+    largest_liab_token_index: np.ndarray  # -1, falls kein Kredit existiert
+    largest_liab_value: np.ndarray
+    # Saldo des angefragten Settle-Tokens inklusive Perp-PnL, 0 ohne `settle_token_index`
+    settle_token_balance: np.ndarray
+
+
+def compute_health_batch(
+    group: Group,
+    mango_accounts: List[MangoAccount],
+    health_type: HealthType = HealthType.MAINT,
+    tables: Optional[HealthTables] = None,
+    settle_token_index: int = -1,
+) -> HealthBatch:
+    """
+    Berechnet die Health vieler MangoAccounts in wenigen vektorisierten Durchläufen.
+
+    Alle Positionen werden als flache Zeilen (Konto, Token) gesammelt, je Paar
+    aufsummiert, gewichtet und per `np.bincount` wieder auf die Konten verteilt.
+
+    Args:
+        group (Group): Die geladene Gruppe.
+        mango_accounts (List[MangoAccount]): Die zu bewertenden MangoAccounts.
+        health_type (HealthType): Der Health-Typ.
+        tables (Optional[HealthTables]): Bereits gebaute Lookup-Tabellen der Gruppe.
+        settle_token_index (int): Token, dessen effektiver Saldo in `settle_token_balance` landet; -1 für keinen.
+
+    Returns:
+        HealthBatch: Die Kennzahlen je Konto.
+    """
+    tables = tables or HealthTables.from_group(group)
+    n_accounts = len(mango_accounts)
+
+    token_acc: List[int] = []
+    token_idx: List[int] = []
+    token_pos: List[float] = []
+    free_acc: List[int] = []
+    free_idx: List[int] = []
+    free_amt: List[float] = []
+    serum3_acc: List[int] = []
+    serum3_rows: List[Tuple[int, int, float, float]] = []
+    perp_acc: List[int] = []
+    perp_idx: List[int] = []
+    perp_lots: List[float] = []
+    perp_quote: List[float] = []
+
+    for a, mango_account in enumerate(mango_accounts):
+        for token in mango_account.tokens_active():
+            token_acc.append(a)
+            token_idx.append(token.token_index)
+            token_pos.append(token.indexed_position)
+        for serum3 in mango_account.serum3_active():
+            free_acc.extend((a, a))
+            free_idx.extend((serum3.base_token_index, serum3.quote_token_index))
+            free_amt.extend((serum3.base_free_native, serum3.quote_free_native))
+            serum3_acc.append(a)
+            serum3_rows.append((
+                serum3.base_token_index,
+                serum3.quote_token_index,
+                serum3.base_reserved_native,
+                serum3.quote_reserved_native,
+            ))
+        for perp in mango_account.perp_active():
+            perp_acc.append(a)
+            perp_idx.append(perp.market_index)
+            perp_lots.append(perp.base_position_lots)
+            perp_quote.append(perp.quote_position_native)
+
+    serum3 = np.array(serum3_rows, dtype=np.float64).reshape(-1, 4)
+    return health_batch_from_rows(
+        tables,
+        health_type,
+        n_accounts,
+        token_acc=np.array(token_acc, dtype=np.int64),
+        token_idx=np.array(token_idx, dtype=np.int64),
+        token_pos=np.array(token_pos, dtype=np.float64),
+        free_acc=np.array(free_acc, dtype=np.int64),
+        free_idx=np.array(free_idx, dtype=np.int64),
+        free_amt=np.array(free_amt, dtype=np.float64),
+        serum3_acc=np.array(serum3_acc, dtype=np.int64),
+        serum3_base_idx=serum3[:, 0].astype(np.int64),
+        serum3_quote_idx=serum3[:, 1].astype(np.int64),
+        serum3_base_reserved=serum3[:, 2],
+        serum3_quote_reserved=serum3[:, 3],
+        perp_acc=np.array(perp_acc, dtype=np.int64),
+        perp_idx=np.array(perp_idx, dtype=np.int64),
+        perp_lots=np.array(perp_lots, dtype=np.float64),
+        perp_quote=np.array(perp_quote, dtype=np.float64),
+        settle_token_index=settle_token_index,
+    )
+
+
+def health_batch_from_rows(
+    tables: HealthTables,
+    health_type: HealthType,
+    n_accounts: int,
+    token_acc: np.ndarray,
+    token_idx: np.ndarray,
+    token_pos: np.ndarray,
+    free_acc: np.ndarray,
+    free_idx: np.ndarray,
+    free_amt: np.ndarray,
+    serum3_acc: np.ndarray,
+    serum3_base_idx: np.ndarray,
+    serum3_quote_idx: np.ndarray,
+    serum3_base_reserved: np.ndarray,
+    serum3_quote_reserved: np.ndarray,
+    perp_acc: np.ndarray,
+    perp_idx: np.ndarray,
+    perp_lots: np.ndarray,
+    perp_quote: np.ndarray,
+    settle_token_index: int = -1,
+) -> HealthBatch:
+    """
+    Kern von `compute_health_batch` auf flachen Positionszeilen; `*_acc` ist der Kontoindex jeder Zeile.
+
+    Wird auch direkt von `MangoAccountTable` aufgerufen, deren Spalten bereits in dieser Form vorliegen.
+    """
+    row = weight_row(health_type)
+    n_tokens = max(len(tables.token_known), 1)
+
+    # Token-Salden
+    t_idx = token_idx
+    t_pos = token_pos
+    t_bal = t_pos * np.where(t_pos >= 0, tables.token_deposit_index[t_idx], tables.token_borrow_index[t_idx])
+
+    # Perp-PnL als Salden im Settle-Token
+    p_idx = perp_idx
+    p_pnl = perp_health_unsettled_pnl(
+        perp_lots * tables.perp_base_lot_size[p_idx],
+        perp_quote,
+        tables.perp_prices[p_idx],
+        tables.perp_base_asset_weights[row][p_idx],
+        tables.perp_base_liab_weights[row][p_idx],
+        tables.perp_overall_asset_weights[row][p_idx],
+    )
+    p_settle = tables.perp_settle_token_index[p_idx]
+    settle_prices = tables.token_prices[p_settle]
+    p_bal = p_pnl / np.where(settle_prices > 0, settle_prices, 1.0)
+
+    acc = np.concatenate([token_acc, free_acc, perp_acc])
+    tok = np.concatenate([t_idx, free_idx, p_settle])
+    bal = np.concatenate([t_bal, free_amt, p_bal])
+
+    # Zeilen je (Konto, Token) zusammenfassen
+    keys, inverse = np.unique(acc * n_tokens + tok, return_inverse=True)
+    pair_balance = np.bincount(inverse, weights=bal, minlength=len(keys))
+    pair_acc = keys // n_tokens
+    pair_tok = keys % n_tokens
+    pair_value = pair_balance * tables.token_prices[pair_tok]
+    pair_contrib = token_health_contributions(
+        pair_balance,
+        tables.token_prices[pair_tok],
+        tables.token_asset_weights[row][pair_tok],
+        tables.token_liab_weights[row][pair_tok],
+    )
+
+    health = np.bincount(pair_acc, weights=pair_contrib, minlength=n_accounts)
+    assets = np.bincount(pair_acc, weights=np.maximum(pair_contrib, 0.0), minlength=n_accounts)
+    liabs = np.bincount(pair_acc, weights=np.maximum(-pair_contrib, 0.0), minlength=n_accounts)
+    settle = pair_tok == settle_token_index
+    settle_token_balance = np.bincount(pair_acc[settle], weights=pair_balance[settle], minlength=n_accounts)
+
+    if len(serum3_acc):
+        s_base = serum3_base_idx
+        s_quote = serum3_quote_idx
+        s_contrib = serum3_reserved_contributions(
+            serum3_base_reserved,
+            serum3_quote_reserved,
+            tables.token_prices[s_base],
+            tables.token_prices[s_quote],
+            tables.token_asset_weights[row][s_base],
+            tables.token_asset_weights[row][s_quote],
+        )
+        s_acc = serum3_acc
+        health += np.bincount(s_acc, weights=s_contrib, minlength=n_accounts)
+        assets += np.bincount(s_acc, weights=np.maximum(s_contrib, 0.0), minlength=n_accounts)
+        liabs += np.bincount(s_acc, weights=np.maximum(-s_contrib, 0.0), minlength=n_accounts)
+
+    # Größte Einlage und größter Kredit je Konto (ungewichtet)
+    largest_asset_token_index = np.full(n_accounts, -1, dtype=np.int64)
+    largest_asset_value = np.zeros(n_accounts)
+    largest_liab_token_index = np.full(n_accounts, -1, dtype=np.int64)
+    largest_liab_value = np.zeros(n_accounts)
+    if len(keys):
+        order = np.lexsort((pair_value, pair_acc))
+        sorted_acc = pair_acc[order]
+        first = np.flatnonzero(np.r_[True, sorted_acc[1:] != sorted_acc[:-1]])
+        last = np.r_[first[1:] - 1, len(order) - 1]
+        accounts_with_pairs = sorted_acc[first]
+
+        top = order[last]
+        has_asset = pair_value[top] > 0
+        largest_asset_token_index[accounts_with_pairs[has_asset]] = pair_tok[top][has_asset]
+        largest_asset_value[accounts_with_pairs[has_asset]] = pair_value[top][has_asset]
+
+        bottom = order[first]
+        has_liab = pair_value[bottom] < 0
+        largest_liab_token_index[accounts_with_pairs[has_liab]] = pair_tok[bottom][has_liab]
+        largest_liab_value[accounts_with_pairs[has_liab]] = -pair_value[bottom][has_liab]
+
+    return HealthBatch(
+        health=health,
+        assets=assets,
+        liabs=liabs,
+        health_ratio=health_ratio_from_assets_and_liabs(assets, liabs),
+        largest_asset_token_index=largest_asset_token_index,
+        largest_asset_value=largest_asset_value,
+        largest_liab_token_index=largest_liab_token_index,
+        largest_liab_value=largest_liab_value,
+        settle_token_balance=settle_token_balance,
+    )
@@ -0,0 +1,36 @@
+# mango_client_py/idl_cache.py
+
+import os
+from typing import Any, Dict
+
+IDL_PATH = os.path.join(os.path.dirname(__file__), 'idl.json')
+
+# Pfad der idl.json -> geparstes Idl, je Prozess
+_idl_cache: Dict[str, Any] = {}
+
+
+def load_idl(idl_path: str = IDL_PATH) -> Any:
+    """
+    Lädt das Mango-IDL einmal je Prozess.
+
+    Das geparste `anchorpy.Idl` wird je Pfad gehalten; weitere Clients im selben Prozess
+    parsen `idl.json` nicht erneut.
+
+    Args:
+        idl_path (str): Pfad der idl.json.
+
+    Returns:
+        Idl: Das geparste IDL.
+    """
+    idl = _idl_cache.get(idl_path)
+    if idl is not None:
+        return idl
+
+    from anchorpy import Idl
+
+    with open(idl_path, 'rb') as f:
+        raw = f.read()
+    # Idl.from_json erwartet den JSON-Text, kein geparstes dict
+    idl = Idl.from_json(raw.decode())
+    _idl_cache[idl_path] = idl
+    return idl
@@ -0,0 +1,229 @@
+# mango_client_py/liquidation.py
+
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .types import Group, MangoAccount, HealthType
+from .health import HealthTables, compute_health_batch
+
+# ----------------------------
+# Liquidationskandidaten
+# ----------------------------
+
+@dataclass
+class LiquidationCandidate:
+    mango_account: MangoAccount
+    health: float
+    health_ratio: float
+    largest_asset_token_index: Optional[int]
+    largest_asset_value: float
+    largest_liab_token_index: Optional[int]
+    largest_liab_value: float
+
+
+class LiquidationEngine:
+    """
+    Hält dekodierte MangoAccounts im Speicher und bewertet nur die Konten neu,
+    deren Banks oder PerpMarkets einen neuen Oracle-Preis erhalten haben.
+
+    Ein Index von Token- bzw. Marktindex auf die exponierten Konten bestimmt die
+    betroffenen Konten, ein Heap nach Health-Verhältnis liefert die Kandidaten.
+    Veraltete Heap-Einträge werden über eine Versionsnummer je Konto verworfen.
+    """
+
+    def __init__(
+        self,
+        group: Group,
+        health_type: HealthType = HealthType.MAINT,
+    ):
+        self.group = group
+        self.health_type = health_type
+        self._tables = HealthTables.from_group(group)
+        self._accounts: Dict[str, MangoAccount] = {}
+        self._results: Dict[str, LiquidationCandidate] = {}
+        self._accounts_by_token: Dict[int, Set[str]] = {}
+        self._accounts_by_perp_market: Dict[int, Set[str]] = {}
+        self._exposure: Dict[str, Tuple[Set[int], Set[int]]] = {}
+        self._dirty: Set[str] = set()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._versions: Dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    # ----------------------------
+    # Konten verwalten
+    # ----------------------------
+
+    def upsert_accounts(self, mango_accounts: Iterable[MangoAccount]) -> None:
+        """
+        Fügt MangoAccounts hinzu oder ersetzt sie; sie werden beim nächsten `refresh` bewertet.
+
+        Args:
+            mango_accounts (Iterable[MangoAccount]): Die neu dekodierten MangoAccounts.
+        """
+        for mango_account in mango_accounts:
+            key = mango_account.public_key.to_base58()
+            self._unindex(key)
+            self._accounts[key] = mango_account
+
+            tokens = {token.token_index for token in mango_account.tokens_active()}
+            for serum3 in mango_account.serum3_active():
+                tokens.add(serum3.base_token_index)
+                tokens.add(serum3.quote_token_index)
+            perp_markets = {perp.market_index for perp in mango_account.perp_active()}
+            for perp_market_index in perp_markets:
+                perp_market = self.group.get_perp_market_by_market_index(perp_market_index)
+                if perp_market is not None:
+                    tokens.add(perp_market.settle_token_index)
+
+            for token_index in tokens:
+                self._accounts_by_token.setdefault(token_index, set()).add(key)
+            for perp_market_index in perp_markets:
+                self._accounts_by_perp_market.setdefault(perp_market_index, set()).add(key)
+            self._exposure[key] = (tokens, perp_markets)
+            self._dirty.add(key)
+
+    def remove_account(self, mango_account_key: str) -> None:
+        """
+        Entfernt ein MangoAccount (z.B. nach dem Schließen).
+
+        Args:
+            mango_account_key (str): Die Base58-PublicKey des Kontos.
+        """
+        self._unindex(mango_account_key)
+        self._accounts.pop(mango_account_key, None)
+        self._results.pop(mango_account_key, None)
+        self._versions.pop(mango_account_key, None)
+        self._dirty.discard(mango_account_key)
+
+    def _unindex(self, key: str) -> None:
+        exposure = self._exposure.pop(key, None)
+        if exposure is None:
+            return
+        tokens, perp_markets = exposure
+        for token_index in tokens:
+            self._accounts_by_token.get(token_index, set()).discard(key)
+        for perp_market_index in perp_markets:
+            self._accounts_by_perp_market.get(perp_market_index, set()).discard(key)
+
+    # ----------------------------
+    # Preisänderungen
+    # ----------------------------
+
+    def update_oracle_prices(
+        self,
+        token_prices: Optional[Dict[int, float]] = None,
+        perp_prices: Optional[Dict[int, float]] = None,
+    ) -> int:
+        """
+        Übernimmt neue Oracle-Preise und markiert nur die exponierten Konten zur Neubewertung.
+
+        Args:
+            token_prices (Optional[Dict[int, float]]): Neue Preise je Token-Index.
+            perp_prices (Optional[Dict[int, float]]): Neue Preise je Perp-Marktindex.
+
+        Returns:
+            int: Anzahl der neu markierten Konten.
+        """
+        before = len(self._dirty)
+        for token_index, price in (token_prices or {}).items():
+            if token_index >= len(self._tables.token_prices) or self._tables.token_prices[token_index] == price:
+                continue
+            self._tables.token_prices[token_index] = price
+            for bank in self.group.banks_map_by_token_index.get(token_index, []):
+                bank.price = price
+            self._dirty.update(self._accounts_by_token.get(token_index, ()))
+        for perp_market_index, price in (perp_prices or {}).items():
+            if perp_market_index >= len(self._tables.perp_prices) or self._tables.perp_prices[perp_market_index] == price:
+                continue
+            self._tables.perp_prices[perp_market_index] = price
+            perp_market = self.group.get_perp_market_by_market_index(perp_market_index)
+            if perp_market is not None:
+                perp_market.price = price
+            self._dirty.update(self._accounts_by_perp_market.get(perp_market_index, ()))
+        return len(self._dirty) - before
+
+    def reload_group(self, group: Group) -> None:
+        """
+        Übernimmt eine neu geladene Gruppe und bewertet alle Konten neu.
+        """
+        self.group = group
+        self._tables = HealthTables.from_group(group)
+        self.upsert_accounts(list(self._accounts.values()))
+
+    # ----------------------------
+    # Bewertung
+    # ----------------------------
+
+    def refresh(self) -> int:
+        """
+        Bewertet alle markierten Konten in einem Batch neu und aktualisiert den Heap.
+
+        Returns:
+            int: Anzahl der neu bewerteten Konten.
+        """
+        keys = [key for key in self._dirty if key in self._accounts]
+        self._dirty.clear()
+        if not keys:
+            return 0
+
+        mango_accounts = [self._accounts[key] for key in keys]
+        batch = compute_health_batch(self.group, mango_accounts, self.health_type, self._tables)
+        for i, key in enumerate(keys):
+            candidate = LiquidationCandidate(
+                mango_account=mango_accounts[i],
+                health=float(batch.health[i]),
+                health_ratio=float(batch.health_ratio[i]),
+                largest_asset_token_index=int(batch.largest_asset_token_index[i]) if batch.largest_asset_token_index[i] >= 0 else None,
+                largest_asset_value=float(batch.largest_asset_value[i]),
+                largest_liab_token_index=int(batch.largest_liab_token_index[i]) if batch.largest_liab_token_index[i] >= 0 else None,
+                largest_liab_value=float(batch.largest_liab_value[i]),
+            )
+            self._results[key] = candidate
+            version = next(self._counter)
+            self._versions[key] = version
+            heapq.heappush(self._heap, (candidate.health_ratio, version, key))
+
+        if len(self._heap) > 2 * len(self._versions) + 64:
+            self._compact_heap()
+        return len(keys)
+
+    def _compact_heap(self) -> None:
+        self._heap = [entry for entry in self._heap if self._versions.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+    def candidates(self, max_count: Optional[int] = None) -> List[LiquidationCandidate]:
+        """
+        Gibt die liquidierbaren Konten (Health < 0) aufsteigend nach Health-Verhältnis zurück.
+
+        Args:
+            max_count (Optional[int]): Maximale Anzahl an Kandidaten.
+
+        Returns:
+            List[LiquidationCandidate]: Die Liquidationskandidaten.
+        """
+        self.refresh()
+        result: List[LiquidationCandidate] = []
+        popped: List[Tuple[float, int, str]] = []
+        while self._heap and (max_count is None or len(result) < max_count):
+            entry = heapq.heappop(self._heap)
+            if self._versions.get(entry[2]) != entry[1]:
+                continue
+            popped.append(entry)
+            candidate = self._results[entry[2]]
+            if candidate.health >= 0:
+                break
+            result.append(candidate)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return result
+
+    def get(self, mango_account_key: str) -> Optional[LiquidationCandidate]:
+        """
+        Gibt die zuletzt berechnete Bewertung eines Kontos zurück.
+        """
+        return self._results.get(mango_account_key)
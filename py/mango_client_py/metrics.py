@@ -0,0 +1,287 @@
+# mango_client_py/metrics.py
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# ----------------------------
+# Histogramme
+# ----------------------------
+
+class LatencyHistogram:
+    """
+    HDR-artiges Histogramm für Latenzen mit fester relativer Genauigkeit.
+
+    Werte werden in Mikrosekunden als ganze Zahlen erfasst. Jede Zweierpotenz wird in
+    `2 ** (sub_bucket_bits - 1)` lineare Buckets unterteilt, sodass der relative Fehler
+    eines Perzentils unter `2 ** -(sub_bucket_bits - 1)` bleibt (Standard: < 1 %).
+    Das Erfassen kostet eine Bit-Operation und einen Listenzugriff.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_bucket_count = 1 << sub_bucket_bits
+        self._half_count = self._sub_bucket_count >> 1
+        self._counts: List[int] = [0] * self._sub_bucket_count
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    def _index(self, value_us: int) -> int:
+        if value_us < self._sub_bucket_count:
+            return value_us
+        shift = value_us.bit_length() - self.sub_bucket_bits
+        return shift * self._half_count + (value_us >> shift)
+
+    def _highest_equivalent_value(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        shift = index // self._half_count - 1
+        sub_bucket = index - shift * self._half_count
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record_us(self, value_us: int) -> None:
+        value_us = max(int(value_us), 0)
+        index = self._index(value_us)
+        if index >= len(self._counts):
+            self._counts.extend([0] * (index + 1 - len(self._counts)))
+        self._counts[index] += 1
+        self.count += 1
+        self.total_us += value_us
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if self.max_us is None or value_us > self.max_us:
+            self.max_us = value_us
+
+    def record(self, seconds: float) -> None:
+        self.record_us(int(seconds * 1e6))
+
+    def percentile_us(self, percentile: float) -> int:
+        """
+        Gibt den Wert in Mikrosekunden zurück, unter dem `percentile` Prozent der Messungen liegen.
+        """
+        if self.count == 0:
+            return 0
+        target = max(1, int(round(percentile / 100.0 * self.count + 0.5 - 1e-9)))
+        running = 0
+        for index, count in enumerate(self._counts):
+            running += count
+            if running >= target:
+                return min(self._highest_equivalent_value(index), self.max_us)
+        return self.max_us or 0
+
+    def percentile(self, percentile: float) -> float:
+        return self.percentile_us(percentile) / 1e6
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError('Histograms must have the same precision')
+        if len(other._counts) > len(self._counts):
+            self._counts.extend([0] * (len(other._counts) - len(self._counts)))
+        for index, count in enumerate(other._counts):
+            self._counts[index] += count
+        self.count += other.count
+        self.total_us += other.total_us
+        for value in (other.min_us, other.max_us):
+            if value is not None:
+                self.min_us = value if self.min_us is None else min(self.min_us, value)
+                self.max_us = value if self.max_us is None else max(self.max_us, value)
+
+    def reset(self) -> None:
+        self._counts = [0] * self._sub_bucket_count
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = None
+
+    def snapshot(self, percentiles: Tuple[float, ...] = (50.0, 90.0, 99.0, 99.9)) -> Dict[str, float]:
+        """
+        Gibt Anzahl, Summe, Minimum, Maximum und Perzentile in Sekunden zurück.
+        """
+        result = {
+            'count': self.count,
+            'sum': self.total_us / 1e6,
+            'min': (self.min_us or 0) / 1e6,
+            'max': (self.max_us or 0) / 1e6,
+            'mean': self.total_us / self.count / 1e6 if self.count else 0.0,
+        }
+        for p in percentiles:
+            result[f"p{p:g}"] = self.percentile(p)
+        return result
+
+# ----------------------------
+# Registry
+# ----------------------------
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Sammelt Latenz-Histogramme und Zähler nach Name und Labels.
+
+    Zugriffe sind über ein Lock geschützt, damit ein Exporter-Thread gleichzeitig lesen kann.
+    """
+
+    PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+    def __init__(self, prefix: str = 'mango'):
+        self.prefix = prefix
+        self._histograms: Dict[Tuple[str, LabelKey], LatencyHistogram] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: Any) -> LatencyHistogram:
+        key = (name, _label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        histogram = self.histogram(name, **labels)
+        with self._lock:
+            histogram.record(seconds)
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def counter(self, name: str, **labels: Any) -> float:
+        return self._counters.get((name, _label_key(labels)), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Gibt alle Metriken als verschachteltes Dict zurück: {'histograms': {name: [{labels, ...}]}, 'counters': {...}}.
+        """
+        with self._lock:
+            histograms: Dict[str, List[Dict[str, Any]]] = {}
+            for (name, labels), histogram in self._histograms.items():
+                histograms.setdefault(name, []).append({'labels': dict(labels), **histogram.snapshot(self.PERCENTILES)})
+            counters: Dict[str, List[Dict[str, Any]]] = {}
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        return {'histograms': histograms, 'counters': counters}
+
+    def to_prometheus(self) -> str:
+        """
+        Gibt die Metriken im Prometheus-Textformat zurück; Histogramme als `summary` mit Quantilen.
+        """
+        def fmt_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            escaped = (value.replace('\\', '\\\\').replace('"', '\\"') for _, value in items)
+            return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} summary")
+                for (hist_name, labels), histogram in sorted(self._histograms.items()):
+                    if hist_name != name:
+                        continue
+                    for p in self.PERCENTILES:
+                        quantile = (('quantile', f"{p / 100:g}"),)
+                        lines.append(f"{metric}{fmt_labels(labels, quantile)} {histogram.percentile(p):.6f}")
+                    lines.append(f"{metric}_sum{fmt_labels(labels)} {histogram.total_us / 1e6:.6f}")
+                    lines.append(f"{metric}_count{fmt_labels(labels)} {histogram.count}")
+            for name in sorted({name for name, _ in self._counters}):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{metric}{fmt_labels(labels)} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+def start_prometheus_exporter(registry: MetricsRegistry, port: int = 9464, host: str = '0.0.0.0') -> Any:
+    """
+    Startet einen HTTP-Server in einem Hintergrund-Thread, der `registry.to_prometheus()` unter `/metrics` ausliefert.
+
+    Args:
+        registry (MetricsRegistry): Die Registry.
+        port (int): Der Port.
+        host (str): Die Adresse.
+
+    Returns:
+        Any: Der `ThreadingHTTPServer`; `shutdown()` beendet ihn.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='mango-prometheus-exporter', daemon=True).start()
+    return server
+
+# ----------------------------
+# Transaktions-Zeitmessung
+# ----------------------------
+
+TX_STAGES = ('build', 'fee_estimate', 'blockhash', 'sign', 'send', 'first_seen', 'confirm')
+
+
+class TransactionTimer:
+    """
+    Misst die Stufen einer Transaktion mit monotonen Zeitstempeln.
+
+    `mark(stage)` schließt eine Stufe ab; ihre Dauer ist die Zeit seit der vorherigen
+    Markierung. `finish` überträgt alle Dauern und die Gesamtdauer in die Registry.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry
+        self.started_at = time.monotonic()
+        self.timestamps: Dict[str, float] = {}
+        self._last = self.started_at
+
+    def mark(self, stage: str) -> float:
+        now = time.monotonic()
+        self.timestamps[stage] = now
+        duration = now - self._last
+        self._last = now
+        if self.registry is not None:
+            self.registry.observe('tx_stage_seconds', duration, stage=stage)
+        return duration
+
+    def durations(self) -> Dict[str, float]:
+        durations = {}
+        previous = self.started_at
+        for stage, timestamp in sorted(self.timestamps.items(), key=lambda item: item[1]):
+            durations[stage] = timestamp - previous
+            previous = timestamp
+        return durations
+
+    def finish(self, status: str) -> Dict[str, float]:
+        total = time.monotonic() - self.started_at
+        if self.registry is not None:
+            self.registry.observe('tx_total_seconds', total, status=status)
+            self.registry.inc('tx_total', status=status)
+        return {**self.durations(), 'total': total}
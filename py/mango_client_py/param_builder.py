@@ -4,7 +4,7 @@ import asyncio
 from typing import List, Optional, Dict, Any, Callable
 from dataclasses import dataclass
 
-from anchorpy import Program, Provider, Wallet, Idl
+from anchorpy import Program, Provider, Wallet
 from solana.publickey import PublicKey
 from solana.keypair import Keypair
 from solana.transaction import Transaction, TransactionInstruction
@@ -12,6 +12,7 @@ from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Commitment
 from solana.rpc.types import TxOpts
 
+from .idl_cache import load_idl
 from .types import (
     Group,
     MangoAccount,
@@ -43,6 +44,7 @@ from .accounts.mango_account import MangoAccounts
 from .accounts.oracles import Oracles
 from .accounts.serum3 import Serum3
 from .accounts.perp import Perp
+from .price_impact import PriceImpactLoader
 
 @dataclass
 class MangoClientOptions:
@@ -57,6 +59,8 @@ class MangoClientOptions:
     multiple_connections: Optional[List[AsyncClient]] = None
     fallback_oracle_config: FallbackOracleConfig = FallbackOracleConfig.NEVER  # 'never', 'all', 'dynamic', List[PublicKey]
     turn_off_price_impact_loading: bool = False
+    price_impact_source: Optional[str] = None  # Pfad oder JSON-String mit PriceImpact-Einträgen
+    price_impact_ttl_seconds: float = 3600.0
 
     def __post_init__(self):
         if self.prepended_global_additional_instructions is None:
@@ -94,6 +98,9 @@ class MangoClient:
         self.oracles = Oracles(self)
         self.serum3 = Serum3(self)
         self.perp = Perp(self)
+        self.price_impact: Optional[PriceImpactLoader] = None
+        if opts.price_impact_source and not opts.turn_off_price_impact_loading:
+            self.price_impact = PriceImpactLoader(opts.price_impact_source, opts.price_impact_ttl_seconds)
 
         # Beispielhafte Erhöhung des StackTrace-Limits in Python
         import sys
@@ -288,16 +295,8 @@ class MangoClient:
         Returns:
             MangoClient: Der verbundene MangoClient.
         """
-        # Laden Sie das IDL (Interface Definition Language) korrekt
-        # Dies muss an Ihre spezifische Implementierung angepasst werden
-        # Beispiel: Laden aus einer JSON-Datei
-        import json
-        import os
-
-        idl_path = os.path.join(os.path.dirname(__file__), 'idl.json')
-        with open(idl_path, 'r') as f:
-            idl_json = json.load(f)
-        idl = Idl.from_json(idl_json)
+        # Das IDL wird je Prozess nur einmal geladen (siehe idl_cache.load_idl)
+        idl = load_idl()
 
         # Erstellen Sie das Keypair für das Wallet (hier als Platzhalter ein generiertes Keypair)
         # In der Praxis sollten Sie das Keypair sicher laden
@@ -338,14 +337,8 @@ class MangoClient:
         Returns:
             MangoClient: Der verbundene MangoClient.
         """
-        # Laden Sie das IDL korrekt
-        import json
-        import os
-
-        idl_path = os.path.join(os.path.dirname(__file__), 'idl.json')
-        with open(idl_path, 'r') as f:
-            idl_json = json.load(f)
-        idl = Idl.from_json(idl_json)
+        # Das IDL wird je Prozess nur einmal geladen (siehe idl_cache.load_idl)
+        idl = load_idl()
 
         # Finden Sie die entsprechende Group PublicKey basierend auf dem Namen
         # Dies könnte eine Mapping-Tabelle sein oder eine API-Abfrage
@@ -447,6 +440,7 @@ class MangoClient:
         max_sell_native: int,
         max_buy: float,
         max_sell: float,
+        price_impact_fn: Optional[Callable[[int, float], float]] = None,
     ) -> float:
         """
         Berechnet den Preisaufschlag für einen Conditional Swap.
@@ -459,11 +453,15 @@ class MangoClient:
             max_sell_native (int): Maximale Verkaufmenge in nativer Darstellung.
             max_buy (float): Maximale Kaufmenge.
             max_sell (float): Maximale Verkaufmenge.
+            price_impact_fn (Optional[Callable[[int, float], float]]): Preis-Impact in Prozent je (Token-Index, USD-Betrag),
+                standardmäßig aus den geladenen Price-Impact-Daten.
 
         Returns:
-            float: Der berechnete Preisaufschlag.
+            float: Der berechnete Preisaufschlag in Prozent.
         """
         from .utils import compute_premium
+        if price_impact_fn is None and self.price_impact is not None:
+            price_impact_fn = self.price_impact.price_impact_fn(group)
         return compute_premium(
             group=group,
             buy_bank=buy_bank,
@@ -471,5 +469,6 @@ class MangoClient:
             max_buy_native=max_buy_native,
             max_sell_native=max_sell_native,
             max_buy=max_buy,
-            max_sell=max_sell
+            max_sell=max_sell,
+            price_impact_fn=price_impact_fn,
         )
@@ -0,0 +1,287 @@
+# mango_client_py/perp_settle.py
+
+from dataclasses import dataclass
+from typing import List, Optional, TYPE_CHECKING
+
+import numpy as np
+from solana.publickey import PublicKey
+from solana.transaction import TransactionInstruction
+
+from .types import Group, HealthType, MangoAccount, PerpMarket, PerpPosition
+from .health import HealthTables, compute_health_batch, spot_amounts_taken_for_health_zero, weight_row
+from .utils import set_compute_unit_limit_ix
+
+if TYPE_CHECKING:
+    from .client import MangoClient
+
+# ----------------------------
+# Abrechenbarer PnL
+# ----------------------------
+
+@dataclass
+class PerpSettleablePnl:
+    """
+    Spaltenweise Sicht auf alle Positionen eines PerpMarkets.
+
+    Alle Arrays haben die Länge von `mango_accounts`; Beträge in nativen Quote-Einheiten.
+    """
+    mango_accounts: List[MangoAccount]
+    unsettled_pnl: np.ndarray
+    settle_limit_min: np.ndarray
+    settle_limit_max: np.ndarray
+    settleable_pnl: np.ndarray
+
+
+@dataclass
+class PerpSettlePair:
+    profitable_account: MangoAccount
+    unprofitable_account: MangoAccount
+    amount: float  # native Quote-Einheiten
+
+
+def _find_perp_position(mango_account: MangoAccount, market_index: int) -> Optional[PerpPosition]:
+    for perp in mango_account.perps:
+        if perp.market_index == market_index:
+            return perp
+    return None
+
+
+def compute_settleable_pnl(
+    group: Group,
+    perp_market: PerpMarket,
+    mango_accounts: List[MangoAccount],
+    now_ts: Optional[int] = None,
+    tables: Optional[HealthTables] = None,
+) -> PerpSettleablePnl:
+    """
+    Berechnet unrealisierten und abrechenbaren PnL aller Positionen eines PerpMarkets.
+
+    Das Settle-Limit entspricht `PerpPosition.availableSettleLimit` im TS-Client;
+    negativer PnL wird zusätzlich durch `perp_max_settle` aus der Maint-Health begrenzt.
+    Ist `now_ts` gesetzt, wird der bereits abgerechnete Betrag eines abgelaufenen
+    Fensters wie im Programm ignoriert.
+
+    Args:
+        group (Group): Die Gruppe.
+        perp_market (PerpMarket): Der PerpMarket.
+        mango_accounts (List[MangoAccount]): Kandidatenkonten; Konten ohne Position werden übersprungen.
+        now_ts (Optional[int]): Aktueller Unix-Zeitstempel.
+        tables (Optional[HealthTables]): Vorberechnete Lookup-Tabellen der Gruppe.
+
+    Returns:
+        PerpSettleablePnl: Die Spalten je Konto mit Position.
+    """
+    rows = []
+    for mango_account in mango_accounts:
+        perp = _find_perp_position(mango_account, perp_market.market_index)
+        if perp is not None and (perp.base_position_lots != 0 or perp.quote_position_native != 0):
+            rows.append((mango_account, perp))
+
+    accounts = [mango_account for mango_account, _ in rows]
+    base_lots = np.array([perp.base_position_lots for _, perp in rows], dtype=np.float64)
+    quote = np.array([perp.quote_position_native for _, perp in rows], dtype=np.float64)
+    base_native = base_lots * perp_market.base_lot_size
+    unsettled = quote + base_native * perp_market.price
+
+    if perp_market.settle_pnl_limit_factor < 0:
+        limit_min = np.full(len(rows), -np.inf)
+        limit_max = np.full(len(rows), np.inf)
+    else:
+        recurring = np.array([perp.recurring_settle_pnl_allowance for _, perp in rows], dtype=np.float64)
+        oneshot = np.array([perp.oneshot_settle_pnl_allowance for _, perp in rows], dtype=np.float64)
+        used = np.array(
+            [perp.settle_pnl_limit_settled_in_current_window_native for _, perp in rows], dtype=np.float64
+        )
+        if now_ts is not None:
+            window = now_ts // perp_market.settle_pnl_limit_window_size_ts
+            windows = np.array([perp.settle_pnl_limit_window for _, perp in rows], dtype=np.int64)
+            used = np.where(windows == window, used, 0.0)
+
+        stable_price = perp_market.stable_price or perp_market.price
+        max_pnl = perp_market.settle_pnl_limit_factor * stable_price * np.abs(base_native) + np.abs(recurring)
+        min_pnl = -max_pnl
+        max_pnl = max_pnl + np.where(oneshot >= 0, oneshot, 0.0)
+        min_pnl = min_pnl + np.where(oneshot < 0, oneshot, 0.0)
+        limit_min = np.minimum(min_pnl - used, 0.0)
+        limit_max = np.maximum(max_pnl - used, 0.0)
+
+    settleable = np.clip(unsettled, limit_min, limit_max)
+
+    # Negativer PnL ist zusätzlich durch die Health des Kontos begrenzt
+    negative = np.flatnonzero(settleable < 0)
+    if len(negative):
+        tables = tables or HealthTables.from_group(group)
+        settle_index = perp_market.settle_token_index
+        batch = compute_health_batch(
+            group,
+            [accounts[i] for i in negative],
+            HealthType.MAINT,
+            tables,
+            settle_token_index=settle_index,
+        )
+        if settle_index < len(tables.token_known) and tables.token_known[settle_index]:
+            price = tables.token_prices[settle_index]
+            row = weight_row(HealthType.MAINT)
+            max_settle = spot_amounts_taken_for_health_zero(
+                batch.health,
+                batch.settle_token_balance,
+                price * tables.token_asset_weights[row][settle_index],
+                price * tables.token_liab_weights[row][settle_index],
+            )
+        else:
+            max_settle = np.zeros(len(negative))
+        settleable[negative] = np.maximum(settleable[negative], -max_settle)
+
+    return PerpSettleablePnl(
+        mango_accounts=accounts,
+        unsettled_pnl=unsettled,
+        settle_limit_min=limit_min,
+        settle_limit_max=limit_max,
+        settleable_pnl=settleable,
+    )
+
+
+def find_perp_settle_pairs(
+    settleable: PerpSettleablePnl,
+    min_settle_amount: float = 0.0,
+    max_pairs: Optional[int] = None,
+) -> List[PerpSettlePair]:
+    """
+    Paart gierig den größten positiven mit dem größten negativen abrechenbaren PnL.
+
+    Jedes Paar rechnet `min(Gewinn, |Verlust|)` ab; der Rest des größeren Betrags
+    wird mit dem nächsten Gegenkonto gepaart.
+
+    Args:
+        settleable (PerpSettleablePnl): Ergebnis von `compute_settleable_pnl`.
+        min_settle_amount (float): Paare mit kleinerem Betrag werden verworfen.
+        max_pairs (Optional[int]): Maximale Anzahl an Paaren.
+
+    Returns:
+        List[PerpSettlePair]: Die Paare absteigend nach Betrag des jeweiligen Schritts.
+    """
+    pnl = settleable.settleable_pnl
+    positive = np.flatnonzero(pnl > 0)
+    negative = np.flatnonzero(pnl < 0)
+    positive = positive[np.argsort(-pnl[positive], kind='stable')]
+    negative = negative[np.argsort(pnl[negative], kind='stable')]
+    remaining_positive = pnl[positive].copy()
+    remaining_negative = -pnl[negative]
+
+    pairs: List[PerpSettlePair] = []
+    i = j = 0
+    while i < len(positive) and j < len(negative):
+        if max_pairs is not None and len(pairs) >= max_pairs:
+            break
+        amount = min(remaining_positive[i], remaining_negative[j])
+        if amount < min_settle_amount or amount <= 0:
+            break
+        pairs.append(PerpSettlePair(
+            profitable_account=settleable.mango_accounts[positive[i]],
+            unprofitable_account=settleable.mango_accounts[negative[j]],
+            amount=float(amount),
+        ))
+        remaining_positive[i] -= amount
+        remaining_negative[j] -= amount
+        if remaining_positive[i] <= 0:
+            i += 1
+        if remaining_negative[j] <= 0:
+            j += 1
+    return pairs
+
+# ----------------------------
+# Anweisungen
+# ----------------------------
+
+class PerpSettler:
+    """
+    Baut `perp_settle_pnl`-Anweisungen für die gefundenen Paare eines PerpMarkets.
+    """
+
+    def __init__(self, client: 'MangoClient'):
+        self.client = client
+
+    async def perp_settle_pnl_ix(
+        self,
+        group: Group,
+        profitable_account: MangoAccount,
+        unprofitable_account: MangoAccount,
+        settler: MangoAccount,
+        perp_market: PerpMarket,
+    ) -> TransactionInstruction:
+        """
+        Erstellt die `perp_settle_pnl`-Anweisung für ein Kontopaar.
+
+        Args:
+            group (Group): Die Gruppe.
+            profitable_account (MangoAccount): Konto mit positivem PnL.
+            unprofitable_account (MangoAccount): Konto mit negativem PnL.
+            settler (MangoAccount): Das Konto, das die Settle-Gebühr erhält.
+            perp_market (PerpMarket): Der PerpMarket.
+
+        Returns:
+            TransactionInstruction: Die Anweisung.
+        """
+        settle_bank = group.banks_map_by_token_index[perp_market.settle_token_index][0]
+        health_remaining_accounts: List[PublicKey] = await self.client.accounts.build_health_remaining_accounts(
+            group,
+            [profitable_account, unprofitable_account],
+            [settle_bank],
+            [perp_market],
+        )
+
+        return await self.client.program.methods.perp_settle_pnl().accounts({
+            'group': group.public_key,
+            'account_a': profitable_account.public_key,
+            'account_b': unprofitable_account.public_key,
+            'perp_market': perp_market.public_key,
+            'oracle': perp_market.oracle,
+            'settle_oracle': settle_bank.oracle,
+            'settle_bank': settle_bank.public_key,
+            'settler': settler.public_key,
+            'settler_owner': self.client.wallet_pk,
+        }).remaining_accounts([
+            {"pubkey": pk, "is_signer": False, "is_writable": False} for pk in health_remaining_accounts
+        ]).instruction()
+
+    async def build_settle_pnl_ixs(
+        self,
+        group: Group,
+        perp_market: PerpMarket,
+        mango_accounts: List[MangoAccount],
+        settler: MangoAccount,
+        now_ts: Optional[int] = None,
+        min_settle_amount: float = 0.0,
+        max_pairs: Optional[int] = None,
+    ) -> List[List[TransactionInstruction]]:
+        """
+        Findet Settle-Paare eines PerpMarkets und baut je Paar eine sendefertige Anweisungsliste.
+
+        Jede Liste beginnt mit einem Compute-Unit-Limit von `PERP_SETTLE_PNL_CU_LIMIT`
+        und kann direkt an `send_and_confirm_transaction_for_group` übergeben werden.
+
+        Args:
+            group (Group): Die Gruppe.
+            perp_market (PerpMarket): Der PerpMarket.
+            mango_accounts (List[MangoAccount]): Die Kandidatenkonten.
+            settler (MangoAccount): Das Konto, das die Settle-Gebühr erhält.
+            now_ts (Optional[int]): Aktueller Unix-Zeitstempel für das Settle-Limit-Fenster.
+            min_settle_amount (float): Minimaler Betrag je Paar in nativen Quote-Einheiten.
+            max_pairs (Optional[int]): Maximale Anzahl an Paaren.
+
+        Returns:
+            List[List[TransactionInstruction]]: Eine Anweisungsliste je Paar.
+        """
+        settleable = compute_settleable_pnl(group, perp_market, mango_accounts, now_ts)
+        pairs = find_perp_settle_pairs(settleable, min_settle_amount, max_pairs)
+        batches: List[List[TransactionInstruction]] = []
+        for pair in pairs:
+            ix = await self.perp_settle_pnl_ix(
+                group,
+                pair.profitable_account,
+                pair.unprofitable_account,
+                settler,
+                perp_market,
+            )
+            batches.append([set_compute_unit_limit_ix(self.client.PERP_SETTLE_PNL_CU_LIMIT), ix])
+        return batches
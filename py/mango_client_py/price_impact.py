@@ -0,0 +1,236 @@
+# mango_client_py/price_impact.py
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .types import Group
+
+logger = logging.getLogger(__name__)
+
+# Wert für fehlende Daten wie in `computePriceImpactOnJup` (TS)
+MISSING_PRICE_IMPACT = -1.0
+
+# Abweichende Symbolnamen der Price-Impact-API
+SYMBOL_ALIASES = {
+    'ETH (Portal)': 'ETH',
+}
+
+PriceImpactSource = Union[str, Callable[[], Any], Callable[[], Awaitable[Any]]]
+
+# ----------------------------
+# Price-Impact-Tabelle
+# ----------------------------
+
+@dataclass
+class PriceImpactTable:
+    """
+    Price-Impact-Kurven je Symbol und Seite als sortierte Arrays.
+
+    Die Einträge entsprechen dem `PriceImpact`-Typ aus `risk.ts`; der Impact wird in
+    Prozent gespeichert, die Beträge in USD. Für `side=None` wird je Betrag der
+    höhere Impact beider Seiten verwendet.
+    """
+    curves: Dict[Tuple[str, Optional[str]], Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    loaded_at: float = 0.0
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], metric: str = 'p90') -> 'PriceImpactTable':
+        """
+        Baut die Tabelle aus einer Liste von `PriceImpact`-Einträgen.
+
+        Args:
+            records (List[Dict[str, Any]]): Einträge mit `symbol`, `side`, `target_amount` und `metric`.
+            metric (str): Das Feld mit dem Impact in Prozent (z.B. 'p90', 'p95', 'avg_price_impact_percent').
+
+        Returns:
+            PriceImpactTable: Die Tabelle.
+        """
+        points: Dict[Tuple[str, Optional[str]], Dict[float, float]] = {}
+        for record in records:
+            value = record.get(metric)
+            if value is None:
+                continue
+            amount = float(record['target_amount'])
+            for key in ((record['symbol'], record.get('side')), (record['symbol'], None)):
+                curve = points.setdefault(key, {})
+                curve[amount] = max(curve.get(amount, -np.inf), float(value))
+
+        curves = {}
+        for key, curve in points.items():
+            amounts = np.array(sorted(curve), dtype=np.float64)
+            curves[key] = (amounts, np.array([curve[amount] for amount in amounts], dtype=np.float64))
+        return cls(curves=curves, loaded_at=time.time())
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes], metric: str = 'p90') -> 'PriceImpactTable':
+        return cls.from_records(json.loads(data), metric)
+
+    @classmethod
+    def from_file(cls, path: str, metric: str = 'p90') -> 'PriceImpactTable':
+        with open(path, 'r') as f:
+            return cls.from_records(json.load(f), metric)
+
+    def __len__(self) -> int:
+        return len(self.curves)
+
+    def symbols(self) -> List[str]:
+        return sorted({symbol for symbol, side in self.curves if side is None})
+
+    def impact_percent(
+        self,
+        symbol: str,
+        usd_amounts: Any,
+        side: Optional[str] = None,
+    ) -> Any:
+        """
+        Interpoliert den Price-Impact in Prozent für einen oder viele USD-Beträge.
+
+        Außerhalb der Stützstellen wird der Randwert verwendet.
+
+        Args:
+            symbol (str): Das Token-Symbol (Bank-Name).
+            usd_amounts (Any): Ein Betrag oder ein Array von Beträgen in USD.
+            side (Optional[str]): 'bid', 'ask' oder None für den ungünstigeren Wert.
+
+        Returns:
+            Any: Der Impact in Prozent (Skalar oder Array), `MISSING_PRICE_IMPACT` ohne Daten.
+        """
+        curve = self.curves.get((SYMBOL_ALIASES.get(symbol, symbol), side))
+        if curve is None:
+            if np.ndim(usd_amounts) == 0:
+                return MISSING_PRICE_IMPACT
+            return np.full(np.shape(usd_amounts), MISSING_PRICE_IMPACT)
+        amounts, impacts = curve
+        result = np.interp(usd_amounts, amounts, impacts)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def impact_percent_by_token_index(
+        self,
+        group: Group,
+        token_indexes: Any,
+        usd_amounts: Any,
+        side: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Vektorisierte Abfrage für viele (Token-Index, USD-Betrag)-Paare, z.B. zur Größenbestimmung von Liquidationen.
+
+        Args:
+            group (Group): Die Gruppe für die Zuordnung Token-Index -> Bank-Name.
+            token_indexes (Any): Token-Indizes.
+            usd_amounts (Any): USD-Beträge, gleiche Form wie `token_indexes`.
+            side (Optional[str]): 'bid', 'ask' oder None.
+
+        Returns:
+            np.ndarray: Der Impact in Prozent je Paar.
+        """
+        token_indexes, usd_amounts = np.broadcast_arrays(np.asarray(token_indexes), np.asarray(usd_amounts, dtype=np.float64))
+        result = np.full(token_indexes.shape, MISSING_PRICE_IMPACT)
+        for token_index in np.unique(token_indexes):
+            banks = group.banks_map_by_token_index.get(int(token_index))
+            if not banks:
+                continue
+            mask = token_indexes == token_index
+            result[mask] = self.impact_percent(banks[0].name, usd_amounts[mask], side)
+        return result
+
+    def price_impact_fn(self, group: Group) -> Callable[[int, float], float]:
+        """
+        Gibt eine Funktion (Token-Index, USD-Betrag) -> Impact in Prozent zurück, wie sie `compute_premium` erwartet.
+        """
+        def fn(token_index: int, usd_amount: float) -> float:
+            banks = group.banks_map_by_token_index.get(token_index)
+            if not banks:
+                return MISSING_PRICE_IMPACT
+            return self.impact_percent(banks[0].name, usd_amount)
+        return fn
+
+# ----------------------------
+# Loader
+# ----------------------------
+
+class PriceImpactLoader:
+    """
+    Lädt die Price-Impact-Tabelle aus einer Datei, einem JSON-String oder einer
+    (asynchronen) Funktion und erneuert sie im Hintergrund nach Ablauf der TTL.
+
+    Schlägt ein Neuladen fehl, bleibt die zuletzt geladene Tabelle aktiv.
+    """
+
+    def __init__(
+        self,
+        source: PriceImpactSource,
+        ttl_seconds: float = 3600.0,
+        metric: str = 'p90',
+    ):
+        self.source = source
+        self.ttl_seconds = ttl_seconds
+        self.metric = metric
+        self.table = PriceImpactTable()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self.table.loaded_at >= self.ttl_seconds
+
+    async def _read_records(self) -> Any:
+        if callable(self.source):
+            records = self.source()
+            if asyncio.iscoroutine(records):
+                records = await records
+            return records
+        if self.source.lstrip().startswith('['):
+            return json.loads(self.source)
+
+        def read_file() -> Any:
+            with open(self.source, 'r') as f:
+                return json.load(f)
+        return await asyncio.to_thread(read_file)
+
+    async def reload(self) -> PriceImpactTable:
+        """
+        Lädt die Tabelle neu und gibt die aktive Tabelle zurück.
+        """
+        try:
+            self.table = PriceImpactTable.from_records(await self._read_records(), self.metric)
+        except Exception as e:
+            logger.error(f"Error while loading price impact: {e}")
+        return self.table
+
+    async def ensure_fresh(self) -> PriceImpactTable:
+        if self.is_stale:
+            await self.reload()
+        return self.table
+
+    async def _refresh_loop(self) -> None:
+        # Eine gerade geladene Tabelle (z.B. durch `reload` vor `start`) wird nicht sofort erneut geladen
+        while True:
+            await self.ensure_fresh()
+            await asyncio.sleep(self.ttl_seconds)
+
+    def start(self) -> None:
+        """
+        Startet die Hintergrundaktualisierung in der laufenden Event-Loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def price_impact_fn(self, group: Group) -> Callable[[int, float], float]:
+        """
+        Wie `PriceImpactTable.price_impact_fn`, verwendet aber immer die zuletzt geladene Tabelle.
+        """
+        return lambda token_index, usd_amount: self.table.price_impact_fn(group)(token_index, usd_amount)
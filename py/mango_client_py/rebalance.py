@@ -0,0 +1,423 @@
+# mango_client_py/rebalance.py
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, TYPE_CHECKING
+
+from solana.publickey import PublicKey
+from solana.transaction import TransactionInstruction
+from spl.token.constants import NATIVE_MINT
+from spl.token.instructions import create_close_account_instruction
+
+from .types import Bank, Group, MangoAccount, MangoSignatureStatus
+from .router import SwapMode, SwapQuote, SwapRouter
+from .utils import (
+    create_associated_token_account_idempotent_instruction,
+    set_compute_unit_limit_ix,
+)
+
+if TYPE_CHECKING:
+    from .client import MangoClient
+
+logger = logging.getLogger(__name__)
+
+# Geschätzte Compute Units je Aktion und Obergrenze je Transaktion
+REBALANCE_SWAP_CU = 400000
+REBALANCE_WITHDRAW_CU = 60000
+MAX_TRANSACTION_CU = 1400000
+# Größe eines Pakets abzüglich IPv6- und Fragment-Header, wie PACKET_DATA_SIZE in solana-py
+MAX_TRANSACTION_SIZE = 1232
+
+# ----------------------------
+# Netto-Positionen
+# ----------------------------
+
+def compute_net_positions(
+    group: Group,
+    mango_account: MangoAccount,
+    targets: Optional[Dict[int, float]] = None,
+    quote_token_index: int = 0,
+) -> Dict[int, float]:
+    """
+    Gibt je Token die native Abweichung des Saldos vom Zielsaldo zurück (positiv = Überschuss).
+
+    Tokens ohne Ziel werden auf null zurückgeführt; das Quote-Token, gegen das
+    getauscht wird, ist ausgenommen.
+
+    Args:
+        group (Group): Die Gruppe.
+        mango_account (MangoAccount): Das MangoAccount des Liquidators.
+        targets (Optional[Dict[int, float]]): Native Zielsalden je Token-Index.
+        quote_token_index (int): Token-Index des Quote-Tokens.
+
+    Returns:
+        Dict[int, float]: Die Abweichung je Token-Index.
+    """
+    targets = targets or {}
+    balances: Dict[int, float] = {}
+    for token in mango_account.tokens_active():
+        bank = group.banks_map_by_token_index[token.token_index][0]
+        balances[token.token_index] = token.balance(bank)
+
+    net = {}
+    for token_index in set(balances) | set(targets):
+        if token_index == quote_token_index:
+            continue
+        net[token_index] = balances.get(token_index, 0.0) - targets.get(token_index, 0.0)
+    return net
+
+# ----------------------------
+# Aktionen und Transaktionen
+# ----------------------------
+
+def _compact_u16_size(value: int) -> int:
+    return 1 if value < 0x80 else 2 if value < 0x4000 else 3
+
+
+def legacy_transaction_size(ixs: List[TransactionInstruction]) -> int:
+    """
+    Gibt die serialisierte Größe einer Legacy-Transaktion mit diesen Anweisungen in Bytes zurück.
+
+    So baut `send_and_confirm_transaction` die Transaktion; Address Lookup Tables verkleinern sie
+    dort nicht. Der Fee-Payer wird als einer der Signer der Anweisungen angenommen.
+
+    Args:
+        ixs (List[TransactionInstruction]): Die Anweisungen.
+
+    Returns:
+        int: Die Größe in Bytes.
+    """
+    accounts: Set[str] = set()
+    signers: Set[str] = set()
+    ixs_size = 0
+    for ix in ixs:
+        accounts.add(ix.program_id.to_base58())
+        for meta in ix.keys:
+            accounts.add(meta.pubkey.to_base58())
+            if meta.is_signer:
+                signers.add(meta.pubkey.to_base58())
+        ixs_size += 1 + _compact_u16_size(len(ix.keys)) + len(ix.keys) + _compact_u16_size(len(ix.data)) + len(ix.data)
+    num_signers = max(len(signers), 1)
+    num_accounts = len(accounts) + (0 if signers else 1)
+    return (
+        _compact_u16_size(num_signers) + 64 * num_signers
+        + 3 + _compact_u16_size(num_accounts) + 32 * num_accounts
+        + 32 + _compact_u16_size(len(ixs)) + ixs_size
+    )
+
+
+@dataclass
+class RebalanceAction:
+    kind: str  # 'swap' oder 'withdraw'
+    token_index: int
+    native_amount: float
+    instructions: List[TransactionInstruction]
+    address_lookup_tables: List[PublicKey] = field(default_factory=list)
+    compute_units: int = 0
+    quote: Optional[SwapQuote] = None
+
+    def accounts(self) -> Set[str]:
+        """
+        Gibt die eindeutigen Konten zurück, wie sie `send_and_confirm_transaction_for_group` zählt.
+        """
+        accounts = {pk.to_base58() for ix in self.instructions for pk in [ix.program_id] + [key.pubkey for key in ix.keys]}
+        return accounts | {alt.to_base58() for alt in self.address_lookup_tables}
+
+
+@dataclass
+class RebalanceTransaction:
+    actions: List[RebalanceAction] = field(default_factory=list)
+    accounts: Set[str] = field(default_factory=set)
+    compute_units: int = 0
+
+    @property
+    def instructions(self) -> List[TransactionInstruction]:
+        return [ix for action in self.actions for ix in action.instructions]
+
+    @property
+    def address_lookup_tables(self) -> List[PublicKey]:
+        return [alt for action in self.actions for alt in action.address_lookup_tables]
+
+
+@dataclass
+class RebalancePlan:
+    mango_account: MangoAccount
+    net_positions: Dict[int, float]
+    transactions: List[RebalanceTransaction]
+    skipped: Dict[int, str] = field(default_factory=dict)  # Token-Index -> Grund
+
+    @property
+    def actions(self) -> List[RebalanceAction]:
+        return [action for transaction in self.transactions for action in transaction.actions]
+
+
+def pack_transactions(
+    actions: List[RebalanceAction],
+    max_accounts: int,
+    max_compute_units: int = MAX_TRANSACTION_CU,
+    max_transaction_size: int = MAX_TRANSACTION_SIZE,
+    max_swaps_per_transaction: int = 1,
+) -> List[RebalanceTransaction]:
+    """
+    Verteilt Aktionen per First-Fit-Decreasing auf möglichst wenige Transaktionen.
+
+    Eine Transaktion nimmt eine Aktion auf, solange die eindeutigen Konten, die geschätzten
+    Compute Units und die serialisierte Größe (inklusive der ComputeBudget-Anweisung) unter
+    den Grenzen bleiben; gemeinsame Konten (Gruppe, Banks, Programme) zählen nur einmal.
+    Da Transaktionen als Legacy-Transaktionen ohne Address Lookup Tables gesendet werden,
+    erhält jeder Swap standardmäßig eine eigene Transaktion. Aktionen, die allein die
+    Grenzen überschreiten, erhalten eine eigene Transaktion.
+
+    Args:
+        actions (List[RebalanceAction]): Die Aktionen.
+        max_accounts (int): Maximale Anzahl eindeutiger Konten je Transaktion.
+        max_compute_units (int): Maximale Compute Units je Transaktion.
+        max_transaction_size (int): Maximale serialisierte Größe je Transaktion in Bytes.
+        max_swaps_per_transaction (int): Maximale Anzahl an Swaps je Transaktion.
+
+    Returns:
+        List[RebalanceTransaction]: Die Transaktionen.
+    """
+    compute_budget_ix = set_compute_unit_limit_ix(max_compute_units)
+    transactions: List[RebalanceTransaction] = []
+    for action in sorted(actions, key=lambda action: (len(action.accounts()), action.compute_units), reverse=True):
+        accounts = action.accounts()
+        is_swap = action.kind == 'swap'
+        for transaction in transactions:
+            if (
+                transaction.compute_units + action.compute_units <= max_compute_units
+                and len(transaction.accounts | accounts) <= max_accounts
+                and not (is_swap and sum(a.kind == 'swap' for a in transaction.actions) >= max_swaps_per_transaction)
+                and legacy_transaction_size(
+                    [compute_budget_ix] + transaction.instructions + action.instructions
+                ) <= max_transaction_size
+            ):
+                break
+        else:
+            transaction = RebalanceTransaction()
+            transactions.append(transaction)
+            if legacy_transaction_size([compute_budget_ix] + action.instructions) > max_transaction_size:
+                logger.warning(
+                    f"Rebalance {action.kind} for token {action.token_index} exceeds {max_transaction_size} bytes"
+                )
+        transaction.actions.append(action)
+        transaction.accounts |= accounts
+        transaction.compute_units += action.compute_units
+    return transactions
+
+# ----------------------------
+# Planer
+# ----------------------------
+
+class RebalancePlanner:
+    """
+    Plant das Abbauen der nach Liquidationen angesammelten Token-Positionen.
+
+    Überschüsse werden per Flash-Loan-Swap in das Quote-Token getauscht, Defizite
+    (z.B. übernommene Kredite) aus dem Quote-Token zurückgekauft; zusätzlich können
+    Abhebungen geplant werden. Alle Quotes werden gleichzeitig angefragt, die Aktionen
+    anschließend zu möglichst wenigen Transaktionen gebündelt. Swaps werden vor den
+    Abhebungen gesendet.
+    """
+
+    def __init__(
+        self,
+        client: 'MangoClient',
+        router: Optional[SwapRouter] = None,
+        quote_token_index: int = 0,
+        min_trade_value: float = 1000000.0,
+        slippage_bps: int = 100,
+        max_accounts: Optional[int] = None,
+        max_compute_units: int = MAX_TRANSACTION_CU,
+    ):
+        """
+        Args:
+            client (MangoClient): Der Client.
+            router (Optional[SwapRouter]): Der Router; Standard ist `client.router`.
+            quote_token_index (int): Token-Index des Quote-Tokens (z.B. USDC).
+            min_trade_value (float): Kleinere Abweichungen (in nativen Quote-Einheiten) werden ignoriert.
+            slippage_bps (int): Erlaubte Slippage in Basispunkten.
+            max_accounts (Optional[int]): Kontogrenze je Transaktion; Standard ist `MAX_RECENT_PRIORITY_FEE_ACCOUNTS`.
+            max_compute_units (int): Compute-Unit-Grenze je Transaktion.
+        """
+        self.client = client
+        self.router = router or client.router
+        self.quote_token_index = quote_token_index
+        self.min_trade_value = min_trade_value
+        self.slippage_bps = slippage_bps
+        self.max_accounts = max_accounts or client.MAX_RECENT_PRIORITY_FEE_ACCOUNTS
+        self.max_compute_units = max_compute_units
+
+    async def token_withdraw_ixs(
+        self,
+        group: Group,
+        mango_account: MangoAccount,
+        bank: Bank,
+        native_amount: int,
+        allow_borrow: bool = False,
+    ) -> List[TransactionInstruction]:
+        """
+        Erstellt die Anweisungen einer Abhebung wie `tokenWithdrawNativeIx` (TS).
+        """
+        token_account = self.client.pda_cache.get_associated_token_address(bank.mint, mango_account.owner)
+        pre_ixs = [await create_associated_token_account_idempotent_instruction(
+            payer=mango_account.owner,
+            owner=mango_account.owner,
+            mint=bank.mint,
+        )]
+        post_ixs = []
+        if bank.mint == NATIVE_MINT:
+            post_ixs.append(create_close_account_instruction(
+                account=token_account,
+                destination=mango_account.owner,
+                authority=mango_account.owner,
+            ))
+
+        health_remaining_accounts: List[PublicKey] = await self.client.accounts.build_health_remaining_accounts(
+            group,
+            [mango_account],
+            [bank],
+            [],
+        )
+        ix = await self.client.program.methods.token_withdraw(int(native_amount), allow_borrow).accounts({
+            'group': group.public_key,
+            'account': mango_account.public_key,
+            'owner': mango_account.owner,
+            'bank': bank.public_key,
+            'vault': bank.vault,
+            'oracle': bank.oracle,
+            'token_account': token_account,
+        }).remaining_accounts([
+            {"pubkey": pk, "is_signer": False, "is_writable": False} for pk in health_remaining_accounts
+        ]).instruction()
+        return pre_ixs + [ix] + post_ixs
+
+    async def _swap_action(
+        self,
+        group: Group,
+        mango_account: MangoAccount,
+        token_index: int,
+        net: float,
+        quote: SwapQuote,
+    ) -> RebalanceAction:
+        ixs, alts = await self.router.flash_loan_swap_ixs(group, mango_account, quote)
+        return RebalanceAction(
+            kind='swap',
+            token_index=token_index,
+            native_amount=net,
+            instructions=ixs,
+            address_lookup_tables=alts,
+            compute_units=REBALANCE_SWAP_CU,
+            quote=quote,
+        )
+
+    async def _withdraw_action(
+        self,
+        group: Group,
+        mango_account: MangoAccount,
+        token_index: int,
+        native_amount: float,
+    ) -> RebalanceAction:
+        bank = group.banks_map_by_token_index[token_index][0]
+        return RebalanceAction(
+            kind='withdraw',
+            token_index=token_index,
+            native_amount=native_amount,
+            instructions=await self.token_withdraw_ixs(group, mango_account, bank, int(native_amount)),
+            compute_units=REBALANCE_WITHDRAW_CU,
+        )
+
+    async def plan(
+        self,
+        group: Group,
+        mango_account_pk: PublicKey,
+        targets: Optional[Dict[int, float]] = None,
+        withdraws: Optional[Dict[int, float]] = None,
+    ) -> RebalancePlan:
+        """
+        Lädt das MangoAccount und plant die Swaps und Abhebungen.
+
+        Args:
+            group (Group): Die Gruppe.
+            mango_account_pk (PublicKey): Das MangoAccount des Liquidators.
+            targets (Optional[Dict[int, float]]): Native Zielsalden je Token-Index (Standard 0).
+            withdraws (Optional[Dict[int, float]]): Native Abhebungen je Token-Index.
+
+        Returns:
+            RebalancePlan: Der Plan; Tokens ohne Route oder unter `min_trade_value` stehen in `skipped`.
+        """
+        mango_account = await self.client.accounts.get_mango_account(mango_account_pk)
+        net_positions = compute_net_positions(group, mango_account, targets, self.quote_token_index)
+        quote_mint = group.banks_map_by_token_index[self.quote_token_index][0].mint
+        skipped: Dict[int, str] = {}
+
+        trades = []
+        for token_index, net in sorted(net_positions.items()):
+            bank = group.banks_map_by_token_index[token_index][0]
+            if abs(net) * bank.price < self.min_trade_value:
+                skipped[token_index] = 'below min_trade_value'
+                continue
+            trades.append((token_index, net, bank))
+
+        quotes = await asyncio.gather(*[
+            self.router.get_quote(bank.mint, quote_mint, int(net), self.slippage_bps, SwapMode.EXACT_IN)
+            if net > 0 else
+            self.router.get_quote(quote_mint, bank.mint, int(-net), self.slippage_bps, SwapMode.EXACT_OUT)
+            for token_index, net, bank in trades
+        ], return_exceptions=True)
+
+        swap_tasks = []
+        for (token_index, net, bank), quote in zip(trades, quotes):
+            if isinstance(quote, Exception):
+                logger.error(f"Error while fetching quote for token {token_index}: {quote}")
+                skipped[token_index] = f"quote failed: {quote}"
+            elif quote is None:
+                skipped[token_index] = 'no route'
+            else:
+                swap_tasks.append(self._swap_action(group, mango_account, token_index, net, quote))
+
+        swap_actions, withdraw_actions = await asyncio.gather(
+            asyncio.gather(*swap_tasks),
+            asyncio.gather(*[
+                self._withdraw_action(group, mango_account, token_index, amount)
+                for token_index, amount in sorted((withdraws or {}).items())
+                if amount > 0
+            ]),
+        )
+
+        transactions = (
+            pack_transactions(list(swap_actions), self.max_accounts, self.max_compute_units)
+            + pack_transactions(list(withdraw_actions), self.max_accounts, self.max_compute_units)
+        )
+        return RebalancePlan(
+            mango_account=mango_account,
+            net_positions=net_positions,
+            transactions=transactions,
+            skipped=skipped,
+        )
+
+    async def execute(self, group: Group, plan: RebalancePlan) -> List[MangoSignatureStatus]:
+        """
+        Sendet die Transaktionen eines Plans nacheinander über `send_and_confirm_transaction_for_group`.
+        """
+        statuses = []
+        for transaction in plan.transactions:
+            statuses.append(await self.client.send_and_confirm_transaction_for_group(
+                group,
+                [set_compute_unit_limit_ix(transaction.compute_units)] + transaction.instructions,
+                {'alts': list(group.address_lookup_tables_list) + transaction.address_lookup_tables},
+            ))
+        return statuses
+
+    async def rebalance(
+        self,
+        group: Group,
+        mango_account_pk: PublicKey,
+        targets: Optional[Dict[int, float]] = None,
+        withdraws: Optional[Dict[int, float]] = None,
+    ) -> List[MangoSignatureStatus]:
+        plan = await self.plan(group, mango_account_pk, targets, withdraws)
+        for token_index, reason in plan.skipped.items():
+            logger.info(f"Skipping token {token_index}: {reason}")
+        return await self.execute(group, plan)
@@ -0,0 +1,382 @@
+# mango_client_py/risk.py
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .types import Group, MangoAccount, HealthType
+from .health import HealthTables, weight_row
+
+# Obergrenze für Elemente pro Broadcast-Block (Szenarien x Konten x Token)
+RISK_GRID_BLOCK_ELEMENTS = 8_000_000
+
+# ----------------------------
+# Positionen als dichte Matrizen
+# ----------------------------
+
+@dataclass
+class PositionMatrix:
+    """
+    Dichte Positionsmatrizen vieler MangoAccounts.
+
+    Zeilen sind Konten, Spalten Token-Indizes bzw. Perp-Marktindizes bzw. Serum3-Märkte.
+    Token-Salden enthalten freie Serum3-Beträge, aber keinen Perp-PnL.
+    """
+    mango_accounts: List[MangoAccount]
+    token_balances: np.ndarray  # (A, T) nativ
+    perp_base_native: np.ndarray  # (A, M)
+    perp_quote_native: np.ndarray  # (A, M)
+    serum3_base_token_index: np.ndarray  # (K,)
+    serum3_quote_token_index: np.ndarray  # (K,)
+    serum3_reserved_base: np.ndarray  # (A, K)
+    serum3_reserved_quote: np.ndarray  # (A, K)
+
+    @classmethod
+    def from_mango_accounts(
+        cls,
+        group: Group,
+        mango_accounts: List[MangoAccount],
+        tables: Optional[HealthTables] = None,
+    ) -> 'PositionMatrix':
+        """
+        Baut die Matrizen aus den aktiven Positionen der MangoAccounts.
+
+        Args:
+            group (Group): Die geladene Gruppe.
+            mango_accounts (List[MangoAccount]): Die MangoAccounts.
+            tables (Optional[HealthTables]): Bereits gebaute Lookup-Tabellen der Gruppe.
+
+        Returns:
+            PositionMatrix: Die Matrizen.
+        """
+        tables = tables or HealthTables.from_group(group)
+        n_accounts = len(mango_accounts)
+        n_tokens = len(tables.token_known)
+        n_perps = len(tables.perp_known)
+
+        token_rows: List[tuple] = []
+        perp_rows: List[tuple] = []
+        serum3_rows: List[tuple] = []
+        serum3_columns: Dict[tuple, int] = {}
+        for a, mango_account in enumerate(mango_accounts):
+            for token in mango_account.tokens_active():
+                token_rows.append((a, token.token_index, token.indexed_position, 1.0))
+            for serum3 in mango_account.serum3_active():
+                token_rows.append((a, serum3.base_token_index, serum3.base_free_native, 0.0))
+                token_rows.append((a, serum3.quote_token_index, serum3.quote_free_native, 0.0))
+                column = serum3_columns.setdefault(
+                    (serum3.base_token_index, serum3.quote_token_index), len(serum3_columns)
+                )
+                serum3_rows.append((a, column, serum3.base_reserved_native, serum3.quote_reserved_native))
+            for perp in mango_account.perp_active():
+                perp_rows.append((a, perp.market_index, perp.base_position_lots, perp.quote_position_native))
+
+        token_balances = np.zeros((n_accounts, n_tokens))
+        if token_rows:
+            rows = np.array(token_rows, dtype=np.float64)
+            acc = rows[:, 0].astype(np.int64)
+            tok = rows[:, 1].astype(np.int64)
+            # Indizierte Positionen mit Deposit- bzw. Borrow-Index, freie Serum3-Beträge direkt
+            index = np.where(rows[:, 2] >= 0, tables.token_deposit_index[tok], tables.token_borrow_index[tok])
+            native = np.where(rows[:, 3] > 0, rows[:, 2] * index, rows[:, 2])
+            np.add.at(token_balances, (acc, tok), native)
+
+        perp_base_native = np.zeros((n_accounts, n_perps))
+        perp_quote_native = np.zeros((n_accounts, n_perps))
+        if perp_rows:
+            rows = np.array(perp_rows, dtype=np.float64)
+            acc = rows[:, 0].astype(np.int64)
+            market = rows[:, 1].astype(np.int64)
+            np.add.at(perp_base_native, (acc, market), rows[:, 2] * tables.perp_base_lot_size[market])
+            np.add.at(perp_quote_native, (acc, market), rows[:, 3])
+
+        n_serum3 = len(serum3_columns)
+        serum3_reserved_base = np.zeros((n_accounts, n_serum3))
+        serum3_reserved_quote = np.zeros((n_accounts, n_serum3))
+        if serum3_rows:
+            rows = np.array(serum3_rows, dtype=np.float64)
+            acc = rows[:, 0].astype(np.int64)
+            column = rows[:, 1].astype(np.int64)
+            np.add.at(serum3_reserved_base, (acc, column), rows[:, 2])
+            np.add.at(serum3_reserved_quote, (acc, column), rows[:, 3])
+        pairs = sorted(serum3_columns, key=serum3_columns.get)
+
+        return cls(
+            mango_accounts=list(mango_accounts),
+            token_balances=token_balances,
+            perp_base_native=perp_base_native,
+            perp_quote_native=perp_quote_native,
+            serum3_base_token_index=np.array([pair[0] for pair in pairs], dtype=np.int64),
+            serum3_quote_token_index=np.array([pair[1] for pair in pairs], dtype=np.int64),
+            serum3_reserved_base=serum3_reserved_base,
+            serum3_reserved_quote=serum3_reserved_quote,
+        )
+
+# ----------------------------
+# Szenarien
+# ----------------------------
+
+@dataclass
+class ShockGrid:
+    """
+    Preismultiplikatoren je Szenario für alle Token (S, T) und Perp-Märkte (S, M).
+    """
+    changes: np.ndarray  # (S,) relative Preisänderung, z.B. -0.4
+    shocked_token_index: np.ndarray  # (S,) geschocktes Token oder -1 für alle
+    token_multipliers: np.ndarray
+    perp_multipliers: np.ndarray
+
+    @staticmethod
+    def _stable_mask(group: Group, tables: HealthTables) -> np.ndarray:
+        stable = np.zeros(len(tables.token_known), dtype=bool)
+        for token_index, banks in group.banks_map_by_token_index.items():
+            if banks and 'USD' in banks[0].name:
+                stable[token_index] = True
+        return stable
+
+    @staticmethod
+    def _perp_base_token_index(group: Group, tables: HealthTables) -> np.ndarray:
+        # Zuordnung über den Namen, z.B. 'SOL-PERP' -> Bank 'SOL'
+        base = np.full(len(tables.perp_known), -1, dtype=np.int64)
+        for perp_market in group.perp_markets_map_by_market_index.values():
+            banks = group.get_banks_by_name(perp_market.name.split('-')[0])
+            if banks:
+                base[perp_market.market_index] = banks[0].token_index
+        return base
+
+    @classmethod
+    def uniform(
+        cls,
+        group: Group,
+        changes: Sequence[float],
+        tables: Optional[HealthTables] = None,
+    ) -> 'ShockGrid':
+        """
+        Verschiebt in jedem Szenario alle Nicht-Stablecoins und alle Perp-Märkte gleichzeitig, wie `buildGroupGrid` (TS).
+
+        Args:
+            group (Group): Die Gruppe.
+            changes (Sequence[float]): Relative Preisänderungen, z.B. `np.linspace(-0.5, 0.5, 21)`.
+            tables (Optional[HealthTables]): Bereits gebaute Lookup-Tabellen der Gruppe.
+
+        Returns:
+            ShockGrid: Das Szenario-Gitter.
+        """
+        tables = tables or HealthTables.from_group(group)
+        changes = np.asarray(changes, dtype=np.float64)
+        stable = cls._stable_mask(group, tables)
+        token_multipliers = np.where(stable[None, :], 1.0, 1.0 + changes[:, None])
+        perp_multipliers = np.broadcast_to(1.0 + changes[:, None], (len(changes), len(tables.perp_known))).copy()
+        return cls(
+            changes=changes,
+            shocked_token_index=np.full(len(changes), -1, dtype=np.int64),
+            token_multipliers=token_multipliers,
+            perp_multipliers=perp_multipliers,
+        )
+
+    @classmethod
+    def per_token(
+        cls,
+        group: Group,
+        changes: Sequence[float],
+        tables: Optional[HealthTables] = None,
+    ) -> 'ShockGrid':
+        """
+        Verschiebt je Szenario genau ein Nicht-Stablecoin-Token (und die Perp-Märkte mit diesem Basis-Token).
+
+        Die Szenarien sind nach Token und dann nach Änderung geordnet.
+        """
+        tables = tables or HealthTables.from_group(group)
+        changes = np.asarray(changes, dtype=np.float64)
+        stable = cls._stable_mask(group, tables)
+        tokens = np.flatnonzero(tables.token_known & ~stable)
+        perp_base = cls._perp_base_token_index(group, tables)
+
+        scenario_tokens = np.repeat(tokens, len(changes))
+        scenario_changes = np.tile(changes, len(tokens))
+        n_tokens = len(tables.token_known)
+        token_multipliers = np.ones((len(scenario_tokens), n_tokens))
+        token_multipliers[np.arange(len(scenario_tokens)), scenario_tokens] += scenario_changes
+        perp_multipliers = np.where(
+            perp_base[None, :] == scenario_tokens[:, None], 1.0 + scenario_changes[:, None], 1.0
+        )
+        return cls(
+            changes=scenario_changes,
+            shocked_token_index=scenario_tokens,
+            token_multipliers=token_multipliers,
+            perp_multipliers=perp_multipliers,
+        )
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+# ----------------------------
+# Risiko-Statistiken
+# ----------------------------
+
+@dataclass
+class RiskGrid:
+    """
+    Ergebnis von `compute_risk_grid`; Beträge in nativen Quote-Einheiten.
+    """
+    grid: ShockGrid
+    equity: np.ndarray  # (S, A)
+    health: np.ndarray  # (S, A)
+    liquidatable: np.ndarray  # (S, A) bool
+    total_equity: np.ndarray  # (S,)
+    liquidatable_count: np.ndarray  # (S,)
+    liquidatable_equity: np.ndarray  # (S,)
+    liquidatable_assets: np.ndarray  # (S, T) Wert der Einlagen liquidierbarer Konten
+    liquidatable_liabs: np.ndarray  # (S, T) Wert der Kredite liquidierbarer Konten
+
+
+def compute_risk_grid(
+    group: Group,
+    mango_accounts: List[MangoAccount],
+    grid: ShockGrid,
+    health_type: HealthType = HealthType.MAINT,
+    tables: Optional[HealthTables] = None,
+    positions: Optional[PositionMatrix] = None,
+) -> RiskGrid:
+    """
+    Berechnet Equity und Health aller Konten unter allen Preisschocks als Broadcast (Szenarien x Konten x Token).
+
+    Entspricht der Auswertung von `buildGroupGrid`/`getRiskStats` in `risk.ts`,
+    aber ohne die Gruppe je Szenario zu kopieren. Die Konten werden in Blöcken
+    verarbeitet, damit ein Broadcast höchstens `RISK_GRID_BLOCK_ELEMENTS` Elemente umfasst.
+
+    Args:
+        group (Group): Die geladene Gruppe.
+        mango_accounts (List[MangoAccount]): Die MangoAccounts.
+        grid (ShockGrid): Die Preisschocks.
+        health_type (HealthType): Der Health-Typ für die Liquidierbarkeit.
+        tables (Optional[HealthTables]): Bereits gebaute Lookup-Tabellen der Gruppe.
+        positions (Optional[PositionMatrix]): Bereits gebaute Positionsmatrizen.
+
+    Returns:
+        RiskGrid: Die Kennzahlen je Szenario.
+    """
+    tables = tables or HealthTables.from_group(group)
+    positions = positions or PositionMatrix.from_mango_accounts(group, mango_accounts, tables)
+    row = weight_row(health_type)
+
+    token_prices = tables.token_prices[None, :] * grid.token_multipliers  # (S, T)
+    perp_prices = tables.perp_prices[None, :] * grid.perp_multipliers  # (S, M)
+    token_aw = tables.token_asset_weights[row]
+    token_lw = tables.token_liab_weights[row]
+
+    n_scenarios = len(grid)
+    n_accounts, n_tokens = positions.token_balances.shape
+    n_perps = positions.perp_base_native.shape[1]
+
+    # Perp-PnL wird im Settle-Token verbucht
+    settle_onehot = np.zeros((n_perps, n_tokens))
+    if n_perps:
+        settle_onehot[np.arange(n_perps), tables.perp_settle_token_index[:n_perps]] = 1.0
+    safe_token_prices = np.where(token_prices > 0, token_prices, 1.0)
+
+    s_base = positions.serum3_base_token_index
+    s_quote = positions.serum3_quote_token_index
+
+    equity = np.zeros((n_scenarios, n_accounts))
+    health = np.zeros((n_scenarios, n_accounts))
+    liquidatable_assets = np.zeros((n_scenarios, n_tokens))
+    liquidatable_liabs = np.zeros((n_scenarios, n_tokens))
+
+    block = max(1, RISK_GRID_BLOCK_ELEMENTS // max(n_scenarios * max(n_tokens, n_perps, 1), 1))
+    for start in range(0, n_accounts, block):
+        sl = slice(start, start + block)
+        balances = positions.token_balances[sl]  # (a, T)
+        base = positions.perp_base_native[sl]
+        quote = positions.perp_quote_native[sl]
+
+        # Perp-PnL (S, a, M)
+        base_value = base[None, :, :] * perp_prices[:, None, :]
+        pnl = quote[None, :, :] + base_value
+        weighted = quote[None, :, :] + np.where(
+            base_value > 0,
+            base_value * tables.perp_base_asset_weights[row][None, None, :],
+            base_value * tables.perp_base_liab_weights[row][None, None, :],
+        )
+        weighted = np.where(weighted > 0, weighted * tables.perp_overall_asset_weights[row][None, None, :], weighted)
+
+        # Token-Werte (S, a, T)
+        values = balances[None, :, :] * token_prices[:, None, :]
+        health_values = values + np.einsum('sam,mt->sat', weighted, settle_onehot) / safe_token_prices[:, None, :] * token_prices[:, None, :]
+        contribs = np.where(health_values > 0, health_values * token_aw, health_values * token_lw)
+
+        # Reservierte Serum3-Beträge (S, a, K)
+        reserved_value = (
+            positions.serum3_reserved_base[sl][None, :, :] * token_prices[:, None, s_base]
+            + positions.serum3_reserved_quote[sl][None, :, :] * token_prices[:, None, s_quote]
+        )
+        reserved_contrib = np.minimum(reserved_value * token_aw[s_base], reserved_value * token_aw[s_quote])
+
+        equity[:, sl] = values.sum(axis=2) + pnl.sum(axis=2) + reserved_value.sum(axis=2)
+        health[:, sl] = contribs.sum(axis=2) + reserved_contrib.sum(axis=2)
+
+        liq = (health[:, sl] < 0)[:, :, None]
+        liquidatable_assets += np.where(liq & (values > 0), values, 0.0).sum(axis=1)
+        liquidatable_liabs += np.where(liq & (values < 0), -values, 0.0).sum(axis=1)
+
+    liquidatable = health < 0
+    return RiskGrid(
+        grid=grid,
+        equity=equity,
+        health=health,
+        liquidatable=liquidatable,
+        total_equity=equity.sum(axis=1),
+        liquidatable_count=liquidatable.sum(axis=1),
+        liquidatable_equity=np.where(liquidatable, equity, 0.0).sum(axis=1),
+        liquidatable_assets=liquidatable_assets,
+        liquidatable_liabs=liquidatable_liabs,
+    )
+
+
+def get_risk_stats(
+    group: Group,
+    mango_accounts: List[MangoAccount],
+    change: float = 0.4,
+    health_type: HealthType = HealthType.MAINT,
+) -> Dict[str, RiskGrid]:
+    """
+    Simuliert wie `getRiskStats` (TS) einen Kursanstieg und -einbruch um `change` für alle Nicht-Stablecoins und Perp-Märkte.
+
+    Args:
+        group (Group): Die geladene Gruppe.
+        mango_accounts (List[MangoAccount]): Die MangoAccounts.
+        change (float): Relative Preisänderung, standardmäßig 40%.
+        health_type (HealthType): Der Health-Typ für die Liquidierbarkeit.
+
+    Returns:
+        Dict[str, RiskGrid]: 'asset_drop' und 'asset_rally' als je ein Szenario.
+    """
+    tables = HealthTables.from_group(group)
+    positions = PositionMatrix.from_mango_accounts(group, mango_accounts, tables)
+    grid = ShockGrid.uniform(group, [-change, change], tables)
+    result = compute_risk_grid(group, mango_accounts, grid, health_type, tables, positions)
+    return {
+        'asset_drop': _select_scenarios(result, [0]),
+        'asset_rally': _select_scenarios(result, [1]),
+    }
+
+
+def _select_scenarios(result: RiskGrid, scenarios: List[int]) -> RiskGrid:
+    grid = result.grid
+    return RiskGrid(
+        grid=ShockGrid(
+            changes=grid.changes[scenarios],
+            shocked_token_index=grid.shocked_token_index[scenarios],
+            token_multipliers=grid.token_multipliers[scenarios],
+            perp_multipliers=grid.perp_multipliers[scenarios],
+        ),
+        equity=result.equity[scenarios],
+        health=result.health[scenarios],
+        liquidatable=result.liquidatable[scenarios],
+        total_equity=result.total_equity[scenarios],
+        liquidatable_count=result.liquidatable_count[scenarios],
+        liquidatable_equity=result.liquidatable_equity[scenarios],
+        liquidatable_assets=result.liquidatable_assets[scenarios],
+        liquidatable_liabs=result.liquidatable_liabs[scenarios],
+    )
@@ -0,0 +1,565 @@
+# mango_client_py/router.py
+
+import asyncio
+import base64
+import json
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from solana.publickey import PublicKey
+from solana.transaction import AccountMeta, TransactionInstruction
+
+from .types import FlashLoanType, Group, MangoAccount, MangoSignatureStatus
+from .utils import create_associated_token_account_idempotent_instruction
+
+if TYPE_CHECKING:
+    from .client import MangoClient
+
+logger = logging.getLogger(__name__)
+
+JUPITER_QUOTE_API_URL = 'https://quote-api.jup.ag/v6'
+SYSVAR_INSTRUCTIONS_PUBKEY = PublicKey('Sysvar1nstructions1111111111111111111111111')
+
+# ----------------------------
+# Quotes
+# ----------------------------
+
+class SwapMode(Enum):
+    EXACT_IN = 'ExactIn'
+    EXACT_OUT = 'ExactOut'
+
+
+@dataclass
+class SwapQuote:
+    """
+    Ein Swap-Quote in nativen Einheiten, wie `RouteInfo` in `router.ts` (TS).
+
+    `instructions` und `address_lookup_tables` sind nur bei Anbietern gesetzt, die die
+    Swap-Anweisungen direkt mit dem Quote liefern (z.B. aufgezeichnete Quotes).
+    """
+    input_mint: PublicKey
+    output_mint: PublicKey
+    in_amount: int
+    out_amount: int
+    swap_mode: SwapMode = SwapMode.EXACT_IN
+    slippage_bps: int = 50
+    other_amount_threshold: int = 0
+    price_impact_pct: float = 0.0
+    provider: str = ''
+    instructions: List[TransactionInstruction] = field(default_factory=list)
+    address_lookup_tables: List[PublicKey] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'input_mint': self.input_mint.to_base58(),
+            'output_mint': self.output_mint.to_base58(),
+            'in_amount': self.in_amount,
+            'out_amount': self.out_amount,
+            'swap_mode': self.swap_mode.value,
+            'slippage_bps': self.slippage_bps,
+            'other_amount_threshold': self.other_amount_threshold,
+            'price_impact_pct': self.price_impact_pct,
+            'provider': self.provider,
+            'instructions': [instruction_to_json(ix) for ix in self.instructions],
+            'address_lookup_tables': [alt.to_base58() for alt in self.address_lookup_tables],
+            'raw': self.raw,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SwapQuote':
+        return cls(
+            input_mint=PublicKey(data['input_mint']),
+            output_mint=PublicKey(data['output_mint']),
+            in_amount=int(data['in_amount']),
+            out_amount=int(data['out_amount']),
+            swap_mode=SwapMode(data.get('swap_mode', SwapMode.EXACT_IN.value)),
+            slippage_bps=int(data.get('slippage_bps', 50)),
+            other_amount_threshold=int(data.get('other_amount_threshold', 0)),
+            price_impact_pct=float(data.get('price_impact_pct', 0.0)),
+            provider=data.get('provider', ''),
+            instructions=[instruction_from_json(ix) for ix in data.get('instructions', [])],
+            address_lookup_tables=[PublicKey(alt) for alt in data.get('address_lookup_tables', [])],
+            raw=data.get('raw', {}),
+        )
+
+
+def instruction_from_json(data: Dict[str, Any]) -> TransactionInstruction:
+    """
+    Dekodiert eine Anweisung im JSON-Format der Jupiter-API (`programId`, `accounts`, `data` in Base64).
+    """
+    return TransactionInstruction(
+        keys=[
+            AccountMeta(pubkey=PublicKey(key['pubkey']), is_signer=key['isSigner'], is_writable=key['isWritable'])
+            for key in data['accounts']
+        ],
+        program_id=PublicKey(data['programId']),
+        data=base64.b64decode(data['data']),
+    )
+
+
+def instruction_to_json(ix: TransactionInstruction) -> Dict[str, Any]:
+    return {
+        'programId': ix.program_id.to_base58(),
+        'accounts': [
+            {'pubkey': key.pubkey.to_base58(), 'isSigner': key.is_signer, 'isWritable': key.is_writable}
+            for key in ix.keys
+        ],
+        'data': base64.b64encode(bytes(ix.data)).decode(),
+    }
+
+# ----------------------------
+# Quote-Anbieter
+# ----------------------------
+
+class QuoteProvider(ABC):
+    """
+    Schnittstelle für Quote-Anbieter des `SwapRouter`.
+    """
+    name = 'base'
+
+    @abstractmethod
+    async def get_quote(
+        self,
+        input_mint: PublicKey,
+        output_mint: PublicKey,
+        amount: int,
+        slippage_bps: int = 50,
+        swap_mode: SwapMode = SwapMode.EXACT_IN,
+    ) -> Optional[SwapQuote]:
+        """
+        Gibt den besten Quote zurück, oder None, falls keine Route existiert.
+        """
+
+    async def get_swap_instructions(
+        self,
+        quote: SwapQuote,
+        user: PublicKey,
+    ) -> Tuple[List[TransactionInstruction], List[PublicKey]]:
+        """
+        Gibt die Swap-Anweisungen und Address-Lookup-Tables für einen Quote zurück.
+        """
+        return quote.instructions, quote.address_lookup_tables
+
+
+class JupiterQuoteProvider(QuoteProvider):
+    """
+    Quotes und Swap-Anweisungen über die Jupiter-Quote-API (`/quote`, `/swap-instructions`).
+    """
+    name = 'jupiter'
+
+    # Diese Anweisungen setzt der MangoClient selbst
+    SKIPPED_PROGRAM_IDS = {
+        'ComputeBudget111111111111111111111111111111',
+    }
+
+    def __init__(self, api_url: str = JUPITER_QUOTE_API_URL, timeout_seconds: float = 10.0):
+        self.api_url = api_url
+        self.timeout_seconds = timeout_seconds
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        import requests
+
+        def send() -> Any:
+            response = requests.request(method, f"{self.api_url}{path}", timeout=self.timeout_seconds, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        return await asyncio.to_thread(send)
+
+    async def get_quote(
+        self,
+        input_mint: PublicKey,
+        output_mint: PublicKey,
+        amount: int,
+        slippage_bps: int = 50,
+        swap_mode: SwapMode = SwapMode.EXACT_IN,
+    ) -> Optional[SwapQuote]:
+        data = await self._request('GET', '/quote', params={
+            'inputMint': input_mint.to_base58(),
+            'outputMint': output_mint.to_base58(),
+            'amount': str(int(amount)),
+            'slippageBps': str(slippage_bps),
+            'swapMode': swap_mode.value,
+        })
+        if not data or 'inAmount' not in data:
+            return None
+        return SwapQuote(
+            input_mint=input_mint,
+            output_mint=output_mint,
+            in_amount=int(data['inAmount']),
+            out_amount=int(data['outAmount']),
+            swap_mode=swap_mode,
+            slippage_bps=slippage_bps,
+            other_amount_threshold=int(data.get('otherAmountThreshold', 0)),
+            price_impact_pct=float(data.get('priceImpactPct', 0.0)),
+            provider=self.name,
+            raw=data,
+            fetched_at=time.time(),
+        )
+
+    async def get_swap_instructions(
+        self,
+        quote: SwapQuote,
+        user: PublicKey,
+    ) -> Tuple[List[TransactionInstruction], List[PublicKey]]:
+        if quote.instructions:
+            return quote.instructions, quote.address_lookup_tables
+        data = await self._request('POST', '/swap-instructions', json={
+            'quoteResponse': quote.raw,
+            'userPublicKey': user.to_base58(),
+            'wrapAndUnwrapSol': False,
+        })
+        ixs = [
+            instruction_from_json(ix)
+            for ix in data.get('setupInstructions', []) + [data['swapInstruction']]
+            if ix['programId'] not in self.SKIPPED_PROGRAM_IDS
+        ]
+        return ixs, [PublicKey(alt) for alt in data.get('addressLookupTableAddresses', [])]
+
+
+class RecordedQuoteProvider(QuoteProvider):
+    """
+    Lokaler Ersatz für einen Quote-Anbieter, der aufgezeichnete Quotes ausliefert (z.B. für Tests und Simulationen).
+
+    Für eine Anfrage wird der aufgezeichnete Quote desselben Paars mit der nächstgelegenen
+    Menge gewählt und linear auf die angefragte Menge skaliert. Ist `fallback` gesetzt,
+    werden fehlende Paare dort abgefragt und aufgezeichnet.
+    """
+    name = 'recorded'
+
+    def __init__(self, quotes: Optional[List[SwapQuote]] = None, fallback: Optional[QuoteProvider] = None):
+        self.fallback = fallback
+        self._quotes: Dict[Tuple[str, str, SwapMode], List[SwapQuote]] = {}
+        for quote in quotes or []:
+            self.record(quote)
+
+    @classmethod
+    def from_file(cls, path: str, fallback: Optional[QuoteProvider] = None) -> 'RecordedQuoteProvider':
+        with open(path, 'r') as f:
+            return cls([SwapQuote.from_dict(record) for record in json.load(f)], fallback)
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump([quote.to_dict() for quote in self.quotes()], f)
+
+    def quotes(self) -> List[SwapQuote]:
+        return [quote for quotes in self._quotes.values() for quote in quotes]
+
+    def record(self, quote: SwapQuote) -> None:
+        key = (quote.input_mint.to_base58(), quote.output_mint.to_base58(), quote.swap_mode)
+        self._quotes.setdefault(key, []).append(quote)
+
+    async def get_quote(
+        self,
+        input_mint: PublicKey,
+        output_mint: PublicKey,
+        amount: int,
+        slippage_bps: int = 50,
+        swap_mode: SwapMode = SwapMode.EXACT_IN,
+    ) -> Optional[SwapQuote]:
+        recorded = self._quotes.get((input_mint.to_base58(), output_mint.to_base58(), swap_mode))
+        if not recorded:
+            if self.fallback is None:
+                return None
+            quote = await self.fallback.get_quote(input_mint, output_mint, amount, slippage_bps, swap_mode)
+            if quote is not None:
+                self.record(quote)
+            return quote
+
+        exact_in = swap_mode == SwapMode.EXACT_IN
+        nearest = min(
+            recorded,
+            key=lambda quote: abs(math.log(max(amount, 1) / max(quote.in_amount if exact_in else quote.out_amount, 1))),
+        )
+        if exact_in:
+            scale = amount / nearest.in_amount if nearest.in_amount else 0.0
+            in_amount, out_amount = int(amount), int(nearest.out_amount * scale)
+        else:
+            scale = amount / nearest.out_amount if nearest.out_amount else 0.0
+            in_amount, out_amount = int(math.ceil(nearest.in_amount * scale)), int(amount)
+        # Bei ExactOut ist der Schwellwert die maximale Input-Menge und wird aufgerundet
+        other_amount_threshold = nearest.other_amount_threshold * scale
+        return SwapQuote(
+            input_mint=input_mint,
+            output_mint=output_mint,
+            in_amount=in_amount,
+            out_amount=out_amount,
+            swap_mode=swap_mode,
+            slippage_bps=slippage_bps,
+            other_amount_threshold=int(other_amount_threshold if exact_in else math.ceil(other_amount_threshold)),
+            price_impact_pct=nearest.price_impact_pct,
+            provider=self.name,
+            instructions=nearest.instructions if scale == 1.0 else [],
+            address_lookup_tables=nearest.address_lookup_tables,
+            raw=nearest.raw,
+            fetched_at=time.time(),
+        )
+
+    async def get_swap_instructions(
+        self,
+        quote: SwapQuote,
+        user: PublicKey,
+    ) -> Tuple[List[TransactionInstruction], List[PublicKey]]:
+        if not quote.instructions:
+            if self.fallback is None:
+                # Skalierte Quotes haben keine Anweisungen; ein Flash-Loan ohne Swap darf nicht entstehen
+                raise ValueError(
+                    f"Recorded quote {quote.input_mint} -> {quote.output_mint} has no swap instructions and no fallback provider is set"
+                )
+            return await self.fallback.get_swap_instructions(quote, user)
+        return quote.instructions, quote.address_lookup_tables
+
+# ----------------------------
+# Quote-Cache
+# ----------------------------
+
+class QuoteCache:
+    """
+    LRU-Cache für Quotes mit kurzer TTL, geschlüsselt nach (Input-Mint, Output-Mint, Mengen-Bucket).
+
+    Mengen werden logarithmisch in Buckets der relativen Breite `amount_bucket_pct`
+    eingeteilt; nahezu gleiche Anfragen teilen sich so einen Quote. Die Menge des
+    gelieferten Quotes kann daher innerhalb des Buckets von der Anfrage abweichen.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, amount_bucket_pct: float = 0.5, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.amount_bucket_pct = amount_bucket_pct
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Tuple[Any, ...], SwapQuote]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def amount_bucket(self, amount: int) -> int:
+        if amount <= 0:
+            return -1
+        return int(math.floor(math.log(amount) / math.log1p(self.amount_bucket_pct / 100)))
+
+    def key(
+        self,
+        input_mint: PublicKey,
+        output_mint: PublicKey,
+        amount: int,
+        slippage_bps: int,
+        swap_mode: SwapMode,
+    ) -> Tuple[Any, ...]:
+        return (input_mint.to_base58(), output_mint.to_base58(), self.amount_bucket(amount), slippage_bps, swap_mode)
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[SwapQuote]:
+        quote = self._entries.get(key)
+        if quote is None or time.time() - quote.fetched_at > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return quote
+
+    def put(self, key: Tuple[Any, ...], quote: SwapQuote) -> None:
+        self._entries[key] = quote
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+# ----------------------------
+# Router
+# ----------------------------
+
+class SwapRouter:
+    """
+    Baut Flash-Loan-Swaps (`flash_loan_begin` / Swap / `flash_loan_end_v2`) wie `marginTrade` (TS).
+
+    Gleichzeitige Anfragen mit demselben Cache-Schlüssel teilen sich einen Aufruf des
+    Quote-Anbieters.
+    """
+
+    def __init__(
+        self,
+        client: 'MangoClient',
+        quote_provider: Optional[QuoteProvider] = None,
+        cache_ttl_seconds: float = 5.0,
+        amount_bucket_pct: float = 0.5,
+    ):
+        self.client = client
+        self.quote_provider = quote_provider or JupiterQuoteProvider()
+        self.cache = QuoteCache(cache_ttl_seconds, amount_bucket_pct)
+        self._in_flight: Dict[Tuple[Any, ...], 'asyncio.Future[Optional[SwapQuote]]'] = {}
+
+    async def get_quote(
+        self,
+        input_mint: PublicKey,
+        output_mint: PublicKey,
+        amount: int,
+        slippage_bps: int = 50,
+        swap_mode: SwapMode = SwapMode.EXACT_IN,
+        use_cache: bool = True,
+    ) -> Optional[SwapQuote]:
+        """
+        Gibt einen Quote für eine native Menge zurück, bevorzugt aus dem Cache.
+
+        Args:
+            input_mint (PublicKey): Mint des verkauften Tokens.
+            output_mint (PublicKey): Mint des gekauften Tokens.
+            amount (int): Native Input- (ExactIn) bzw. Output-Menge (ExactOut).
+            slippage_bps (int): Erlaubte Slippage in Basispunkten.
+            swap_mode (SwapMode): ExactIn oder ExactOut.
+            use_cache (bool): False erzwingt einen neuen Quote.
+
+        Returns:
+            Optional[SwapQuote]: Der Quote, oder None ohne Route.
+        """
+        key = self.cache.key(input_mint, output_mint, amount, slippage_bps, swap_mode)
+        if use_cache:
+            quote = self.cache.get(key)
+            if quote is not None:
+                return quote
+            pending = self._in_flight.get(key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+
+        future: 'asyncio.Future[Optional[SwapQuote]]' = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            quote = await self.quote_provider.get_quote(input_mint, output_mint, amount, slippage_bps, swap_mode)
+            if quote is not None:
+                quote.fetched_at = quote.fetched_at or time.time()
+                self.cache.put(key, quote)
+            future.set_result(quote)
+            return quote
+        except Exception as e:
+            future.set_exception(e)
+            # Wartende erhalten die Exception; hier nur als abgerufen markieren
+            future.exception()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    async def _account_exists(self, pk: PublicKey) -> bool:
+        account_info = await self.client.connection.get_account_info(pk)
+        return account_info['result']['value'] is not None
+
+    async def flash_loan_swap_ixs(
+        self,
+        group: Group,
+        mango_account: MangoAccount,
+        quote: SwapQuote,
+        flash_loan_type: FlashLoanType = FlashLoanType.SWAP,
+        sequence_check: bool = False,
+    ) -> Tuple[List[TransactionInstruction], List[PublicKey]]:
+        """
+        Baut die Anweisungen eines Flash-Loan-Swaps für einen Quote.
+
+        Die Flash-Loan-Menge ist `quote.in_amount`, bei ExactOut `quote.other_amount_threshold`
+        (die maximale Input-Menge inklusive Slippage); die Swap-Anweisungen liefert der Quote-Anbieter.
+
+        Args:
+            group (Group): Die Gruppe.
+            mango_account (MangoAccount): Das handelnde MangoAccount.
+            quote (SwapQuote): Der Quote.
+            flash_loan_type (FlashLoanType): SWAP, damit der Vorgang als Swap verbucht wird.
+            sequence_check (bool): Ob eine `sequence_check`-Anweisung vorangestellt wird.
+
+        Returns:
+            Tuple[List[TransactionInstruction], List[PublicKey]]: Anweisungen und zusätzliche Address-Lookup-Tables.
+        """
+        wallet_pk = self.client.wallet_pk
+        swap_executing_wallet = mango_account.delegate if wallet_pk == mango_account.delegate else mango_account.owner
+        input_bank = group.get_first_bank_by_mint(quote.input_mint)
+        output_bank = group.get_first_bank_by_mint(quote.output_mint)
+
+        input_ata = self.client.pda_cache.get_associated_token_address(input_bank.mint, swap_executing_wallet)
+        output_ata = self.client.pda_cache.get_associated_token_address(output_bank.mint, swap_executing_wallet)
+        (swap_ixs, swap_alts), input_ata_exists, output_ata_exists, health_remaining_accounts = await asyncio.gather(
+            self.quote_provider.get_swap_instructions(quote, swap_executing_wallet),
+            self._account_exists(input_ata),
+            self._account_exists(output_ata),
+            self.client.accounts.build_health_remaining_accounts(group, [mango_account], [input_bank, output_bank], []),
+        )
+
+        if not swap_ixs:
+            raise ValueError(f"No swap instructions for quote {quote.input_mint} -> {quote.output_mint} from {quote.provider}")
+
+        pre_ixs: List[TransactionInstruction] = []
+        for exists, bank in ((input_ata_exists, input_bank), (output_ata_exists, output_bank)):
+            if not exists:
+                pre_ixs.append(await create_associated_token_account_idempotent_instruction(
+                    payer=swap_executing_wallet,
+                    owner=swap_executing_wallet,
+                    mint=bank.mint,
+                ))
+        if sequence_check:
+            pre_ixs.append(await self.client.accounts.sequence_check_ix(group, mango_account))
+
+        borrow_amount = max(quote.in_amount, quote.other_amount_threshold) if quote.swap_mode == SwapMode.EXACT_OUT else quote.in_amount
+        flash_loan_begin_ix = await self.client.program.methods.flash_loan_begin([
+            int(borrow_amount),
+            0,  # Der Kredit des Output-Tokens wird nicht benötigt
+        ]).accounts({
+            'account': mango_account.public_key,
+            'owner': wallet_pk,
+            'instructions': SYSVAR_INSTRUCTIONS_PUBKEY,
+        }).remaining_accounts([
+            {"pubkey": input_bank.public_key, "is_signer": False, "is_writable": True},
+            {"pubkey": output_bank.public_key, "is_signer": False, "is_writable": True},
+            {"pubkey": input_bank.vault, "is_signer": False, "is_writable": True},
+            {"pubkey": output_bank.vault, "is_signer": False, "is_writable": True},
+            {"pubkey": input_ata, "is_signer": False, "is_writable": True},
+            {"pubkey": output_ata, "is_signer": False, "is_writable": False},
+            {"pubkey": group.public_key, "is_signer": False, "is_writable": False},
+        ]).instruction()
+
+        flash_loan_end_ix = await self.client.program.methods.flash_loan_end_v2(2, flash_loan_type).accounts({
+            'account': mango_account.public_key,
+            'owner': wallet_pk,
+        }).remaining_accounts([
+            {"pubkey": pk, "is_signer": False, "is_writable": False} for pk in health_remaining_accounts
+        ] + [
+            {"pubkey": input_bank.vault, "is_signer": False, "is_writable": True},
+            {"pubkey": output_bank.vault, "is_signer": False, "is_writable": True},
+            {"pubkey": input_ata, "is_signer": False, "is_writable": True},
+            {"pubkey": output_ata, "is_signer": False, "is_writable": True},
+            {"pubkey": group.public_key, "is_signer": False, "is_writable": False},
+        ]).instruction()
+
+        return pre_ixs + [flash_loan_begin_ix] + swap_ixs + [flash_loan_end_ix], swap_alts
+
+    async def swap(
+        self,
+        group: Group,
+        mango_account: MangoAccount,
+        input_mint: PublicKey,
+        output_mint: PublicKey,
+        amount: int,
+        slippage_bps: int = 50,
+        swap_mode: SwapMode = SwapMode.EXACT_IN,
+        flash_loan_type: FlashLoanType = FlashLoanType.SWAP,
+        sequence_check: bool = False,
+    ) -> MangoSignatureStatus:
+        """
+        Holt einen Quote und sendet den Flash-Loan-Swap.
+
+        Returns:
+            MangoSignatureStatus: Der Status der Transaktion.
+        """
+        quote = await self.get_quote(input_mint, output_mint, amount, slippage_bps, swap_mode)
+        if quote is None:
+            raise ValueError(f"No route found for {input_mint} -> {output_mint}!")
+        ixs, alts = await self.flash_loan_swap_ixs(group, mango_account, quote, flash_loan_type, sequence_check)
+        return await self.client.send_and_confirm_transaction_for_group(
+            group,
+            ixs,
+            {'alts': list(group.address_lookup_tables_list) + alts},
+        )
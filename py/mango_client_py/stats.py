@@ -0,0 +1,228 @@
+# mango_client_py/stats.py
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .types import Group, MangoAccount
+from .health import HealthTables
+from .risk import PositionMatrix
+
+# ----------------------------
+# Tabellen
+# ----------------------------
+
+class StatsTable:
+    """
+    Schlanke, spaltenorientierte Tabelle (DataFrame-ähnlich) ohne pandas-Abhängigkeit.
+
+    Alle Spalten sind gleich lange NumPy-Arrays; `top` verwendet eine partielle
+    Sortierung (`np.argpartition`), sodass nur die ersten N Zeilen sortiert werden.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('All columns must have the same length')
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self._columns[column]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._columns
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def take(self, rows: Any) -> 'StatsTable':
+        """
+        Gibt eine neue Tabelle mit den ausgewählten Zeilen (Indizes oder Bool-Maske) zurück.
+        """
+        return StatsTable({name: values[rows] for name, values in self._columns.items()})
+
+    def filter(self, mask: np.ndarray) -> 'StatsTable':
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def top(self, column: str, n: int, ascending: bool = False, key: Optional[str] = None) -> 'StatsTable':
+        """
+        Gibt die N Zeilen mit den größten (oder kleinsten) Werten einer Spalte zurück.
+
+        Args:
+            column (str): Die Sortierspalte.
+            n (int): Anzahl der Zeilen.
+            ascending (bool): True für die kleinsten Werte.
+            key (Optional[str]): 'abs' sortiert nach dem Betrag.
+
+        Returns:
+            StatsTable: Die sortierten Zeilen.
+        """
+        values = self._columns[column].astype(np.float64)
+        if key == 'abs':
+            values = np.abs(values)
+        if not ascending:
+            values = -values
+        n = min(n, len(values))
+        if n <= 0:
+            return self.take(np.array([], dtype=np.int64))
+        candidates = np.argpartition(values, n - 1)[:n] if n < len(values) else np.arange(len(values))
+        return self.take(candidates[np.argsort(values[candidates], kind='stable')])
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        names = self.columns
+        return [dict(zip(names, row)) for row in zip(*(self._columns[name].tolist() for name in names))]
+
+    def to_pandas(self) -> Any:
+        """
+        Wandelt die Tabelle in einen pandas DataFrame um (pandas muss installiert sein).
+        """
+        import pandas as pd
+        return pd.DataFrame(self._columns)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_records())
+
+    def __repr__(self) -> str:
+        return f"StatsTable(rows={len(self)}, columns={self.columns})"
+
+# ----------------------------
+# Kennzahlen je Konto
+# ----------------------------
+
+def _public_keys(mango_accounts: Sequence[MangoAccount]) -> np.ndarray:
+    return np.array([mango_account.public_key.to_base58() for mango_account in mango_accounts], dtype=object)
+
+
+def perp_position_stats(
+    group: Group,
+    mango_accounts: List[MangoAccount],
+    tables: Optional[HealthTables] = None,
+) -> StatsTable:
+    """
+    Gibt eine Zeile je aktiver Perp-Position aller Konten zurück.
+
+    Spalten: account (Zeilenindex in `mango_accounts`), mango_account, market_index,
+    base_native, notional, unsettled_pnl, unrealized_pnl, realized_pnl (native Quote-Einheiten).
+    Der unrealisierte PnL folgt `getUnRealizedPnlUi` (TS): Basisposition mal
+    Abstand zum durchschnittlichen Einstiegspreis.
+    """
+    tables = tables or HealthTables.from_group(group)
+    rows = [
+        (a, perp.market_index, perp.base_position_lots, perp.quote_position_native,
+         perp.quote_entry_native, perp.realized_pnl_for_position_native)
+        for a, mango_account in enumerate(mango_accounts)
+        for perp in mango_account.perp_active()
+    ]
+    data = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    account = data[:, 0].astype(np.int64)
+    market = data[:, 1].astype(np.int64)
+    base_native = data[:, 2] * tables.perp_base_lot_size[market]
+    base_value = base_native * tables.perp_prices[market]
+    keys = _public_keys(mango_accounts)
+    return StatsTable({
+        'account': account,
+        'mango_account': keys[account],
+        'market_index': market,
+        'base_native': base_native,
+        'notional': base_value,
+        'unsettled_pnl': data[:, 3] + base_value,
+        'unrealized_pnl': base_value + data[:, 4],
+        'realized_pnl': data[:, 5],
+    })
+
+
+def account_stats(
+    group: Group,
+    mango_accounts: List[MangoAccount],
+    tables: Optional[HealthTables] = None,
+    positions: Optional[PositionMatrix] = None,
+) -> StatsTable:
+    """
+    Berechnet Kennzahlen für alle MangoAccounts einer Gruppe in einem Durchlauf.
+
+    Spalten (native Quote-Einheiten): mango_account, equity, assets, liabs,
+    perp_unrealized_pnl, perp_realized_pnl, perp_notional, largest_token_index,
+    largest_token_value, largest_perp_market_index, largest_perp_notional.
+    Assets und Liabs sind ungewichtet wie `getAssetsValue`/`getLiabsValue` (TS);
+    fehlende größte Positionen haben Index -1.
+
+    Args:
+        group (Group): Die geladene Gruppe.
+        mango_accounts (List[MangoAccount]): Die MangoAccounts.
+        tables (Optional[HealthTables]): Bereits gebaute Lookup-Tabellen der Gruppe.
+        positions (Optional[PositionMatrix]): Bereits gebaute Positionsmatrizen.
+
+    Returns:
+        StatsTable: Eine Zeile je Konto in Eingabereihenfolge.
+    """
+    tables = tables or HealthTables.from_group(group)
+    positions = positions or PositionMatrix.from_mango_accounts(group, mango_accounts, tables)
+    n_accounts = len(mango_accounts)
+    n_perps = positions.perp_base_native.shape[1]
+
+    token_values = positions.token_balances * tables.token_prices[None, :]  # (A, T)
+    perp_values = positions.perp_base_native * tables.perp_prices[None, :]  # (A, M)
+    perp_pnl = positions.perp_quote_native + perp_values
+    reserved_value = (
+        positions.serum3_reserved_base * tables.token_prices[positions.serum3_base_token_index]
+        + positions.serum3_reserved_quote * tables.token_prices[positions.serum3_quote_token_index]
+    )
+
+    # Perp-PnL im Settle-Token verbuchen
+    values = token_values.copy()
+    if n_perps:
+        np.add.at(values.T, tables.perp_settle_token_index[:n_perps], perp_pnl.T)
+    assets = np.maximum(values, 0.0).sum(axis=1) + reserved_value.sum(axis=1)
+    liabs = np.maximum(-values, 0.0).sum(axis=1)
+
+    perps = perp_position_stats(group, mango_accounts, tables)
+    perp_unrealized = np.bincount(perps['account'], weights=perps['unrealized_pnl'], minlength=n_accounts)
+    perp_realized = np.bincount(perps['account'], weights=perps['realized_pnl'], minlength=n_accounts)
+    perp_notional = np.abs(perp_values).sum(axis=1)
+
+    largest_token_index = np.full(n_accounts, -1, dtype=np.int64)
+    largest_token_value = np.zeros(n_accounts)
+    if token_values.shape[1]:
+        largest = np.abs(token_values).argmax(axis=1)
+        largest_token_value = token_values[np.arange(n_accounts), largest]
+        largest_token_index = np.where(largest_token_value != 0, largest, -1)
+
+    largest_perp_market_index = np.full(n_accounts, -1, dtype=np.int64)
+    largest_perp_notional = np.zeros(n_accounts)
+    if n_perps:
+        largest = np.abs(perp_values).argmax(axis=1)
+        largest_perp_notional = perp_values[np.arange(n_accounts), largest]
+        largest_perp_market_index = np.where(largest_perp_notional != 0, largest, -1)
+
+    return StatsTable({
+        'mango_account': _public_keys(mango_accounts),
+        'equity': token_values.sum(axis=1) + perp_pnl.sum(axis=1) + reserved_value.sum(axis=1),
+        'assets': assets,
+        'liabs': liabs,
+        'perp_unrealized_pnl': perp_unrealized,
+        'perp_realized_pnl': perp_realized,
+        'perp_notional': perp_notional,
+        'largest_token_index': largest_token_index,
+        'largest_token_value': largest_token_value,
+        'largest_perp_market_index': largest_perp_market_index,
+        'largest_perp_notional': largest_perp_notional,
+    })
+
+
+def get_largest_perp_positions(
+    group: Group,
+    mango_accounts: List[MangoAccount],
+    n: int,
+    perp_market_index: Optional[int] = None,
+) -> StatsTable:
+    """
+    Gibt die N Perp-Positionen mit dem größten Nominalwert zurück, wie `getLargestPerpPositions` (TS).
+    """
+    positions = perp_position_stats(group, mango_accounts)
+    if perp_market_index is not None:
+        positions = positions.filter(positions['market_index'] == perp_market_index)
+    return positions.top('notional', n, key='abs')
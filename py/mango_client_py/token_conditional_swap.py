@@ -0,0 +1,477 @@
+# mango_client_py/token_conditional_swap.py
+
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .types import (
+    Group,
+    MangoAccount,
+    TokenConditionalSwap,
+    TokenConditionalSwapType,
+)
+
+Pair = Tuple[int, int]  # (buy_token_index, sell_token_index)
+
+# ----------------------------
+# Index-Einträge
+# ----------------------------
+
+@dataclass
+class TokenConditionalSwapEntry:
+    mango_account: MangoAccount
+    tcs: TokenConditionalSwap
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return (self.mango_account.public_key.to_base58(), self.tcs.id)
+
+
+@dataclass
+class _PairBook:
+    """
+    Sortierte Schwellenwerte aller preisabhängigen Swaps eines Token-Paars.
+
+    Grenzen und Schlüssel liegen in parallelen, nach Grenze aufsteigend sortierten
+    Listen; `started` enthält laufende Auktionen, die unabhängig vom Preis auslösbar sind.
+    """
+    lower_prices: List[float] = field(default_factory=list)
+    lower_keys: List[Tuple[str, int]] = field(default_factory=list)
+    upper_prices: List[float] = field(default_factory=list)
+    upper_keys: List[Tuple[str, int]] = field(default_factory=list)
+    started: Dict[Tuple[str, int], TokenConditionalSwapEntry] = field(default_factory=dict)
+    last_price: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.lower_keys) + len(self.started)
+
+    @staticmethod
+    def _insert(prices: List[float], keys: List[Tuple[str, int]], price: float, key: Tuple[str, int]) -> None:
+        i = bisect_right(prices, price)
+        prices.insert(i, price)
+        keys.insert(i, key)
+
+    @staticmethod
+    def _remove(prices: List[float], keys: List[Tuple[str, int]], price: float, key: Tuple[str, int]) -> None:
+        for i in range(bisect_left(prices, price), bisect_right(prices, price)):
+            if keys[i] == key:
+                del prices[i]
+                del keys[i]
+                return
+
+    def add(self, entry: TokenConditionalSwapEntry) -> None:
+        if entry.tcs.start_timestamp > 0:
+            self.started[entry.key] = entry
+        elif entry.tcs.tcs_type != TokenConditionalSwapType.LINEAR_AUCTION:
+            self._insert(self.lower_prices, self.lower_keys, entry.tcs.price_lower_limit, entry.key)
+            self._insert(self.upper_prices, self.upper_keys, entry.tcs.price_upper_limit, entry.key)
+
+    def discard(self, entry: TokenConditionalSwapEntry) -> None:
+        self.started.pop(entry.key, None)
+        self._remove(self.lower_prices, self.lower_keys, entry.tcs.price_lower_limit, entry.key)
+        self._remove(self.upper_prices, self.upper_keys, entry.tcs.price_upper_limit, entry.key)
+
+
+# ----------------------------
+# Trigger-Scanner
+# ----------------------------
+
+class TokenConditionalSwapScanner:
+    """
+    Indiziert alle aktiven Token Conditional Swaps nach (buy_token, sell_token) und Preisschwelle.
+
+    Bei einem neuen Oracle-Preis werden je betroffenem Paar nur die Swaps geprüft,
+    deren untere oder obere Grenze zwischen altem und neuem Paarpreis liegt. Der
+    Paarpreis ist wie im Programm `buy_price / sell_price` in nativen Einheiten.
+    """
+
+    def __init__(self, group: Group):
+        self.group = group
+        self._books: Dict[Pair, _PairBook] = {}
+        self._entries: Dict[Tuple[str, int], TokenConditionalSwapEntry] = {}
+        self._keys_by_account: Dict[str, List[Tuple[str, int]]] = {}
+        self._pairs_by_token: Dict[int, set] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ----------------------------
+    # Index pflegen
+    # ----------------------------
+
+    def upsert_accounts(
+        self,
+        mango_accounts: Iterable[MangoAccount],
+        now_ts: Optional[int] = None,
+    ) -> List[TokenConditionalSwapEntry]:
+        """
+        Übernimmt die Swaps der MangoAccounts und ersetzt bisherige Einträge dieser Konten.
+
+        `update_token_prices` meldet nur Swaps, deren Grenze der Paarpreis überschreitet.
+        Swaps, die beim Einfügen bereits im Preisbereich liegen oder aus anderen Gründen
+        (z.B. erreichter Startzeitpunkt) auslösbar geworden sind, werden deshalb hier
+        gegen den zuletzt bekannten Paarpreis geprüft und zurückgegeben. Für Änderungen,
+        die nur von der Zeit abhängen, ist weiterhin `triggerable()` zuständig.
+
+        Args:
+            mango_accounts (Iterable[MangoAccount]): Die neu dekodierten MangoAccounts.
+            now_ts (Optional[int]): Aktueller Zeitstempel in Sekunden; standardmäßig die Systemzeit.
+
+        Returns:
+            List[TokenConditionalSwapEntry]: Die eingefügten Swaps, die zum letzten Paarpreis auslösbar sind.
+        """
+        if now_ts is None:
+            now_ts = int(time.time())
+        result: List[TokenConditionalSwapEntry] = []
+        for mango_account in mango_accounts:
+            account_key = mango_account.public_key.to_base58()
+            self.remove_account(account_key)
+            keys = []
+            for tcs in mango_account.token_conditional_swaps:
+                if not tcs.is_configured:
+                    continue
+                entry = TokenConditionalSwapEntry(mango_account, tcs)
+                self._insert(entry)
+                keys.append(entry.key)
+                last_price = self._books[self._pair(tcs)].last_price
+                if last_price is not None and self._is_actionable(tcs, last_price, now_ts):
+                    result.append(entry)
+            if keys:
+                self._keys_by_account[account_key] = keys
+        return result
+
+    def remove_account(self, mango_account_key: str) -> None:
+        """
+        Entfernt alle Swaps eines MangoAccounts aus dem Index.
+
+        Args:
+            mango_account_key (str): Die Base58-PublicKey des Kontos.
+        """
+        for key in self._keys_by_account.pop(mango_account_key, []):
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                continue
+            book = self._books.get(self._pair(entry.tcs))
+            if book is not None:
+                book.discard(entry)
+
+    @staticmethod
+    def _pair(tcs: TokenConditionalSwap) -> Pair:
+        return (tcs.buy_token_index, tcs.sell_token_index)
+
+    def _insert(self, entry: TokenConditionalSwapEntry) -> None:
+        pair = self._pair(entry.tcs)
+        book = self._books.get(pair)
+        if book is None:
+            book = self._books[pair] = _PairBook()
+            self._pairs_by_token.setdefault(pair[0], set()).add(pair)
+            self._pairs_by_token.setdefault(pair[1], set()).add(pair)
+        self._entries[entry.key] = entry
+        book.add(entry)
+
+    # ----------------------------
+    # Abfragen
+    # ----------------------------
+
+    def pair_price(self, buy_token_index: int, sell_token_index: int) -> float:
+        """
+        Gibt den aktuellen Paarpreis ("Sell-Token pro Buy-Token", nativ) aus den Bank-Preisen zurück.
+        """
+        buy_bank = self.group.banks_map_by_token_index[buy_token_index][0]
+        sell_bank = self.group.banks_map_by_token_index[sell_token_index][0]
+        return buy_bank.price / sell_bank.price
+
+    def triggerable(
+        self,
+        buy_token_index: int,
+        sell_token_index: int,
+        now_ts: int,
+        price: Optional[float] = None,
+    ) -> List[TokenConditionalSwapEntry]:
+        """
+        Gibt alle Swaps eines Paars zurück, die beim gegebenen Preis ausgelöst oder gestartet werden können.
+
+        Args:
+            buy_token_index (int): Token-Index des Buy-Tokens.
+            sell_token_index (int): Token-Index des Sell-Tokens.
+            now_ts (int): Aktueller Zeitstempel in Sekunden.
+            price (Optional[float]): Paarpreis; standardmäßig aus den Bank-Preisen.
+
+        Returns:
+            List[TokenConditionalSwapEntry]: Die auslösbaren Swaps.
+        """
+        book = self._books.get((buy_token_index, sell_token_index))
+        if book is None:
+            return []
+        if price is None:
+            price = self.pair_price(buy_token_index, sell_token_index)
+
+        # Alle Swaps mit price_lower_limit <= price, danach Prüfung der oberen Grenze
+        end = bisect_right(book.lower_prices, price)
+        result = [
+            self._entries[key] for key in book.lower_keys[:end]
+            if self._is_actionable(self._entries[key].tcs, price, now_ts)
+        ]
+        result.extend(
+            entry for entry in book.started.values() if entry.tcs.is_triggerable(price, now_ts)
+        )
+        return result
+
+    @staticmethod
+    def _is_actionable(tcs: TokenConditionalSwap, price: float, now_ts: int) -> bool:
+        return tcs.is_triggerable(price, now_ts) or tcs.is_startable(price, now_ts)
+
+    def update_token_prices(
+        self,
+        token_prices: Dict[int, float],
+        now_ts: int,
+    ) -> List[TokenConditionalSwapEntry]:
+        """
+        Übernimmt neue Oracle-Preise und gibt die Swaps zurück, deren Schwelle dabei überschritten wurde.
+
+        Pro betroffenem Paar wird nur der Bereich der sortierten Grenzen zwischen altem
+        und neuem Paarpreis per Bisektion ausgewählt. Beim ersten Preis eines Paars
+        werden alle aktuell auslösbaren Swaps zurückgegeben.
+
+        Args:
+            token_prices (Dict[int, float]): Neue Preise je Token-Index.
+            now_ts (int): Aktueller Zeitstempel in Sekunden.
+
+        Returns:
+            List[TokenConditionalSwapEntry]: Die neu auslösbaren Swaps.
+        """
+        pairs = set()
+        for token_index, price in token_prices.items():
+            for bank in self.group.banks_map_by_token_index.get(token_index, []):
+                bank.price = price
+            pairs.update(self._pairs_by_token.get(token_index, ()))
+
+        result: List[TokenConditionalSwapEntry] = []
+        for pair in pairs:
+            book = self._books[pair]
+            new_price = self.pair_price(*pair)
+            old_price = book.last_price
+            book.last_price = new_price
+
+            if old_price is None:
+                result.extend(self.triggerable(pair[0], pair[1], now_ts, new_price))
+                continue
+            if new_price > old_price:
+                # Steigender Preis: untere Grenzen in (alt, neu] wurden überschritten
+                start = bisect_right(book.lower_prices, old_price)
+                end = bisect_right(book.lower_prices, new_price)
+                crossed = book.lower_keys[start:end]
+            elif new_price < old_price:
+                # Fallender Preis: obere Grenzen in [neu, alt) wurden unterschritten
+                start = bisect_left(book.upper_prices, new_price)
+                end = bisect_left(book.upper_prices, old_price)
+                crossed = book.upper_keys[start:end]
+            else:
+                continue
+            result.extend(
+                self._entries[key] for key in crossed
+                if self._is_actionable(self._entries[key].tcs, new_price, now_ts)
+            )
+        return result
+
+    def expire(self, now_ts: int) -> int:
+        """
+        Entfernt abgelaufene Swaps aus dem Index.
+
+        Args:
+            now_ts (int): Aktueller Zeitstempel in Sekunden.
+
+        Returns:
+            int: Anzahl der entfernten Swaps.
+        """
+        expired = [key for key, entry in self._entries.items() if entry.tcs.is_expired(now_ts)]
+        for key in expired:
+            entry = self._entries.pop(key)
+            self._books[self._pair(entry.tcs)].discard(entry)
+            account_keys = self._keys_by_account.get(key[0], [])
+            if key in account_keys:
+                account_keys.remove(key)
+        return len(expired)
+
+
+# ----------------------------
+# Vektorisierte Preisberechnung
+# ----------------------------
+
+@dataclass
+class TokenConditionalSwapArrays:
+    """
+    Spaltenweise Parameter vieler Swaps, Index i entspricht `entries[i]`.
+    """
+    tcs_type: np.ndarray
+    buy_token_index: np.ndarray
+    sell_token_index: np.ndarray
+    price_lower_limit: np.ndarray
+    price_upper_limit: np.ndarray
+    price_premium_rate: np.ndarray
+    taker_fee_rate: np.ndarray
+    maker_fee_rate: np.ndarray
+    start_timestamp: np.ndarray
+    duration_seconds: np.ndarray
+    expiry_timestamp: np.ndarray
+    remaining_buy: np.ndarray
+    remaining_sell: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.tcs_type)
+
+    @classmethod
+    def from_swaps(cls, swaps: Sequence[TokenConditionalSwap]) -> 'TokenConditionalSwapArrays':
+        """
+        Überführt Swaps in die spaltenweise Darstellung.
+
+        Args:
+            swaps (Sequence[TokenConditionalSwap]): Die Swaps.
+
+        Returns:
+            TokenConditionalSwapArrays: Die Parameter-Arrays.
+        """
+        def column(getter, dtype) -> np.ndarray:
+            return np.fromiter((getter(tcs) for tcs in swaps), dtype=dtype, count=len(swaps))
+
+        return cls(
+            tcs_type=column(lambda tcs: tcs.tcs_type.value, np.int8),
+            buy_token_index=column(lambda tcs: tcs.buy_token_index, np.int64),
+            sell_token_index=column(lambda tcs: tcs.sell_token_index, np.int64),
+            price_lower_limit=column(lambda tcs: tcs.price_lower_limit, np.float64),
+            price_upper_limit=column(lambda tcs: tcs.price_upper_limit, np.float64),
+            price_premium_rate=column(lambda tcs: tcs.price_premium_rate, np.float64),
+            taker_fee_rate=column(lambda tcs: tcs.taker_fee_rate, np.float64),
+            maker_fee_rate=column(lambda tcs: tcs.maker_fee_rate, np.float64),
+            start_timestamp=column(lambda tcs: tcs.start_timestamp, np.int64),
+            duration_seconds=column(lambda tcs: tcs.duration_seconds, np.int64),
+            # u64-Werte (z.B. "kein Ablauf") werden als float gehalten, um Überläufe zu vermeiden
+            expiry_timestamp=column(lambda tcs: tcs.expiry_timestamp, np.float64),
+            remaining_buy=column(lambda tcs: tcs.remaining_buy(), np.float64),
+            remaining_sell=column(lambda tcs: tcs.remaining_sell(), np.float64),
+        )
+
+
+@dataclass
+class TokenConditionalSwapPrices:
+    base_price: np.ndarray
+    premium_price: np.ndarray
+    maker_price: np.ndarray
+    taker_price: np.ndarray
+    triggerable: np.ndarray
+    startable: np.ndarray
+    # Ertrag des Auslösenden relativ zum Oracle-Preis, abzüglich `cost_rate`
+    profit_rate: np.ndarray
+    # Maximales Volumen in nativen Buy-Token und erwarteter Ertrag in nativen Quote-Einheiten
+    max_buy_native: np.ndarray
+    profit_native: np.ndarray
+
+
+def premium_prices(
+    arrays: TokenConditionalSwapArrays,
+    base_price: np.ndarray,
+    now_ts: int,
+) -> np.ndarray:
+    """
+    Vektorisierte Fassung von `TokenConditionalSwap.premium_price`.
+
+    Für Linear-Auktionen, die noch nicht gestartet sind, ist das Ergebnis NaN.
+
+    Args:
+        arrays (TokenConditionalSwapArrays): Die Swap-Parameter.
+        base_price (np.ndarray): Oracle-Paarpreise ("Sell-Token pro Buy-Token").
+        now_ts (int): Aktueller Zeitstempel in Sekunden.
+
+    Returns:
+        np.ndarray: Die Ausführungspreise.
+    """
+    duration = arrays.duration_seconds.astype(np.float64)
+    safe_duration = np.where(duration > 0, duration, 1.0)
+
+    fixed = base_price * (1.0 + arrays.price_premium_rate)
+
+    start = np.where(arrays.start_timestamp > 0, arrays.start_timestamp, now_ts)
+    auction_progress = np.where(duration > 0, np.minimum((now_ts - start) / safe_duration, 1.0), 1.0)
+    premium_auction = base_price * (1.0 + auction_progress * arrays.price_premium_rate)
+
+    passed_start = (arrays.start_timestamp > 0) & (now_ts >= arrays.start_timestamp)
+    elapsed = now_ts - arrays.start_timestamp
+    linear_progress = np.where(elapsed < arrays.duration_seconds, elapsed / safe_duration, 1.0)
+    linear = np.where(
+        elapsed < arrays.duration_seconds,
+        arrays.price_lower_limit + linear_progress * (arrays.price_upper_limit - arrays.price_lower_limit),
+        arrays.price_upper_limit,
+    )
+    linear = np.where(passed_start, linear, np.nan)
+
+    return np.select(
+        [
+            arrays.tcs_type == TokenConditionalSwapType.FIXED_PREMIUM.value,
+            arrays.tcs_type == TokenConditionalSwapType.PREMIUM_AUCTION.value,
+        ],
+        [fixed, premium_auction],
+        default=linear,
+    )
+
+
+def evaluate_token_conditional_swaps(
+    arrays: TokenConditionalSwapArrays,
+    token_prices: np.ndarray,
+    now_ts: int,
+    cost_rate: float = 0.0,
+) -> TokenConditionalSwapPrices:
+    """
+    Berechnet Ausführungspreise, Auslösbarkeit und Profitabilität vieler Swaps in einem Durchlauf.
+
+    Der Auslösende liefert Buy-Token und erhält `taker_price` Sell-Token je Buy-Token;
+    sein Ertrag relativ zum Oracle ist daher `taker_price / base_price - 1`.
+
+    Args:
+        arrays (TokenConditionalSwapArrays): Die Swap-Parameter.
+        token_prices (np.ndarray): Oracle-Preise je Token-Index (native Quote-Einheiten pro nativem Token).
+        now_ts (int): Aktueller Zeitstempel in Sekunden.
+        cost_rate (float): Erwartete Kosten (Slippage, Gebühren) relativ zum Volumen.
+
+    Returns:
+        TokenConditionalSwapPrices: Die Ergebnisse je Swap.
+    """
+    buy_price = token_prices[arrays.buy_token_index]
+    sell_price = token_prices[arrays.sell_token_index]
+    base_price = buy_price / sell_price
+
+    premium_price = premium_prices(arrays, base_price, now_ts)
+    maker_price = premium_price * (1.0 + arrays.maker_fee_rate)
+    taker_price = premium_price * (1.0 - arrays.taker_fee_rate)
+
+    not_expired = now_ts < arrays.expiry_timestamp
+    in_range = (base_price >= arrays.price_lower_limit) & (base_price <= arrays.price_upper_limit)
+    passed_start = (arrays.start_timestamp > 0) & (now_ts >= arrays.start_timestamp)
+    is_fixed = arrays.tcs_type == TokenConditionalSwapType.FIXED_PREMIUM.value
+    triggerable = not_expired & np.where(is_fixed, in_range, passed_start)
+    startable = (
+        not_expired
+        & (arrays.start_timestamp == 0)
+        & (arrays.tcs_type == TokenConditionalSwapType.PREMIUM_AUCTION.value)
+        & in_range
+    )
+
+    profit_rate = taker_price / base_price - 1.0 - cost_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        max_buy_native = np.minimum(arrays.remaining_buy, arrays.remaining_sell / maker_price)
+    max_buy_native = np.where(triggerable, np.nan_to_num(max_buy_native, nan=0.0), 0.0)
+    profit_native = max_buy_native * buy_price * profit_rate
+
+    return TokenConditionalSwapPrices(
+        base_price=base_price,
+        premium_price=premium_price,
+        maker_price=maker_price,
+        taker_price=taker_price,
+        triggerable=triggerable,
+        startable=startable,
+        profit_rate=profit_rate,
+        max_buy_native=max_buy_native,
+        profit_native=profit_native,
+    )
@@ -1,10 +1,14 @@
 # mango_client_py/types.py
 
-from dataclasses import dataclass, field
+from dataclasses import MISSING, dataclass, field, fields
 from enum import Enum
-from typing import List, Dict, Optional
+from typing import Any, ClassVar, List, Dict, Optional, Tuple
+import numpy as np
 from solana.publickey import PublicKey
 
+# Token-Index einer Bank, wie `TokenIndex` (TS)
+TokenIndex = int
+
 # ----------------------------
 # Enums
 # ----------------------------
@@ -32,6 +36,21 @@ class PerpOrderType(Enum):
     MARKET = "MARKET"
     STOP = "STOP"
 
+class HealthType(Enum):
+    MAINT = "maint"
+    INIT = "init"
+    LIQUIDATION_END = "liquidation_end"
+
+class FlashLoanType(Enum):
+    UNKNOWN = "unknown"
+    SWAP = "swap"
+    SWAP_WITHOUT_FEE = "swapWithoutFee"
+
+class TokenConditionalSwapType(Enum):
+    FIXED_PREMIUM = 0
+    PREMIUM_AUCTION = 1
+    LINEAR_AUCTION = 2
+
 class AuctionType(Enum):
     TAKE_PROFIT_ON_DEPOSIT = "TakeProfitOnDeposit"
     STOP_LOSS_ON_DEPOSIT = "StopLossOnDeposit"
@@ -52,6 +71,23 @@ class Bank:
     mint_decimals: int
     oracle: PublicKey
     fallback_oracle: PublicKey
+    mint: Optional[PublicKey] = None
+    token_index: int = 0
+    vault: Optional[PublicKey] = None
+    force_withdraw: bool = False
+    name: str = ''
+    price: float = 0.0  # Oracle-Preis in nativen Quote-Einheiten pro nativem Token
+    deposit_index: float = 1.0
+    borrow_index: float = 1.0
+    maint_asset_weight: float = 1.0
+    init_asset_weight: float = 1.0
+    maint_liab_weight: float = 1.0
+    init_liab_weight: float = 1.0
+    loan_origination_fee_rate: float = 0.0
+    reduce_only: int = 0  # 1 = keine neuen Kredite und Einlagen, 2 = keine neuen Kredite
+
+    def are_borrows_reduce_only(self) -> bool:
+        return self.reduce_only == 1 or self.reduce_only == 2
 
     def is_oracle_stale_or_unconfident(self, current_slot: int) -> bool:
         """
@@ -68,21 +104,321 @@ class Serum3Market:
     public_key: PublicKey
     oracle: PublicKey
     external_market_pk: Optional[PublicKey] = None
+    base_token_index: int = 0
+    quote_token_index: int = 0
     # Fügen Sie weitere Felder hinzu, die für Serum3Markets relevant sind
 
+@dataclass
+class StablePriceModel:
+    """
+    Zeitverzögerter, in der Änderungsrate begrenzter Preis wie `StablePriceModel` im Programm.
+    """
+    stable_price: float = 0.0
+    last_update_timestamp: int = 0
+    delay_prices: List[float] = field(default_factory=lambda: [0.0] * 24)
+    delay_accumulator_price: float = 0.0
+    delay_accumulator_time: int = 0
+    delay_interval_seconds: int = 60 * 60
+    delay_growth_limit: float = 0.06
+    stable_growth_limit: float = 0.0003
+    last_delay_interval_index: int = 0
+    reset_on_nonzero_price: bool = False
+
+    MIN_UPDATE_DT: ClassVar[int] = 10
+    MAX_UPDATE_DT: ClassVar[int] = 10 * 60
+
+    def reset_to_price(self, oracle_price: float, now_ts: int) -> None:
+        self.stable_price = oracle_price
+        self.delay_prices = [oracle_price] * len(self.delay_prices)
+        self.delay_accumulator_price = 0.0
+        self.delay_accumulator_time = 0
+        self.last_update_timestamp = now_ts
+        self.reset_on_nonzero_price = oracle_price <= 0
+
+    def delay_interval_index(self, timestamp: int) -> int:
+        return (timestamp // self.delay_interval_seconds) % len(self.delay_prices)
+
+    @staticmethod
+    def _growth_clamped(target: float, prev: float, growth_limit: float) -> float:
+        return min(max(target, prev * (1 - growth_limit)), prev * (1 + growth_limit))
+
+    def update(self, now_ts: int, oracle_price: float) -> None:
+        """
+        Übernimmt einen neuen Oracle-Preis; Updates in kürzerem Abstand als 10 Sekunden werden ignoriert.
+
+        Args:
+            now_ts (int): Aktueller Unix-Zeitstempel.
+            oracle_price (float): Der Oracle-Preis.
+        """
+        if self.reset_on_nonzero_price and oracle_price > 0:
+            self.reset_to_price(oracle_price, now_ts)
+
+        dt = max(now_ts - self.last_update_timestamp, 0)
+        if dt < self.MIN_UPDATE_DT:
+            return
+        n = len(self.delay_prices)
+        full_delay_passed = dt > n * self.delay_interval_seconds
+        dt_limited = min(dt, self.MAX_UPDATE_DT)
+        self.last_update_timestamp = now_ts
+
+        self.delay_accumulator_time += dt
+        self.delay_accumulator_price += oracle_price * dt_limited
+
+        index = self.delay_interval_index(now_ts)
+        last = self.last_delay_interval_index
+        if index != last:
+            prev = self.delay_prices[last - 1] if last > 0 else self.delay_prices[n - 1]
+            avg = self.delay_accumulator_price / self.delay_accumulator_time
+            new_delay_price = self._growth_clamped(avg, prev, self.delay_growth_limit)
+            if full_delay_passed:
+                slots = range(n)
+            elif index > last:
+                slots = range(last, index)
+            else:
+                slots = list(range(last, n)) + list(range(index))
+            for slot in slots:
+                self.delay_prices[slot] = new_delay_price
+            self.delay_accumulator_price = 0.0
+            self.delay_accumulator_time = 0
+            self.last_delay_interval_index = index
+
+        delay_price = self.delay_prices[index]
+        prev_stable_price = self.stable_price
+        if delay_price >= prev_stable_price:
+            fraction = prev_stable_price / delay_price if delay_price else 0.0
+        else:
+            fraction = delay_price / prev_stable_price
+        growth_limit = self.stable_growth_limit * fraction * fraction * dt_limited
+        self.stable_price = self._growth_clamped(oracle_price, prev_stable_price, growth_limit)
+
 @dataclass
 class PerpMarket:
     market_index: int
     public_key: PublicKey
+    oracle: Optional[PublicKey] = None
+    event_queue: Optional[PublicKey] = None
+    bids: Optional[PublicKey] = None
+    asks: Optional[PublicKey] = None
+    name: str = ''
+    settle_token_index: int = 0
+    base_lot_size: int = 1
+    quote_lot_size: int = 1
+    price: float = 0.0  # Oracle-Preis in nativen Quote-Einheiten pro nativer Basiseinheit
+    maint_base_asset_weight: float = 1.0
+    init_base_asset_weight: float = 1.0
+    maint_base_liab_weight: float = 1.0
+    init_base_liab_weight: float = 1.0
+    maint_overall_asset_weight: float = 1.0
+    init_overall_asset_weight: float = 1.0
+    stable_price_model: StablePriceModel = field(default_factory=StablePriceModel)
+    settle_pnl_limit_factor: float = -1.0  # negativ = keine Begrenzung
+    settle_pnl_limit_window_size_ts: int = 86400
+    min_funding: float = 0.0
+    max_funding: float = 0.0
+    impact_quantity: int = 0  # Basis-Lots
     # Fügen Sie weitere Felder hinzu, die für PerpMarkets relevant sind
 
+    @property
+    def stable_price(self) -> float:
+        return self.stable_price_model.stable_price
+
+    def update_stable_price(self, now_ts: int, oracle_price: Optional[float] = None) -> float:
+        """
+        Führt das Stable-Price-Modell mit dem aktuellen (oder übergebenen) Oracle-Preis nach.
+
+        Returns:
+            float: Der neue Stable-Preis.
+        """
+        if oracle_price is not None:
+            self.price = oracle_price
+        self.stable_price_model.update(now_ts, self.price)
+        return self.stable_price
+
+    def price_lots_to_native(self, price_lots: Any) -> Any:
+        """
+        Rechnet Preise in Lots in native Quote-Einheiten pro nativer Basiseinheit um.
+        """
+        return price_lots * self.quote_lot_size / self.base_lot_size
+
+    def impact_prices(self, bids: 'BookSide', asks: 'BookSide') -> Tuple[Optional[float], Optional[float]]:
+        """
+        Gibt die Impact-Preise (Bid, Ask) für `impact_quantity` in nativen Einheiten zurück, jeweils None ohne ausreichende Liquidität.
+        """
+        bid = bids.impact_price_lots(self.impact_quantity)
+        ask = asks.impact_price_lots(self.impact_quantity)
+        return (
+            None if bid is None else self.price_lots_to_native(bid),
+            None if ask is None else self.price_lots_to_native(ask),
+        )
+
+    def instantaneous_funding_rate(self, bids: 'BookSide', asks: 'BookSide') -> float:
+        """
+        Berechnet die momentane Funding-Rate pro Tag aus den Impact-Preisen beider Buchseiten.
+
+        Args:
+            bids (BookSide): Die Bid-Seite.
+            asks (BookSide): Die Ask-Seite.
+
+        Returns:
+            float: Die Funding-Rate, begrenzt auf [min_funding, max_funding].
+        """
+        bid, ask = self.impact_prices(bids, asks)
+        if bid is not None and ask is not None:
+            book_price = (bid + ask) / 2
+            return min(max(book_price / self.price - 1, self.min_funding), self.max_funding)
+        if bid is not None:
+            return self.max_funding
+        if ask is not None:
+            return self.min_funding
+        return 0.0
+
+    def instantaneous_funding_rate_per_second(self, bids: 'BookSide', asks: 'BookSide') -> float:
+        return self.instantaneous_funding_rate(bids, asks) / (24 * 60 * 60)
+
 @dataclass
 class TokenConditionalSwap:
     id: int
     buy_token_index: int
     sell_token_index: int
     is_configured: bool
-    # Fügen Sie weitere Felder hinzu, die für TokenConditionalSwaps relevant sind
+    max_buy: int = 0
+    max_sell: int = 0
+    bought: int = 0
+    sold: int = 0
+    expiry_timestamp: int = 0
+    # Preise immer in nativen "Sell-Token pro Buy-Token"
+    price_lower_limit: float = 0.0
+    price_upper_limit: float = 0.0
+    price_premium_rate: float = 0.0
+    taker_fee_rate: float = 0.0
+    maker_fee_rate: float = 0.0
+    allow_creating_deposits: bool = False
+    allow_creating_borrows: bool = False
+    tcs_type: TokenConditionalSwapType = TokenConditionalSwapType.FIXED_PREMIUM
+    start_timestamp: int = 0
+    duration_seconds: int = 0
+
+    def is_expired(self, now_ts: int) -> bool:
+        return now_ts >= self.expiry_timestamp
+
+    def passed_start(self, now_ts: int) -> bool:
+        return self.start_timestamp > 0 and now_ts >= self.start_timestamp
+
+    def remaining_buy(self) -> int:
+        return self.max_buy - self.bought
+
+    def remaining_sell(self) -> int:
+        return self.max_sell - self.sold
+
+    def price_in_range(self, price: float) -> bool:
+        return self.price_lower_limit <= price <= self.price_upper_limit
+
+    def is_startable(self, price: float, now_ts: int) -> bool:
+        """
+        Gibt zurück, ob eine Premium-Auktion bei diesem Preis gestartet werden kann.
+        """
+        return (
+            not self.is_expired(now_ts)
+            and self.start_timestamp == 0
+            and self.tcs_type == TokenConditionalSwapType.PREMIUM_AUCTION
+            and self.price_in_range(price)
+        )
+
+    def is_triggerable(self, price: float, now_ts: int) -> bool:
+        """
+        Gibt zurück, ob der Swap bei diesem Preis ("Sell-Token pro Buy-Token") ausgelöst werden kann.
+        """
+        if self.is_expired(now_ts):
+            return False
+        if self.tcs_type == TokenConditionalSwapType.FIXED_PREMIUM:
+            return self.price_in_range(price)
+        # Auktionen sind nach dem Start unabhängig vom Oracle-Preis auslösbar
+        return self.passed_start(now_ts)
+
+    def premium_price(self, base_price: float, now_ts: int) -> float:
+        """
+        Gibt den Ausführungspreis inklusive Prämie bzw. Auktionsfortschritt zurück.
+
+        Args:
+            base_price (float): Oracle-Paarpreis ("Sell-Token pro Buy-Token").
+            now_ts (int): Aktueller Zeitstempel in Sekunden.
+
+        Returns:
+            float: Der Preis in "Sell-Token pro Buy-Token".
+        """
+        if self.tcs_type == TokenConditionalSwapType.FIXED_PREMIUM:
+            return base_price * (1.0 + self.price_premium_rate)
+        if self.tcs_type == TokenConditionalSwapType.PREMIUM_AUCTION:
+            # Startet dynamisch, sobald der Swap auslösbar ist
+            start = self.start_timestamp if self.start_timestamp > 0 else now_ts
+            progress = min((now_ts - start) / self.duration_seconds, 1.0) if self.duration_seconds > 0 else 1.0
+            return base_price * (1.0 + progress * self.price_premium_rate)
+        if not self.passed_start(now_ts):
+            raise ValueError("Linear auction has not started yet")
+        current = now_ts - self.start_timestamp
+        if current < self.duration_seconds:
+            progress = current / self.duration_seconds
+            return self.price_lower_limit + progress * (self.price_upper_limit - self.price_lower_limit)
+        return self.price_upper_limit
+
+    def maker_price(self, premium_price: float) -> float:
+        return premium_price * (1.0 + self.maker_fee_rate)
+
+    def taker_price(self, premium_price: float) -> float:
+        return premium_price * (1.0 - self.taker_fee_rate)
+
+@dataclass
+class TokenPosition:
+    token_index: int
+    indexed_position: float = 0.0
+    in_use_count: int = 0
+
+    TOKEN_INDEX_UNSET: ClassVar[int] = 65535
+
+    def is_active(self) -> bool:
+        return self.token_index != TokenPosition.TOKEN_INDEX_UNSET
+
+    def balance(self, bank: Bank) -> float:
+        """
+        Gibt den nativen Saldo der Position zurück (positiv = Einlage, negativ = Kredit).
+        """
+        if self.indexed_position >= 0:
+            return self.indexed_position * bank.deposit_index
+        return self.indexed_position * bank.borrow_index
+
+@dataclass
+class Serum3Orders:
+    market_index: int
+    open_orders: Optional[PublicKey] = None
+    base_token_index: int = 0
+    quote_token_index: int = 0
+    # Aus dem Open-Orders-Konto geladene Beträge in nativen Einheiten
+    base_free_native: float = 0.0
+    quote_free_native: float = 0.0
+    base_reserved_native: float = 0.0
+    quote_reserved_native: float = 0.0
+
+    SERUM3_MARKET_INDEX_UNSET: ClassVar[int] = 65535
+
+    def is_active(self) -> bool:
+        return self.market_index != Serum3Orders.SERUM3_MARKET_INDEX_UNSET
+
+@dataclass
+class PerpPosition:
+    market_index: int
+    base_position_lots: int = 0
+    quote_position_native: float = 0.0
+    quote_entry_native: float = 0.0
+    realized_pnl_for_position_native: float = 0.0
+    settle_pnl_limit_window: int = 0
+    settle_pnl_limit_settled_in_current_window_native: float = 0.0
+    recurring_settle_pnl_allowance: float = 0.0
+    oneshot_settle_pnl_allowance: float = 0.0
+
+    PERP_MARKET_INDEX_UNSET: ClassVar[int] = 65535
+
+    def is_active(self) -> bool:
+        return self.market_index != PerpPosition.PERP_MARKET_INDEX_UNSET
 
 @dataclass
 class MangoAccount:
@@ -92,11 +428,82 @@ class MangoAccount:
     account_num: int
     delegate: PublicKey
     token_conditional_swaps: List[TokenConditionalSwap] = field(default_factory=list)
-    tokens: List[Any] = field(default_factory=list)  # Passen Sie den Typ an, falls bekannt
-    serum3: List[Any] = field(default_factory=list)  # Passen Sie den Typ an, falls bekannt
-    perps: List[Any] = field(default_factory=list)  # Passen Sie den Typ an, falls bekannt
+    tokens: List[TokenPosition] = field(default_factory=list)
+    serum3: List[Serum3Orders] = field(default_factory=list)
+    perps: List[PerpPosition] = field(default_factory=list)
     perp_open_orders: List[Any] = field(default_factory=list)  # Passen Sie den Typ an, falls bekannt
 
+    def tokens_active(self) -> List[TokenPosition]:
+        return [token for token in self.tokens if token.is_active()]
+
+    def serum3_active(self) -> List[Serum3Orders]:
+        return [serum3 for serum3 in self.serum3 if serum3.is_active()]
+
+    def perp_active(self) -> List[PerpPosition]:
+        return [perp for perp in self.perps if perp.is_active()]
+
+    def get_max_withdraw_with_borrow_for_token(self, group: 'Group', mint_pk: PublicKey) -> float:
+        """
+        Gibt die maximale native Menge zurück, die inklusive Kredit abgehoben werden kann, wie `getMaxWithdrawWithBorrowForToken` (TS).
+
+        Args:
+            group (Group): Die Gruppe.
+            mint_pk (PublicKey): Der Mint des Tokens.
+
+        Returns:
+            float: Die native Menge.
+        """
+        from .health import HealthCache, HealthTables
+        bank = group.get_first_bank_by_mint(mint_pk)
+        tables = HealthTables.from_group(group)
+        return HealthCache.from_mango_account(group, self, tables).get_max_withdraw_with_borrow_for_token(
+            tables,
+            bank.token_index,
+            loan_origination_fee_rate=bank.loan_origination_fee_rate,
+            borrows_reduce_only=bank.are_borrows_reduce_only(),
+        )
+
+    def get_max_quote_for_serum3_bid(
+        self,
+        group: 'Group',
+        serum3_market: Serum3Market,
+        min_ratio: float = 2.0,
+    ) -> float:
+        """
+        Gibt die maximale native Quote-Menge einer Serum3-Bid-Order zurück, wie `getMaxQuoteForSerum3BidUi` (TS).
+        """
+        from .health import HealthCache, HealthTables
+        tables = HealthTables.from_group(group)
+        return HealthCache.from_mango_account(group, self, tables).get_max_serum3_order_for_health_ratio(
+            tables,
+            serum3_market.base_token_index,
+            serum3_market.quote_token_index,
+            Serum3Side.BUY,
+            min_ratio,
+        )
+
+    def get_max_base_for_perp_ask(
+        self,
+        group: 'Group',
+        perp_market_index: int,
+        min_ratio: float = 2.0,
+    ) -> float:
+        """
+        Gibt die maximale Anzahl an Basis-Lots einer Perp-Ask-Order zum Oracle-Preis zurück, wie `getMaxBaseForPerpAskUi` (TS).
+        """
+        from .health import HealthCache, HealthTables
+        perp_market = group.get_perp_market_by_market_index(perp_market_index)
+        if perp_market is None:
+            raise ValueError(f"PerpMarket for market index {perp_market_index} not found!")
+        tables = HealthTables.from_group(group)
+        return HealthCache.from_mango_account(group, self, tables).get_max_perp_for_health_ratio(
+            tables,
+            perp_market_index,
+            perp_market.price,
+            PerpOrderSide.SELL,
+            min_ratio,
+        )
+
 @dataclass
 class Group:
     public_key: PublicKey
@@ -105,9 +512,158 @@ class Group:
     mint_infos_map_by_token_index: Dict[int, Any] = field(default_factory=dict)  # Passen Sie den Typ an, falls bekannt
     banks_map_by_token_index: Dict[int, List[Bank]] = field(default_factory=dict)
     serum3_markets_map_by_market_index: Dict[int, Serum3Market] = field(default_factory=dict)
+    perp_markets_map_by_market_index: Dict[int, PerpMarket] = field(default_factory=dict)
     serum3_external_markets_map: Dict[Any, Any] = field(default_factory=dict)  # Passen Sie den Typ an, falls bekannt
     buyback_fees_swap_mango_account: PublicKey = field(default_factory=lambda: PublicKey(""))
 
+    # Bank-Indizes, aus banks_map_by_token_index abgeleitet (Schlüssel: PublicKey base58 bzw. Name)
+    banks_map_by_mint: Dict[str, List[Bank]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    banks_map_by_oracle: Dict[str, List[Bank]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    banks_map_by_name: Dict[str, List[Bank]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _bank_indexes_dirty: bool = field(default=True, init=False, repr=False, compare=False)
+    _bank_indexes_token_count: int = field(default=0, init=False, repr=False, compare=False)
+    # Wird bei jeder Änderung der Bank-Zuordnung erhöht, z.B. als Schlüsselteil abgeleiteter Caches
+    _bank_layout_version: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.rebuild_bank_indexes()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in ('banks_map_by_token_index', 'perp_markets_map_by_market_index'):
+            super().__setattr__('_bank_indexes_dirty', True)
+
+    # ----------------------------
+    # Bank-Indizes
+    # ----------------------------
+
+    def rebuild_bank_indexes(self) -> None:
+        """
+        Baut die Bank-Indizes nach Mint, Oracle und Name aus `banks_map_by_token_index` neu auf.
+
+        Wird beim Erzeugen der Gruppe aufgerufen. Danach bauen die Lookups nur neu auf, wenn
+        die Indizes veraltet sind: nach Zuweisen von `banks_map_by_token_index`, wenn sich die
+        Anzahl der Token-Indizes geändert hat, oder nach `mark_banks_changed` (für sonstige
+        Änderungen an der bestehenden Map). `update_banks` pflegt die Indizes dagegen direkt.
+        """
+        self.banks_map_by_mint = {}
+        self.banks_map_by_oracle = {}
+        self.banks_map_by_name = {}
+        for banks in self.banks_map_by_token_index.values():
+            for bank in banks:
+                self._index_bank(bank)
+        self._bank_indexes_dirty = False
+        self._bank_indexes_token_count = len(self.banks_map_by_token_index)
+        self._bank_layout_version += 1
+
+    def _ensure_bank_indexes(self) -> None:
+        if self._bank_indexes_dirty or self._bank_indexes_token_count != len(self.banks_map_by_token_index):
+            self.rebuild_bank_indexes()
+
+    def mark_banks_changed(self) -> None:
+        """
+        Markiert die Bank-Indizes als veraltet, z.B. nach Änderungen an `banks_map_by_token_index`.
+        """
+        self._bank_indexes_dirty = True
+
+    def _index_bank(self, bank: Bank) -> None:
+        if bank.mint is not None:
+            self.banks_map_by_mint.setdefault(bank.mint.to_base58(), []).append(bank)
+        if bank.oracle is not None:
+            self.banks_map_by_oracle.setdefault(bank.oracle.to_base58(), []).append(bank)
+        self.banks_map_by_name.setdefault(bank.name, []).append(bank)
+
+    def _unindex_bank(self, bank: Bank) -> None:
+        keys = [
+            (self.banks_map_by_mint, bank.mint.to_base58() if bank.mint is not None else None),
+            (self.banks_map_by_oracle, bank.oracle.to_base58() if bank.oracle is not None else None),
+            (self.banks_map_by_name, bank.name),
+        ]
+        for index, key in keys:
+            banks = index.get(key)
+            if banks is None:
+                continue
+            banks[:] = [b for b in banks if b is not bank]
+            if not banks:
+                del index[key]
+
+    def _lookup_banks(self, index: str, key: str) -> List[Bank]:
+        self._ensure_bank_indexes()
+        return getattr(self, index).get(key, [])
+
+    def update_banks(self, banks: List[Bank]) -> None:
+        """
+        Übernimmt neu geladene Banken, z.B. nach dem erneuten Laden der Bank-Konten, und hält
+        alle Bank-Indizes aktuell.
+
+        Eine Bank ersetzt die Bank mit demselben PublicKey; unbekannte Banken werden an
+        ihren Token-Index angehängt. Geänderte Mints, Oracles oder Namen werden umsortiert.
+
+        Args:
+            banks (List[Bank]): Die neu geladenen Banken.
+        """
+        self._ensure_bank_indexes()
+        for bank in banks:
+            token_banks = self.banks_map_by_token_index.setdefault(bank.token_index, [])
+            for i, old_bank in enumerate(token_banks):
+                if old_bank.public_key == bank.public_key:
+                    self._unindex_bank(old_bank)
+                    token_banks[i] = bank
+                    break
+            else:
+                token_banks.append(bank)
+            self._index_bank(bank)
+        self._bank_indexes_token_count = len(self.banks_map_by_token_index)
+        self._bank_layout_version += 1
+
+    @property
+    def bank_layout_version(self) -> int:
+        """
+        Version der Bank-, Oracle- und PerpMarket-Zuordnung; ändert sich nach `update_banks`,
+        `mark_banks_changed` oder dem Zuweisen der Maps.
+        """
+        self._ensure_bank_indexes()
+        return self._bank_layout_version
+
+    def get_first_bank_by_token_index(self, token_index: int) -> Bank:
+        """
+        Gibt die erste Bank eines Token-Index zurück.
+        """
+        banks = self.banks_map_by_token_index.get(token_index)
+        if not banks:
+            raise ValueError(f"No bank found for token index {token_index}!")
+        return banks[0]
+
+    def get_first_bank_by_mint(self, mint_pk: PublicKey) -> Bank:
+        """
+        Gibt die erste Bank eines Mints zurück.
+        """
+        banks = self._lookup_banks('banks_map_by_mint', mint_pk.to_base58())
+        if not banks:
+            raise ValueError(f"No bank found for mint {mint_pk}!")
+        return banks[0]
+
+    def get_banks_by_oracle(self, oracle_pk: PublicKey) -> List[Bank]:
+        """
+        Gibt alle Banken zurück, die `oracle_pk` als Oracle verwenden.
+        """
+        return self._lookup_banks('banks_map_by_oracle', oracle_pk.to_base58())
+
+    def get_banks_by_name(self, name: str) -> List[Bank]:
+        """
+        Gibt alle Banken mit dem Namen `name` zurück.
+        """
+        return self._lookup_banks('banks_map_by_name', name)
+
+    def get_first_bank_by_name(self, name: str) -> Bank:
+        """
+        Gibt die erste Bank mit dem Namen `name` zurück.
+        """
+        banks = self.get_banks_by_name(name)
+        if not banks:
+            raise ValueError(f"No bank found for name {name}!")
+        return banks[0]
+
     def get_perp_market_by_market_index(self, market_index: int) -> Optional[PerpMarket]:
         """
         Gibt den PerpMarket basierend auf dem Marktindex zurück.
@@ -131,6 +687,7 @@ class HealthCheckKind(Enum):
 class MangoSignatureStatus:
     signature: str
     status: str
+    timings: Dict[str, float] = field(default_factory=dict)  # Dauer je Stufe in Sekunden
     # Fügen Sie weitere Felder hinzu, die für den Status relevant sind
 
 # ----------------------------
@@ -175,3 +732,150 @@ class PerpOrder:
     price: float
     quantity: float
     # Weitere Felder je nach Bedarf
+
+@dataclass
+class BookSide:
+    """
+    Spaltenweise Sicht auf eine Perp-Buchseite, sortiert vom besten Preis an.
+
+    Preise in Lots (Quote-Lots pro Basis-Lot), Mengen in Basis-Lots.
+    """
+    side: PerpOrderSide
+    price_lots: np.ndarray
+    quantity_lots: np.ndarray
+
+    def __post_init__(self):
+        self.price_lots = np.asarray(self.price_lots, dtype=np.int64)
+        self.quantity_lots = np.asarray(self.quantity_lots, dtype=np.int64)
+        self._cumulative_quantity = np.cumsum(self.quantity_lots)
+
+    @classmethod
+    def from_orders(cls, side: PerpOrderSide, orders: List[PerpOrder]) -> 'BookSide':
+        """
+        Baut eine Buchseite aus einzelnen Orders (`price` in Lots, `quantity` in Basis-Lots).
+        """
+        orders = sorted(orders, key=lambda order: order.price, reverse=side == PerpOrderSide.BUY)
+        return cls(side, [order.price for order in orders], [order.quantity for order in orders])
+
+    def __len__(self) -> int:
+        return len(self.price_lots)
+
+    @property
+    def cumulative_quantity(self) -> np.ndarray:
+        return self._cumulative_quantity
+
+    def best_price_lots(self) -> Optional[int]:
+        return int(self.price_lots[0]) if len(self.price_lots) else None
+
+    def impact_price_lots(self, quantity: int) -> Optional[int]:
+        """
+        Gibt den Preis der Order zurück, bei der die kumulierte Menge `quantity` erreicht.
+
+        Returns:
+            Optional[int]: Der Preis in Lots oder None ohne ausreichende Liquidität.
+        """
+        i = int(np.searchsorted(self._cumulative_quantity, quantity, side='left'))
+        return int(self.price_lots[i]) if i < len(self.price_lots) else None
+
+    def impact_prices_lots(self, quantities: np.ndarray) -> np.ndarray:
+        """
+        Vektorisierte Variante von `impact_price_lots`; fehlende Liquidität ergibt NaN.
+        """
+        i = np.searchsorted(self._cumulative_quantity, np.asarray(quantities), side='left')
+        result = np.full(i.shape, np.nan)
+        valid = i < len(self.price_lots)
+        result[valid] = self.price_lots[i[valid]]
+        return result
+
+# ----------------------------
+# Kompakte, unveränderliche Varianten
+# ----------------------------
+
+# Von `dataclass` erzeugte Attribute, die beim Ableiten einer Variante neu erzeugt werden
+_DATACLASS_GENERATED = {
+    '__dict__', '__weakref__', '__dataclass_fields__', '__dataclass_params__',
+    '__init__', '__repr__', '__eq__', '__hash__', '__setattr__', '__delattr__', '__match_args__',
+}
+
+
+def _frozen_slotted(cls: type) -> type:
+    """
+    Leitet aus einer Dataclass eine unveränderliche Variante mit `__slots__` ab.
+
+    Entspricht `dataclass(frozen=True, slots=True)` (erst ab Python 3.10 verfügbar): Methoden
+    und ClassVars werden übernommen, Instanzen haben kein `__dict__` und lassen sich pickeln.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items() if key not in _DATACLASS_GENERATED and key not in names}
+    for f in fields(cls):
+        if f.default is not MISSING:
+            namespace[f.name] = f.default
+        elif f.default_factory is not MISSING:
+            # Listen werden in der Variante zu Tupeln
+            namespace[f.name] = field(default_factory=tuple if f.default_factory is list else f.default_factory)
+    namespace['__annotations__'] = dict(cls.__annotations__)
+    frozen = dataclass(frozen=True)(type(f"Frozen{cls.__name__}", (), namespace))
+
+    # Klasse mit __slots__ neu erzeugen; Standardwerte stecken bereits im generierten __init__
+    slotted_namespace = {key: value for key, value in frozen.__dict__.items() if key not in names and key not in ('__dict__', '__weakref__')}
+    slotted_namespace['__slots__'] = names
+
+    def __getstate__(self: Any) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in names)
+
+    def __setstate__(self: Any, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(names, state):
+            object.__setattr__(self, name, value)
+
+    slotted_namespace['__getstate__'] = __getstate__
+    slotted_namespace['__setstate__'] = __setstate__
+    slotted = type(frozen.__name__, (), slotted_namespace)
+    slotted.__module__ = cls.__module__
+    return slotted
+
+
+FrozenBank = _frozen_slotted(Bank)
+FrozenTokenConditionalSwap = _frozen_slotted(TokenConditionalSwap)
+FrozenTokenPosition = _frozen_slotted(TokenPosition)
+FrozenSerum3Orders = _frozen_slotted(Serum3Orders)
+FrozenPerpPosition = _frozen_slotted(PerpPosition)
+FrozenSerum3Order = _frozen_slotted(Serum3Order)
+FrozenPerpOrder = _frozen_slotted(PerpOrder)
+FrozenMangoAccount = _frozen_slotted(MangoAccount)
+
+# Veränderliche Klasse -> unveränderliche Variante
+FROZEN_TYPES: Dict[type, type] = {
+    Bank: FrozenBank,
+    TokenConditionalSwap: FrozenTokenConditionalSwap,
+    TokenPosition: FrozenTokenPosition,
+    Serum3Orders: FrozenSerum3Orders,
+    PerpPosition: FrozenPerpPosition,
+    Serum3Order: FrozenSerum3Order,
+    PerpOrder: FrozenPerpOrder,
+    MangoAccount: FrozenMangoAccount,
+}
+MUTABLE_TYPES: Dict[type, type] = {frozen: mutable for mutable, frozen in FROZEN_TYPES.items()}
+
+
+def freeze(obj: Any) -> Any:
+    """
+    Wandelt eine Dataclass (rekursiv, Listen werden zu Tupeln) in ihre unveränderliche Variante um.
+    """
+    if isinstance(obj, list):
+        return tuple(freeze(item) for item in obj)
+    frozen_cls = FROZEN_TYPES.get(type(obj))
+    if frozen_cls is None:
+        return obj
+    return frozen_cls(**{f.name: freeze(getattr(obj, f.name)) for f in fields(obj)})
+
+
+def thaw(obj: Any) -> Any:
+    """
+    Umkehrung von `freeze`: erzeugt wieder veränderliche Dataclasses mit Listen.
+    """
+    if isinstance(obj, tuple):
+        return [thaw(item) for item in obj]
+    mutable_cls = MUTABLE_TYPES.get(type(obj))
+    if mutable_cls is None:
+        return obj
+    return mutable_cls(**{name: thaw(getattr(obj, name)) for name in obj.__slots__})
@@ -1,12 +1,15 @@
-# mango_client_py/utils.py
+# mango_client_py/utils/__init__.py
 
 from typing import Any, Callable, Dict, List, Optional, Tuple
 from solana.publickey import PublicKey
-from solana.transaction import TransactionInstruction
+from solana.transaction import AccountMeta, TransactionInstruction
 from solana.rpc.async_api import AsyncClient
 from solana.keypair import Keypair
 from solana.system_program import SYS_PROGRAM_ID, CreateAccountParams, create_account
 from solana.rpc.types import TxOpts
+from solana.utils import ed25519_base
+from spl.token.constants import TOKEN_PROGRAM_ID, ASSOCIATED_TOKEN_PROGRAM_ID
+from collections import OrderedDict
 from decimal import Decimal
 from itertools import groupby
 from operator import attrgetter
@@ -15,7 +18,7 @@ import math
 import struct
 import base64
 
-from .types import (
+from ..types import (
     Group,
     Bank,
     RecentPrioritizationFee,
@@ -30,6 +33,23 @@ from anchorpy.idl import IdlInstruction
 # Hilfsfunktionen
 # ----------------------------
 
+U64_MAX = 2 ** 64 - 1
+QUOTE_DECIMALS = 6
+
+
+def ui_price(bank: Bank) -> float:
+    """
+    Gibt den Oracle-Preis einer Bank in UI-Einheiten (USD pro Token) zurück.
+
+    Args:
+        bank (Bank): Die Bank.
+
+    Returns:
+        float: Der Preis in UI-Einheiten.
+    """
+    return bank.price * 10 ** (bank.mint_decimals - QUOTE_DECIMALS)
+
+
 def to_native(amount: Any, decimals: int) -> int:
     """
     Konvertiert einen Betrag in die native Darstellung basierend auf den Dezimalstellen.
@@ -87,10 +107,300 @@ def uniq(items: List[Any], key: Callable[[Any], Any]) -> List[Any]:
     return unique_items
 
 
+# ----------------------------
+# PDA / ATA Cache
+# ----------------------------
+
+class PdaCache:
+    """
+    Begrenzter LRU-Cache für PDA- und ATA-Ableitungen.
+
+    `find_program_address` sucht den Bump per SHA-256 und Kurvenprüfung, was
+    bei jedem Aufbau einer Transaktion erneut anfällt. Die Ergebnisse hängen nur
+    von (Art der Ableitung, Seeds, Programm) ab und werden deshalb hier zwischengespeichert.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        if max_size <= 0:
+            raise ValueError("max_size muss größer als 0 sein")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, Tuple[bytes, ...], bytes], Tuple[PublicKey, int]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """
+        Leert den Cache und setzt die Statistiken zurück.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(
+        self,
+        kind: str,
+        seeds: List[bytes],
+        program_id: PublicKey,
+        derive: Callable[[], Tuple[PublicKey, int]],
+    ) -> Tuple[PublicKey, int]:
+        # `kind` trennt find- und create-Ableitungen mit gleichen Seeds
+        key = (kind, tuple(bytes(seed) for seed in seeds), bytes(program_id))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = derive()
+        self._entries[key] = entry
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def find_program_address(
+        self,
+        seeds: List[bytes],
+        program_id: PublicKey,
+    ) -> Tuple[PublicKey, int]:
+        """
+        Gibt die PDA und den Bump für die gegebenen Seeds zurück.
+
+        Args:
+            seeds (List[bytes]): Die Seeds der PDA.
+            program_id (PublicKey): Das Programm, von dem die PDA abgeleitet wird.
+
+        Returns:
+            Tuple[PublicKey, int]: Die PDA und ihr Bump.
+        """
+        return self._lookup(
+            'find',
+            seeds,
+            program_id,
+            lambda: PublicKey.find_program_address(seeds, program_id),
+        )
+
+    def create_program_address(
+        self,
+        seeds: List[bytes],
+        program_id: PublicKey,
+    ) -> PublicKey:
+        """
+        Gibt die Adresse für Seeds mit bereits bekanntem Nonce zurück (z.B. Vault-Signer von Serum3-Märkten).
+
+        Args:
+            seeds (List[bytes]): Die Seeds inklusive Nonce.
+            program_id (PublicKey): Das Programm, von dem die Adresse abgeleitet wird.
+
+        Returns:
+            PublicKey: Die abgeleitete Adresse.
+        """
+        address, _ = self._lookup(
+            'create',
+            seeds,
+            program_id,
+            lambda: (PublicKey.create_program_address(seeds, program_id), 0),
+        )
+        return address
+
+    def get_associated_token_address(
+        self,
+        mint: PublicKey,
+        owner: PublicKey,
+        allow_owner_off_curve: bool = True,
+        program_id: PublicKey = TOKEN_PROGRAM_ID,
+        associated_token_program_id: PublicKey = ASSOCIATED_TOKEN_PROGRAM_ID,
+    ) -> PublicKey:
+        """
+        Gibt die Adresse des Associated Token Accounts für Mint und Besitzer zurück.
+
+        Args:
+            mint (PublicKey): Der Token-Mint.
+            owner (PublicKey): Der Besitzer des Token-Kontos.
+            allow_owner_off_curve (bool): Ob der Besitzer eine PDA sein darf.
+            program_id (PublicKey): Das SPL-Token-Programm.
+            associated_token_program_id (PublicKey): Das Associated-Token-Programm.
+
+        Returns:
+            PublicKey: Die Adresse des Associated Token Accounts.
+        """
+        if not allow_owner_off_curve and not ed25519_base.is_on_curve(bytes(owner)):
+            raise ValueError('TokenOwnerOffCurve!')
+
+        address, _ = self.find_program_address(
+            [bytes(owner), bytes(program_id), bytes(mint)],
+            associated_token_program_id,
+        )
+        return address
+
+    def serum3_open_orders_address(
+        self,
+        program_id: PublicKey,
+        mango_account_pk: PublicKey,
+        serum3_market_pk: PublicKey,
+    ) -> PublicKey:
+        """
+        Gibt die Open-Orders-PDA eines MangoAccounts für einen Serum3-Markt zurück.
+        """
+        address, _ = self.find_program_address(
+            [b'Serum3OO', bytes(mango_account_pk), bytes(serum3_market_pk)],
+            program_id,
+        )
+        return address
+
+    def serum3_index_reservation_address(
+        self,
+        program_id: PublicKey,
+        group_pk: PublicKey,
+        market_index: int,
+    ) -> PublicKey:
+        """
+        Gibt die Index-Reservierungs-PDA eines Serum3-Markts zurück.
+        """
+        address, _ = self.find_program_address(
+            [b'Serum3Index', bytes(group_pk), struct.pack('<H', market_index)],
+            program_id,
+        )
+        return address
+
+    def perp_market_address(
+        self,
+        program_id: PublicKey,
+        group_pk: PublicKey,
+        perp_market_index: int,
+    ) -> PublicKey:
+        """
+        Gibt die PDA eines PerpMarkets zurück.
+        """
+        address, _ = self.find_program_address(
+            [b'PerpMarket', bytes(group_pk), struct.pack('<H', perp_market_index)],
+            program_id,
+        )
+        return address
+
+    def warm_for_group(
+        self,
+        group: Group,
+        program_id: PublicKey,
+        owners: List[PublicKey],
+        mango_account_pks: Optional[List[PublicKey]] = None,
+    ) -> None:
+        """
+        Berechnet alle Ableitungen einer geladenen Gruppe im Voraus.
+
+        Für jeden Bank-Mint werden die ATAs der angegebenen Besitzer abgeleitet, für
+        jeden Serum3- und Perp-Markt die Markt-PDAs und, falls MangoAccounts übergeben
+        werden, deren Serum3-Open-Orders-PDAs.
+
+        Args:
+            group (Group): Die geladene Gruppe.
+            program_id (PublicKey): Die PublicKey des Mango-Programms.
+            owners (List[PublicKey]): Besitzer, für die ATAs abgeleitet werden.
+            mango_account_pks (Optional[List[PublicKey]]): MangoAccounts für die Open-Orders-PDAs.
+        """
+        mango_account_pks = mango_account_pks or []
+
+        mints = uniq(
+            [
+                bank.mint
+                for banks in group.banks_map_by_token_index.values()
+                for bank in banks
+                if bank.mint is not None
+            ],
+            key=lambda pk: pk.to_base58(),
+        )
+        for mint in mints:
+            for owner in owners:
+                self.get_associated_token_address(mint, owner)
+
+        for serum3_market in group.serum3_markets_map_by_market_index.values():
+            self.serum3_index_reservation_address(program_id, group.public_key, serum3_market.market_index)
+            for mango_account_pk in mango_account_pks:
+                self.serum3_open_orders_address(program_id, mango_account_pk, serum3_market.public_key)
+
+        for perp_market in group.perp_markets_map_by_market_index.values():
+            self.perp_market_address(program_id, group.public_key, perp_market.market_index)
+
+
+DEFAULT_PDA_CACHE = PdaCache()
+
+
+def get_associated_token_address(
+    mint: PublicKey,
+    owner: PublicKey,
+    allow_owner_off_curve: bool = True,
+) -> PublicKey:
+    """
+    Gibt die ATA-Adresse über den prozessweiten Standard-Cache zurück.
+
+    Args:
+        mint (PublicKey): Der Token-Mint.
+        owner (PublicKey): Der Besitzer des Token-Kontos.
+        allow_owner_off_curve (bool): Ob der Besitzer eine PDA sein darf.
+
+    Returns:
+        PublicKey: Die Adresse des Associated Token Accounts.
+    """
+    return DEFAULT_PDA_CACHE.get_associated_token_address(mint, owner, allow_owner_off_curve)
+
+
 # ----------------------------
 # Transaction Instructions
 # ----------------------------
 
+COMPUTE_BUDGET_PROGRAM_ID = PublicKey("ComputeBudget111111111111111111111111111111")
+
+
+def set_compute_unit_limit_ix(units: int) -> TransactionInstruction:
+    """
+    Erstellt die ComputeBudget-Anweisung SetComputeUnitLimit.
+
+    Args:
+        units (int): Das Compute-Unit-Limit der Transaktion.
+
+    Returns:
+        TransactionInstruction: Die ComputeBudget-Anweisung.
+    """
+    return TransactionInstruction(
+        keys=[],
+        program_id=COMPUTE_BUDGET_PROGRAM_ID,
+        data=struct.pack('<BI', 2, units),
+    )
+
+
+async def create_associated_token_account_idempotent_instruction(
+    payer: PublicKey,
+    owner: PublicKey,
+    mint: PublicKey,
+) -> TransactionInstruction:
+    """
+    Erstellt die `CreateIdempotent`-Anweisung des Associated-Token-Programms.
+
+    Args:
+        payer (PublicKey): Zahlt die Miete des neuen Kontos.
+        owner (PublicKey): Besitzer des Token-Kontos.
+        mint (PublicKey): Der Token-Mint.
+
+    Returns:
+        TransactionInstruction: Die Anweisung; existiert das Konto bereits, ist sie wirkungslos.
+    """
+    return TransactionInstruction(
+        keys=[
+            AccountMeta(pubkey=payer, is_signer=True, is_writable=True),
+            AccountMeta(pubkey=get_associated_token_address(mint, owner), is_signer=False, is_writable=True),
+            AccountMeta(pubkey=owner, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=mint, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=SYS_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
+        ],
+        program_id=ASSOCIATED_TOKEN_PROGRAM_ID,
+        data=bytes([1]),
+    )
+
+
 async def account_expand_v2_ix(
     group: Group,
     account: 'MangoAccount',
@@ -218,9 +528,13 @@ def compute_premium(
     max_sell_native: int,
     max_buy: float,
     max_sell: float,
+    price_impact_fn: Optional[Callable[[int, float], float]] = None,
 ) -> float:
     """
-    Berechnet den Preisaufschlag für den Conditional Swap.
+    Berechnet die vorgeschlagene Prämie (in Prozent) für einen Conditional Swap.
+
+    Wie in `TokenConditionalSwap.computePremium` (TS) wird die Prämie aus dem
+    Preis-Impact beider Token für eine typische Liquidator-Chunkgröße abgeleitet.
 
     Args:
         group (Group): Die Gruppe, zu der der Markt gehört.
@@ -230,15 +544,30 @@ def compute_premium(
         max_sell_native (int): Maximale Verkaufmenge in nativer Darstellung.
         max_buy (float): Maximale Kaufmenge.
         max_sell (float): Maximale Verkaufmenge.
+        price_impact_fn (Optional[Callable[[int, float], float]]): Liefert den Preis-Impact in Prozent für (Token-Index, USD-Betrag).
 
     Returns:
-        float: Der berechnete Preisaufschlag.
+        float: Die Prämie in Prozent.
     """
-    # Implementieren Sie die tatsächliche Logik entsprechend Ihrer TypeScript-Implementierung
-    # Beispielhafte Logik:
-    premium = (max_buy_native / (10 ** buy_bank.mint_decimals)) * 0.01 + \
-              (max_sell_native / (10 ** sell_bank.mint_decimals)) * 0.02
-    return premium
+    if price_impact_fn is None:
+        raise ValueError('Price impact data is required to compute the premium')
+
+    buy_amount_in_usd = (
+        max_buy * ui_price(buy_bank) if max_buy_native != U64_MAX else math.inf
+    )
+    sell_amount_in_usd = (
+        max_sell * ui_price(sell_bank) if max_sell_native != U64_MAX else math.inf
+    )
+
+    # Chunkgröße, mit der ein Liquidator den Swap typischerweise ausführt
+    liqor_tcs_chunk_size_in_usd = 5000 if min(buy_amount_in_usd, sell_amount_in_usd) > 5000 else 1000
+
+    buy_token_price_impact = price_impact_fn(buy_bank.token_index, liqor_tcs_chunk_size_in_usd)
+    sell_token_price_impact = price_impact_fn(sell_bank.token_index, liqor_tcs_chunk_size_in_usd)
+    if buy_token_price_impact <= 0 or sell_token_price_impact <= 0:
+        raise ValueError('Error computing slippage/premium for token conditional swap!')
+
+    return ((1 + buy_token_price_impact / 100) * (1 + sell_token_price_impact / 100) - 1) * 100
 
 
 # ----------------------------
@@ -265,11 +594,10 @@ async def derive_fallback_oracle_contexts(
         # Fixed Fallbacks
         oracles = []
         fallbacks = []
-        for banks in group.banks_map_by_token_index.values():
-            for bank in banks:
-                if bank.oracle in fallback_oracle_config:
-                    oracles.append(bank.oracle)
-                    fallbacks.append(bank.fallback_oracle)
+        for oracle in uniq(fallback_oracle_config, key=lambda pk: pk.to_base58()):
+            for bank in group.get_banks_by_oracle(oracle):
+                oracles.append(bank.oracle)
+                fallbacks.append(bank.fallback_oracle)
         return await create_fallback_oracle_map(connection, oracles, fallbacks)
     elif fallback_oracle_config == 'never':
         return {}
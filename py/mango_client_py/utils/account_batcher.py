@@ -0,0 +1,147 @@
+# mango_client_py/utils/account_batcher.py
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+MAX_MULTIPLE_ACCOUNTS = 100
+
+MakeRequest = Callable[..., Awaitable[Any]]
+BatchKey = Tuple[Optional[str], str]  # (Commitment, Encoding)
+
+
+class AccountReadBatcher:
+    """
+    Fasst gleichzeitige `getAccountInfo`-Anfragen zusammen.
+
+    Gleichzeitige Anfragen für denselben PublicKey mit demselben Commitment teilen sich
+    eine laufende Anfrage und deren Ergebnis (Single-Flight). Alle Anfragen, die im
+    selben Durchlauf der Event-Loop eingehen (oder innerhalb von `window_seconds`),
+    werden zu `getMultipleAccounts`-Aufrufen mit bis zu 100 Konten gebündelt. Die
+    Antworten werden wieder in das Format von `getAccountInfo` umgewandelt, sodass
+    Aufrufer keinen Unterschied sehen.
+
+    Anfragen mit weiteren Optionen (z.B. `dataSlice`, `minContextSlot`) oder einer
+    anderen Kodierung als base64 werden unverändert durchgereicht.
+
+    Args:
+        make_request (MakeRequest): Der darunterliegende `make_request` des Providers.
+        max_batch_size (int): Höchstzahl an Konten je `getMultipleAccounts`.
+        window_seconds (float): Sammelzeit; 0 bündelt nur Anfragen desselben Durchlaufs.
+        metrics (Optional[MetricsRegistry]): Registry für `rpc_coalesced_total` und `rpc_batched_total`.
+    """
+
+    def __init__(
+        self,
+        make_request: MakeRequest,
+        max_batch_size: int = MAX_MULTIPLE_ACCOUNTS,
+        window_seconds: float = 0.0,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.make_request = make_request
+        self.max_batch_size = min(max_batch_size, MAX_MULTIPLE_ACCOUNTS)
+        self.window_seconds = window_seconds
+        self.metrics = metrics
+        self._in_flight: Dict[Tuple[str, BatchKey], asyncio.Future] = {}
+        self._pending: Dict[BatchKey, List[str]] = {}
+        self._flush_scheduled = False
+        self.coalesced = 0
+        self.batched = 0
+        self.batches = 0
+
+    @staticmethod
+    def _batch_key(params: Tuple[Any, ...]) -> Optional[BatchKey]:
+        if len(params) != 2 or not isinstance(params[0], str) or not isinstance(params[1], dict):
+            return None
+        opts = params[1]
+        encoding = opts.get('encoding', 'base64')
+        if encoding != 'base64' or set(opts) - {'encoding', 'commitment'}:
+            return None
+        return (opts.get('commitment'), encoding)
+
+    async def get_account_info(self, method: Any, params: Tuple[Any, ...]) -> Any:
+        """
+        Liefert die `getAccountInfo`-Antwort für `params`, gebündelt oder zusammengefasst, wenn möglich.
+        """
+        batch_key = self._batch_key(params)
+        if batch_key is None:
+            return await self.make_request(method, *params)
+
+        pubkey = params[0]
+        key = (pubkey, batch_key)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            if self.metrics is not None:
+                self.metrics.inc('rpc_coalesced_total', method='getAccountInfo')
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            self._pending.setdefault(batch_key, []).append(pubkey)
+            self._schedule_flush()
+        # shield: Abbruch eines Aufrufers darf die geteilte Anfrage nicht abbrechen
+        return await asyncio.shield(future)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_scheduled:
+            return
+        self._flush_scheduled = True
+        loop = asyncio.get_running_loop()
+        if self.window_seconds > 0:
+            loop.call_later(self.window_seconds, self._flush)
+        else:
+            loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        for batch_key, pubkeys in pending.items():
+            for i in range(0, len(pubkeys), self.max_batch_size):
+                asyncio.ensure_future(self._fetch(batch_key, pubkeys[i:i + self.max_batch_size]))
+
+    def _resolve(self, key: Tuple[str, BatchKey], result: Any = None, error: Optional[BaseException] = None) -> None:
+        future = self._in_flight.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _fetch(self, batch_key: BatchKey, pubkeys: List[str]) -> None:
+        commitment, encoding = batch_key
+        opts: Dict[str, Any] = {'encoding': encoding}
+        if commitment is not None:
+            opts['commitment'] = commitment
+        try:
+            if len(pubkeys) == 1:
+                self._resolve((pubkeys[0], batch_key), await self.make_request('getAccountInfo', pubkeys[0], opts))
+                return
+
+            self.batches += 1
+            self.batched += len(pubkeys)
+            if self.metrics is not None:
+                self.metrics.inc('rpc_batched_total', len(pubkeys), method='getAccountInfo')
+            response = await self.make_request('getMultipleAccounts', pubkeys, opts)
+            if 'error' in response:
+                for pubkey in pubkeys:
+                    self._resolve((pubkey, batch_key), response)
+                return
+            context = response['result']['context']
+            values = response['result']['value']
+            for pubkey, value in zip(pubkeys, values):
+                self._resolve(
+                    (pubkey, batch_key),
+                    {'jsonrpc': response.get('jsonrpc', '2.0'), 'id': response.get('id'), 'result': {'context': context, 'value': value}},
+                )
+        except Exception as e:
+            for pubkey in pubkeys:
+                self._resolve((pubkey, batch_key), error=e)
+        finally:
+            # Nicht beantwortete Konten (z.B. kürzere Antwortliste) nicht hängen lassen
+            for pubkey in pubkeys:
+                self._resolve((pubkey, batch_key), error=RuntimeError(f"No response for account {pubkey}"))
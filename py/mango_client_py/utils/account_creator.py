@@ -6,7 +6,7 @@ from spl.token.async_client import AsyncToken
 from solana.transaction import Transaction
 from spl.token.constants import TOKEN_PROGRAM_ID
 from typing import Any
-from .utils import unpack_account
+from solana.publickey import PublicKey
 
 async def create_account(
     conn: AsyncClient,
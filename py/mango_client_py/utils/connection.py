@@ -1,10 +1,169 @@
 # mango_client_py/utils/connection.py
 
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import RPCMethod
 from solana.publickey import PublicKey
-from typing import List, Dict, Any
+
+from ..metrics import LatencyHistogram, MetricsRegistry
+from .account_batcher import AccountReadBatcher
+from .rate_limit import RpcRateLimiter
+
+
+@dataclass
+class RpcCallStats:
+    calls: int = 0
+    errors: int = 0
+    response_bytes: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
 
 class CustomAsyncClient(AsyncClient):
+    """
+    AsyncClient, der jeden RPC-Aufruf je Methode und Endpoint zählt.
+
+    Erfasst werden Aufrufe, Fehler (Exceptions und JSON-RPC-Fehler), Antwortgrößen in
+    Bytes und Latenzen. Dazu werden `make_request` und `_after_request` des Providers
+    umschlossen, sodass alle Methoden des AsyncClient ohne eigene Überschreibung
+    erfasst werden. Ist `metrics` gesetzt, landen die Werte zusätzlich in der Registry
+    (und damit im Prometheus-Exporter).
+
+    Ist ein `rate_limiter` gesetzt, wartet jeder Aufruf vorher auf ein Token seiner
+    Prioritätsklasse (siehe `rpc_priority`); die Wartezeit zählt nicht zur Latenz.
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        commitment: Optional[Any] = None,
+        timeout: float = 10,
+        metrics: Optional[MetricsRegistry] = None,
+        rate_limiter: Optional[RpcRateLimiter] = None,
+    ):
+        super().__init__(endpoint, commitment, timeout=timeout)
+        self.endpoint = endpoint or ''
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self.account_batcher: Optional[AccountReadBatcher] = None
+        self._rpc_stats: Dict[Tuple[str, str], RpcCallStats] = {}
+        self._instrument_provider()
+
+    def _instrument_provider(self) -> None:
+        provider = self._provider
+        make_request = provider.make_request
+        after_request = provider._after_request
+
+        async def instrumented_make_request(method: RPCMethod, *params: Any) -> Any:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_for_method(str(method))
+            start = time.monotonic()
+            ok = False
+            try:
+                response = await make_request(method, *params)
+                ok = not (isinstance(response, dict) and 'error' in response)
+                return response
+            finally:
+                self.record_rpc_call(str(method), time.monotonic() - start, ok)
+
+        def instrumented_after_request(raw_response: Any, method: RPCMethod) -> Any:
+            self.record_rpc_response_bytes(str(method), len(raw_response.content))
+            return after_request(raw_response=raw_response, method=method)
+
+        provider.make_request = instrumented_make_request
+        provider._after_request = instrumented_after_request
+
+    def set_rate_limit(self, rate: float, burst: Optional[float] = None) -> None:
+        """
+        Begrenzt die Aufrufe auf `rate` pro Sekunde mit bis zu `burst` Aufrufen am Stück.
+        """
+        self.rate_limiter = RpcRateLimiter(rate, burst, self.metrics, self.endpoint)
+
+    def enable_account_batching(self, max_batch_size: int = 100, window_seconds: float = 0.0) -> AccountReadBatcher:
+        """
+        Fasst gleichzeitige `getAccountInfo`-Anfragen zusammen und bündelt sie zu `getMultipleAccounts`.
+
+        Der Batcher liegt über Ratenbegrenzung und Erfassung; ein gebündelter Aufruf
+        zählt daher als ein RPC-Aufruf und verbraucht ein Token.
+        """
+        if self.account_batcher is not None:
+            return self.account_batcher
+        provider = self._provider
+        make_request = provider.make_request
+        batcher = AccountReadBatcher(make_request, max_batch_size, window_seconds, self.metrics)
+
+        async def batched_make_request(method: RPCMethod, *params: Any) -> Any:
+            if str(method) == 'getAccountInfo':
+                return await batcher.get_account_info(method, params)
+            return await make_request(method, *params)
+
+        provider.make_request = batched_make_request
+        self.account_batcher = batcher
+        return batcher
+
+    def _stats_for(self, method: str, endpoint: Optional[str] = None) -> RpcCallStats:
+        key = (method, self.endpoint if endpoint is None else endpoint)
+        stats = self._rpc_stats.get(key)
+        if stats is None:
+            stats = self._rpc_stats[key] = RpcCallStats()
+        return stats
+
+    def record_rpc_call(self, method: str, seconds: float, ok: bool = True, endpoint: Optional[str] = None) -> None:
+        """
+        Erfasst einen RPC-Aufruf; auch für Anfragen, die nicht über den Provider laufen (z.B. Batches).
+        """
+        endpoint = self.endpoint if endpoint is None else endpoint
+        stats = self._stats_for(method, endpoint)
+        stats.calls += 1
+        stats.latency.record(seconds)
+        if not ok:
+            stats.errors += 1
+        if self.metrics is not None:
+            self.metrics.observe('rpc_seconds', seconds, method=method, endpoint=endpoint)
+            self.metrics.inc('rpc_calls_total', method=method, endpoint=endpoint)
+            if not ok:
+                self.metrics.inc('rpc_errors_total', method=method, endpoint=endpoint)
+
+    def record_rpc_response_bytes(self, method: str, num_bytes: int, endpoint: Optional[str] = None) -> None:
+        endpoint = self.endpoint if endpoint is None else endpoint
+        self._stats_for(method, endpoint).response_bytes += num_bytes
+        if self.metrics is not None:
+            self.metrics.inc('rpc_response_bytes_total', num_bytes, method=method, endpoint=endpoint)
+
+    def rpc_stats_snapshot(self, percentiles: Tuple[float, ...] = (50.0, 99.0)) -> List[Dict[str, Any]]:
+        """
+        Gibt eine Zeile je (Methode, Endpoint) zurück, absteigend nach Anzahl der Aufrufe.
+
+        Es werden nur Zähler kopiert und die gewünschten Perzentile gelesen; ohne
+        `percentiles` ist der Aufruf praktisch kostenlos.
+
+        Args:
+            percentiles (Tuple[float, ...]): Latenz-Perzentile in Sekunden, z.B. (50.0, 99.0).
+
+        Returns:
+            List[Dict[str, Any]]: method, endpoint, calls, errors, response_bytes, latency_sum und p<N>.
+        """
+        rows = []
+        for (method, endpoint), stats in self._rpc_stats.items():
+            row: Dict[str, Any] = {
+                'method': method,
+                'endpoint': endpoint,
+                'calls': stats.calls,
+                'errors': stats.errors,
+                'response_bytes': stats.response_bytes,
+                'latency_sum': stats.latency.total_us / 1e6,
+            }
+            for p in percentiles:
+                row[f"p{p:g}"] = stats.latency.percentile(p)
+            rows.append(row)
+        rows.sort(key=lambda row: row['calls'], reverse=True)
+        return rows
+
+    def reset_rpc_stats(self) -> None:
+        self._rpc_stats.clear()
+
     async def get_recent_prioritization_fees(
         self,
         locked_writable_accounts: List[PublicKey],
@@ -18,12 +177,9 @@ class CustomAsyncClient(AsyncClient):
         Returns:
             List[Dict[str, Any]]: Liste der Gebühreninformationen.
         """
-        # Implementieren Sie die tatsächliche Logik, um die Gebühren von der Solana-API abzurufen.
-        # Dies ist ein Platzhalter und muss an die spezifische API angepasst werden.
-        # Beispiel:
-        response = await self.rpc_request(
-            "getRecentPrioritizationFees",
-            [account.to_base58() for account in locked_writable_accounts]
+        response = await self._provider.make_request(
+            RPCMethod("getRecentPrioritizationFees"),
+            [account.to_base58() for account in locked_writable_accounts],
         )
         if 'result' in response:
             return response['result']
@@ -0,0 +1,179 @@
+# mango_client_py/utils/rate_limit.py
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..metrics import MetricsRegistry
+
+# ----------------------------
+# Prioritäten
+# ----------------------------
+
+class RpcPriority(IntEnum):
+    """
+    Prioritätsklassen für RPC-Aufrufe; kleinere Werte werden zuerst bedient.
+    """
+    CRITICAL = 0  # Senden und Bestätigen von Transaktionen
+    ORACLE = 1    # Oracle-Aktualisierungen
+    NORMAL = 2    # Übrige Lesezugriffe
+    BULK = 3      # Scans wie getProgramAccounts
+
+
+METHOD_PRIORITIES = {
+    'sendTransaction': RpcPriority.CRITICAL,
+    'simulateTransaction': RpcPriority.CRITICAL,
+    'getSignatureStatuses': RpcPriority.CRITICAL,
+    'getLatestBlockhash': RpcPriority.CRITICAL,
+    'getRecentBlockhash': RpcPriority.CRITICAL,
+    'getRecentPrioritizationFees': RpcPriority.CRITICAL,
+    'getProgramAccounts': RpcPriority.BULK,
+}
+
+_rpc_priority: ContextVar[Optional[RpcPriority]] = ContextVar('rpc_priority', default=None)
+
+
+@contextmanager
+def rpc_priority(priority: RpcPriority) -> Iterator[None]:
+    """
+    Setzt die Priorität aller RPC-Aufrufe im aktuellen Kontext (auch in daraus gestarteten Tasks).
+
+    Beispiel:
+        with rpc_priority(RpcPriority.BULK):
+            await client.connection.get_program_accounts(...)
+    """
+    token = _rpc_priority.set(priority)
+    try:
+        yield
+    finally:
+        _rpc_priority.reset(token)
+
+
+def priority_for_method(method: str) -> RpcPriority:
+    """
+    Gibt die Priorität aus dem Kontext zurück, sonst die Standardpriorität der Methode.
+    """
+    priority = _rpc_priority.get()
+    if priority is not None:
+        return priority
+    return METHOD_PRIORITIES.get(method, RpcPriority.NORMAL)
+
+# ----------------------------
+# Token Bucket
+# ----------------------------
+
+class RpcRateLimiter:
+    """
+    Token-Bucket mit Prioritätswarteschlange.
+
+    Solange Tokens vorhanden sind und niemand wartet, kostet `acquire` keine Wartezeit.
+    Andernfalls wird der Aufruf eingereiht und nicht verworfen; freiwerdende Tokens
+    gehen immer an den wartenden Aufruf mit der höchsten Priorität (bei gleicher Priorität
+    in Ankunftsreihenfolge). Die Wartezeit wird als `rpc_queue_delay_seconds{priority}`
+    erfasst.
+
+    Args:
+        rate (float): Tokens pro Sekunde.
+        burst (Optional[float]): Größe des Buckets; Standard ist `rate` (mindestens 1).
+        metrics (Optional[MetricsRegistry]): Registry für Wartezeit und Anzahl eingereihter Aufrufe.
+        name (str): Label zur Unterscheidung mehrerer Limiter, z.B. der Endpoint.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        name: str = '',
+    ):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.metrics = metrics
+        self.name = name
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, _, future in self._waiters if not future.done())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters:
+            _, _, cost, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < cost:
+                break
+            heapq.heappop(self._waiters)
+            self._tokens -= cost
+            future.set_result(None)
+        if self._waiters and self._timer is None:
+            cost = self._waiters[0][2]
+            delay = max((cost - self._tokens) / self.rate, 0.0)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _record(self, priority: RpcPriority, delay: float) -> None:
+        if self.metrics is not None:
+            labels = {'priority': priority.name.lower()}
+            if self.name:
+                labels['endpoint'] = self.name
+            self.metrics.observe('rpc_queue_delay_seconds', delay, **labels)
+            if delay > 0:
+                self.metrics.inc('rpc_queued_total', **labels)
+
+    async def acquire(self, priority: RpcPriority = RpcPriority.NORMAL, cost: float = 1.0) -> float:
+        """
+        Wartet, bis `cost` Tokens verfügbar sind.
+
+        Returns:
+            float: Die Wartezeit in Sekunden.
+        """
+        cost = min(cost, self.burst)
+        self._refill()
+        if not self._waiters and self._tokens >= cost:
+            self._tokens -= cost
+            self._record(priority, 0.0)
+            return 0.0
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), cost, future))
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Token bereits zugeteilt, aber nicht verwendet
+                self._tokens = min(self.burst, self._tokens + cost)
+            raise
+        delay = time.monotonic() - start
+        self._record(priority, delay)
+        return delay
+
+    async def acquire_for_method(self, method: str) -> float:
+        return await self.acquire(priority_for_method(method))
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill()
+        return {'name': self.name, 'tokens': self._tokens, 'queue_depth': self.queue_depth}
@@ -0,0 +1,325 @@
+# mango_client_py/utils/rpc_pool.py
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .connection import CustomAsyncClient
+from ..metrics import LatencyHistogram, MetricsRegistry
+from .rate_limit import RpcRateLimiter
+from .snapshot import MIN_CONTEXT_SLOT_NOT_REACHED
+
+logger = logging.getLogger(__name__)
+
+# Methoden, die nicht abgesichert (hedged) oder wiederholt werden dürfen
+WRITE_METHODS = {'sendTransaction', 'requestAirdrop'}
+
+
+def _min_context_slot(params: List[Any]) -> Optional[int]:
+    if params and isinstance(params[-1], dict):
+        return params[-1].get('minContextSlot')
+    return None
+
+
+def _is_min_context_slot_error(response: Any) -> bool:
+    return isinstance(response, dict) and isinstance(response.get('error'), dict) \
+        and response['error'].get('code') == MIN_CONTEXT_SLOT_NOT_REACHED
+
+# ----------------------------
+# Endpoints
+# ----------------------------
+
+class RpcEndpoint:
+    """
+    Ein RPC-Endpoint mit persistenter HTTP-Session und gleitender Bewertung.
+
+    Latenz und Fehlerrate werden als exponentiell gleitende Mittel geführt, der
+    Slot-Rückstand über `PooledAsyncClient.refresh_slots`.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0, http2: bool = True, ewma_alpha: float = 0.2):
+        self.url = url
+        self.ewma_alpha = ewma_alpha
+        self.session = self._create_session(timeout, http2)
+        self.latency = LatencyHistogram()
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.slot = 0
+        self.in_flight = 0
+        self.rate_limiter: Optional[RpcRateLimiter] = None
+
+    @staticmethod
+    def _create_session(timeout: float, http2: bool) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60.0)
+        headers = {'Content-Type': 'application/json'}
+        if http2:
+            try:
+                return httpx.AsyncClient(http2=True, timeout=timeout, limits=limits, headers=headers)
+            except ImportError:
+                logger.warning("HTTP/2 requires the 'h2' package, falling back to HTTP/1.1 keep-alive")
+        return httpx.AsyncClient(timeout=timeout, limits=limits, headers=headers)
+
+    def observe(self, seconds: float, ok: bool) -> None:
+        alpha = self.ewma_alpha
+        self.latency.record(seconds)
+        self.latency_ewma = seconds if self.latency_ewma is None else (1 - alpha) * self.latency_ewma + alpha * seconds
+        self.error_ewma = (1 - alpha) * self.error_ewma + alpha * (0.0 if ok else 1.0)
+
+    def score(
+        self,
+        max_slot: int,
+        default_latency: float = 0.1,
+        error_penalty: float = 10.0,
+        slot_lag_penalty: float = 0.1,
+    ) -> float:
+        """
+        Gibt die erwartete Kosten eines Aufrufs in Sekunden zurück; kleiner ist besser.
+
+        Args:
+            max_slot (int): Höchster bekannter Slot aller Endpoints.
+            default_latency (float): Angenommene Latenz ohne Messungen.
+            error_penalty (float): Multiplikator der Latenz je Fehlerrate.
+            slot_lag_penalty (float): Aufschlag in Sekunden je Slot Rückstand.
+        """
+        latency = default_latency if self.latency_ewma is None else self.latency_ewma
+        slot_lag = max(max_slot - self.slot, 0) if self.slot else 0
+        return latency * (1 + error_penalty * self.error_ewma) + slot_lag * slot_lag_penalty
+
+    def __repr__(self) -> str:
+        return f"RpcEndpoint(url={self.url!r}, latency_ewma={self.latency_ewma}, error_ewma={self.error_ewma:.3f}, slot={self.slot})"
+
+
+class _PoolProvider:
+    """
+    Ersetzt den HTTP-Provider des AsyncClient und leitet jede Anfrage an den Pool weiter.
+    """
+
+    def __init__(self, pool: 'PooledAsyncClient'):
+        self.pool = pool
+
+    async def make_request(self, method: Any, *params: Any) -> Any:
+        return await self.pool.pooled_request(str(method), list(params))
+
+    async def is_connected(self) -> bool:
+        return any(endpoint.error_ewma < 0.5 for endpoint in self.pool.endpoints)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(endpoint.session.aclose() for endpoint in self.pool.endpoints))
+
+    async def __aenter__(self) -> '_PoolProvider':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+# ----------------------------
+# Pool
+# ----------------------------
+
+class PooledAsyncClient(CustomAsyncClient):
+    """
+    AsyncClient über mehrere RPC-Endpoints mit bewerteter Endpoint-Auswahl.
+
+    Lesende Anfragen gehen an den Endpoint mit der besten Bewertung aus Latenz,
+    Fehlerrate und Slot-Rückstand. Ist `hedge_percentile` gesetzt und dauert eine
+    Leseanfrage länger als dieses Latenz-Perzentil des Endpoints, wird sie zusätzlich an
+    den zweitbesten Endpoint gesendet und die erste erfolgreiche Antwort verwendet.
+    Schlägt eine Leseanfrage mit einer Exception fehl, wird sie einmal auf dem nächsten
+    Endpoint wiederholt. Schreibende Anfragen (`sendTransaction`) werden weder
+    abgesichert noch wiederholt.
+
+    Die Slot-Abfrage (`start`) beginnt automatisch mit der ersten Anfrage, sofern sie
+    nicht mit `stop` beendet wurde.
+
+    Da der Pool ein AsyncClient ist, kann er unter `MangoClient.connection` eingesetzt
+    werden (siehe `MangoClientOptions.rpc_endpoints`). Ratenbegrenzungen gelten je
+    Endpoint (`set_rate_limit`), da auch die Limits der Anbieter je Endpoint gelten.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        commitment: Optional[Any] = None,
+        timeout: float = 10,
+        metrics: Optional[MetricsRegistry] = None,
+        hedge_percentile: Optional[float] = 95.0,
+        hedge_min_delay: float = 0.02,
+        hedge_default_delay: float = 0.25,
+        hedge_min_samples: int = 20,
+        slot_refresh_interval: float = 2.0,
+        http2: bool = True,
+    ):
+        if not endpoints:
+            raise ValueError('At least one endpoint is required')
+        self.endpoints = [RpcEndpoint(url, timeout, http2) for url in endpoints]
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.slot_refresh_interval = slot_refresh_interval
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self._request_ids = itertools.count(1)
+        self._slot_task: Optional[asyncio.Task] = None
+        self._slot_polling_stopped = False
+        self._replaced_provider: Any = None
+        super().__init__(endpoints[0], commitment, timeout, metrics)
+        self.endpoint = ','.join(endpoints)
+
+    def _instrument_provider(self) -> None:
+        # Der Pool erfasst jeden Aufruf selbst, mit dem tatsächlich verwendeten Endpoint;
+        # der vom AsyncClient angelegte HTTP-Provider wird in `close` geschlossen
+        self._replaced_provider = self._provider
+        self._provider = _PoolProvider(self)
+
+    def set_rate_limit(self, rate: float, burst: Optional[float] = None) -> None:
+        for endpoint in self.endpoints:
+            endpoint.rate_limiter = RpcRateLimiter(rate, burst, self.metrics, endpoint.url)
+
+    def ranked_endpoints(self) -> List[RpcEndpoint]:
+        max_slot = max(endpoint.slot for endpoint in self.endpoints)
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score(max_slot))
+
+    def hedge_delay(self, endpoint: RpcEndpoint) -> float:
+        if endpoint.latency.count < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, endpoint.latency.percentile(self.hedge_percentile))
+
+    async def _send(self, endpoint: RpcEndpoint, method: str, params: List[Any]) -> Any:
+        rate_limiter = endpoint.rate_limiter or self.rate_limiter
+        if rate_limiter is not None:
+            await rate_limiter.acquire_for_method(method)
+        body = {'jsonrpc': '2.0', 'id': next(self._request_ids), 'method': method, 'params': params}
+        start = time.monotonic()
+        ok = False
+        endpoint.in_flight += 1
+        try:
+            response = await endpoint.session.post(endpoint.url, json=body)
+            response.raise_for_status()
+            self.record_rpc_response_bytes(method, len(response.content), endpoint.url)
+            data = response.json()
+            ok = 'error' not in data
+            return data
+        finally:
+            endpoint.in_flight -= 1
+            seconds = time.monotonic() - start
+            endpoint.observe(seconds, ok)
+            self.record_rpc_call(method, seconds, ok, endpoint.url)
+
+    async def pooled_request(self, method: str, params: List[Any]) -> Any:
+        """
+        Sendet eine JSON-RPC-Anfrage an den besten Endpoint, bei Lesezugriffen mit Absicherung.
+        """
+        if self._slot_task is None and not self._slot_polling_stopped:
+            self.start()
+        ranked = self.ranked_endpoints()
+        if method in WRITE_METHODS or len(ranked) == 1:
+            return await self._send(ranked[0], method, params)
+
+        min_context_slot = _min_context_slot(params)
+        if min_context_slot is not None:
+            # Endpoints, die den Slot bekanntermaßen noch nicht erreicht haben, zuletzt
+            ranked.sort(key=lambda endpoint: 0 < endpoint.slot < min_context_slot)
+
+        if self.hedge_percentile is None:
+            try:
+                response = await self._send(ranked[0], method, params)
+            except Exception as e:
+                logger.warning(f"RPC {method} failed on {ranked[0].url}, retrying on {ranked[1].url}: {e}")
+                response = await self._send(ranked[1], method, params)
+        else:
+            response = await self._hedged_request(ranked[0], ranked[1], method, params)
+
+        for endpoint in ranked[1:]:
+            if not _is_min_context_slot_error(response):
+                break
+            response = await self._send(endpoint, method, params)
+        return response
+
+    async def _hedged_request(self, primary: RpcEndpoint, secondary: RpcEndpoint, method: str, params: List[Any]) -> Any:
+        primary_task = asyncio.ensure_future(self._send(primary, method, params))
+        done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay(primary))
+        if done and primary_task.exception() is None:
+            return primary_task.result()
+
+        self.hedged_requests += 1
+        if self.metrics is not None:
+            self.metrics.inc('rpc_hedged_total', method=method)
+        secondary_task = asyncio.ensure_future(self._send(secondary, method, params))
+        tasks = {secondary_task} if done else {primary_task, secondary_task}
+        last_error: Optional[BaseException] = primary_task.exception() if done else None
+        try:
+            while tasks:
+                finished, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    if task.exception() is None:
+                        if task is secondary_task:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def refresh_slots(self) -> Dict[str, int]:
+        """
+        Fragt `getSlot` auf allen Endpoints ab und aktualisiert deren Slot-Rückstand.
+        """
+        async def refresh(endpoint: RpcEndpoint) -> None:
+            try:
+                data = await self._send(endpoint, 'getSlot', [{'commitment': 'processed'}])
+                if 'result' in data:
+                    endpoint.slot = int(data['result'])
+            except Exception as e:
+                logger.warning(f"getSlot failed on {endpoint.url}: {e}")
+        await asyncio.gather(*(refresh(endpoint) for endpoint in self.endpoints))
+        return {endpoint.url: endpoint.slot for endpoint in self.endpoints}
+
+    async def _slot_loop(self) -> None:
+        while True:
+            await self.refresh_slots()
+            await asyncio.sleep(self.slot_refresh_interval)
+
+    def start(self) -> None:
+        """
+        Startet die regelmäßige Slot-Abfrage in der laufenden Event-Loop.
+        """
+        self._slot_polling_stopped = False
+        if self._slot_task is None or self._slot_task.done():
+            self._slot_task = asyncio.get_running_loop().create_task(self._slot_loop())
+
+    async def stop(self) -> None:
+        self._slot_polling_stopped = True
+        if self._slot_task is not None:
+            self._slot_task.cancel()
+            try:
+                await self._slot_task
+            except asyncio.CancelledError:
+                pass
+            self._slot_task = None
+
+    async def close(self) -> None:
+        await self.stop()
+        await self._provider.close()
+        if self._replaced_provider is not None:
+            await self._replaced_provider.close()
+            self._replaced_provider = None
+
+    def endpoint_snapshot(self) -> List[Dict[str, Any]]:
+        max_slot = max(endpoint.slot for endpoint in self.endpoints)
+        return [
+            {
+                'url': endpoint.url,
+                'score': endpoint.score(max_slot),
+                'latency_ewma': endpoint.latency_ewma,
+                'error_ewma': endpoint.error_ewma,
+                'slot_lag': max(max_slot - endpoint.slot, 0) if endpoint.slot else None,
+                'in_flight': endpoint.in_flight,
+            }
+            for endpoint in self.ranked_endpoints()
+        ]
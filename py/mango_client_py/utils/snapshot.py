@@ -0,0 +1,132 @@
+# mango_client_py/utils/snapshot.py
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from solana.publickey import PublicKey
+from solana.rpc.async_api import AsyncClient
+
+from .account_batcher import MAX_MULTIPLE_ACCOUNTS
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC-Fehler "Minimum context slot has not been reached"
+MIN_CONTEXT_SLOT_NOT_REACHED = -32016
+
+
+@dataclass
+class AccountSnapshot:
+    """
+    Kontodaten, die zu einem gemeinsamen Slot gelesen wurden.
+
+    Attributes:
+        slot (int): Der Snapshot-Slot; kein Konto wurde vor diesem Slot gelesen.
+        max_slot (int): Der höchste Slot, zu dem ein Teil gelesen wurde (gleich `slot` bei bis zu 100 Konten).
+        accounts (Dict[str, Optional[Dict[str, Any]]]): Rohe Kontodaten je PublicKey (base58), `None` falls nicht vorhanden.
+        retries (int): Anzahl der Wiederholungen wegen zurückliegender Endpoints.
+    """
+    slot: int
+    max_slot: int
+    accounts: Dict[str, Optional[Dict[str, Any]]] = field(default_factory=dict)
+    retries: int = 0
+
+    def get(self, pubkey: PublicKey) -> Optional[Dict[str, Any]]:
+        return self.accounts.get(pubkey.to_base58() if isinstance(pubkey, PublicKey) else str(pubkey))
+
+
+async def _get_multiple_accounts_raw(
+    connection: AsyncClient,
+    pubkeys: List[str],
+    commitment: Optional[str],
+    min_context_slot: Optional[int],
+) -> Dict[str, Any]:
+    opts: Dict[str, Any] = {'encoding': 'base64'}
+    if commitment is not None:
+        opts['commitment'] = commitment
+    if min_context_slot is not None:
+        opts['minContextSlot'] = min_context_slot
+    return await connection._provider.make_request('getMultipleAccounts', pubkeys, opts)
+
+
+async def get_account_snapshot(
+    connection: AsyncClient,
+    pubkeys: List[PublicKey],
+    commitment: Optional[str] = None,
+    min_context_slot: Optional[int] = None,
+    max_retries: int = 5,
+    retry_delay_seconds: float = 0.2,
+) -> AccountSnapshot:
+    """
+    Liest mehrere Konten slot-konsistent mit `getMultipleAccounts` und `minContextSlot`.
+
+    Bis zu 100 Konten werden in einem Aufruf und damit atomar zu einem Slot gelesen.
+    Bei mehr Konten werden die Teile parallel gelesen, anschließend gilt der höchste
+    gelesene Slot als Untergrenze: Teile mit niedrigerem Slot werden mit diesem
+    `minContextSlot` erneut gelesen. Meldet ein Endpoint, dass er den Slot noch nicht
+    erreicht hat, wird nach `retry_delay_seconds` wiederholt (ein `PooledAsyncClient`
+    weicht dabei auf einen anderen Endpoint aus).
+
+    Args:
+        connection (AsyncClient): Die Solana-Verbindung.
+        pubkeys (List[PublicKey]): Die zu lesenden Konten.
+        commitment (Optional[str]): Das Commitment, z.B. 'confirmed'.
+        min_context_slot (Optional[int]): Untergrenze für den Snapshot-Slot, z.B. der Slot eines früheren Snapshots.
+        max_retries (int): Höchstzahl an Wiederholungen.
+        retry_delay_seconds (float): Wartezeit vor einer Wiederholung.
+
+    Returns:
+        AccountSnapshot: Die Kontodaten mit Snapshot-Slot.
+    """
+    keys = list(dict.fromkeys(pk.to_base58() if isinstance(pk, PublicKey) else str(pk) for pk in pubkeys))
+    chunks = [keys[i:i + MAX_MULTIPLE_ACCOUNTS] for i in range(0, len(keys), MAX_MULTIPLE_ACCOUNTS)]
+    chunk_slots: List[Optional[int]] = [None] * len(chunks)
+    accounts: Dict[str, Optional[Dict[str, Any]]] = {}
+    target = min_context_slot
+    target_fixed = False
+    rounds = 0
+
+    while True:
+        stale = [i for i, slot in enumerate(chunk_slots) if slot is None or (target is not None and slot < target)]
+        if not stale:
+            break
+        if rounds > max_retries:
+            raise RuntimeError(f"Could not read a consistent snapshot at slot {target} after {max_retries} retries")
+
+        responses = await asyncio.gather(
+            *(_get_multiple_accounts_raw(connection, chunks[i], commitment, target) for i in stale),
+            return_exceptions=True,
+        )
+        lagging = False
+        read_slots: List[int] = []
+        for i, response in zip(stale, responses):
+            if isinstance(response, Exception):
+                logger.warning(f"Snapshot read failed: {response}")
+                lagging = True
+                continue
+            if 'error' in response:
+                if response['error'].get('code') != MIN_CONTEXT_SLOT_NOT_REACHED:
+                    raise RuntimeError(f"getMultipleAccounts failed: {response['error']}")
+                lagging = True
+                continue
+            chunk_slots[i] = response['result']['context']['slot']
+            read_slots.append(chunk_slots[i])
+            for pubkey, value in zip(chunks[i], response['result']['value']):
+                accounts[pubkey] = value
+
+        rounds += 1
+        # Der Ziel-Slot wird nur aus den ersten gelesenen Teilen bestimmt, sonst liefe er der Chain hinterher
+        if read_slots and not target_fixed:
+            target = max(read_slots + ([target] if target is not None else []))
+            target_fixed = True
+        if lagging:
+            await asyncio.sleep(retry_delay_seconds)
+
+    slots = [slot for slot in chunk_slots if slot is not None]
+    return AccountSnapshot(
+        slot=target if target is not None else 0,
+        max_slot=max(slots) if slots else (target or 0),
+        accounts=accounts,
+        retries=max(rounds - 1, 0),
+    )
@@ -0,0 +1,202 @@
+# mango_client_py/workers.py
+
+import asyncio
+import base64
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .types import Group, MangoAccount, HealthType
+from .health import HealthBatch, HealthTables, compute_health_batch
+from .idl_cache import IDL_PATH
+
+logger = logging.getLogger(__name__)
+
+# Anzahl der Aufgaben je Prozess, damit ungleich große Konten die Prozesse gleichmäßig auslasten
+TASKS_PER_WORKER = 4
+
+# ----------------------------
+# Worker-Seite
+# ----------------------------
+
+# Je Worker-Prozess einmal im Initializer gesetzt
+_worker_coder: Any = None
+
+
+def _init_worker(idl_path: str) -> None:
+    global _worker_coder
+    from anchorpy.coder.coder import Coder
+    from .idl_cache import load_idl
+
+    _worker_coder = Coder(load_idl(idl_path))
+
+
+def decode_mango_account(pubkey: str, data: bytes) -> MangoAccount:
+    """
+    Dekodiert einen MangoAccount im Worker mit dem dort geladenen IDL.
+    """
+    from solana.publickey import PublicKey
+
+    decoded_mango_account = _worker_coder.accounts.decode('mangoAccount', data)
+    return MangoAccount.from_account(PublicKey(pubkey), decoded_mango_account)
+
+
+def _health_task(
+    shm_name: str,
+    num_accounts: int,
+    start: int,
+    stop: int,
+    pubkeys: List[str],
+    tables: HealthTables,
+    health_type: HealthType,
+) -> HealthBatch:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        offsets = np.ndarray((num_accounts + 1,), dtype=np.int64, buffer=shm.buf)
+        mango_accounts = [
+            decode_mango_account(pubkey, bytes(shm.buf[offsets[i]:offsets[i + 1]]))
+            for pubkey, i in zip(pubkeys, range(start, stop))
+        ]
+        del offsets
+        return compute_health_batch(None, mango_accounts, health_type, tables)
+    finally:
+        shm.close()
+
+# ----------------------------
+# Shared Memory
+# ----------------------------
+
+def pack_accounts(datas: Sequence[bytes]) -> shared_memory.SharedMemory:
+    """
+    Legt Rohdaten vieler Konten in einen Shared-Memory-Block.
+
+    Layout: `len(datas) + 1` Offsets (int64, relativ zum Blockanfang), danach die Daten
+    hintereinander. Der Aufrufer muss den Block mit `close()` und `unlink()` freigeben.
+    """
+    header_size = (len(datas) + 1) * 8
+    total_size = header_size + sum(len(data) for data in datas)
+    shm = shared_memory.SharedMemory(create=True, size=max(total_size, 1))
+    offsets = np.ndarray((len(datas) + 1,), dtype=np.int64, buffer=shm.buf)
+    position = header_size
+    for i, data in enumerate(datas):
+        offsets[i] = position
+        shm.buf[position:position + len(data)] = data
+        position += len(data)
+    offsets[len(datas)] = position
+    del offsets
+    return shm
+
+
+def raw_accounts_from_program_accounts(response: Dict[str, Any]) -> List[Tuple[str, bytes]]:
+    """
+    Wandelt eine base64-kodierte `getProgramAccounts`-Antwort in (PublicKey, Rohdaten)-Paare um.
+    """
+    return [
+        (entry['pubkey'], base64.b64decode(entry['account']['data'][0]))
+        for entry in response.get('result', [])
+    ]
+
+
+def concat_health_batches(batches: List[HealthBatch]) -> HealthBatch:
+    return HealthBatch(**{
+        f.name: np.concatenate([getattr(batch, f.name) for batch in batches]) if batches else np.zeros(0)
+        for f in fields(HealthBatch)
+    })
+
+# ----------------------------
+# Pool
+# ----------------------------
+
+class HealthWorkerPool:
+    """
+    Prozess-Pool, der MangoAccounts in Worker-Prozessen dekodiert und ihre Health berechnet.
+
+    Die Rohdaten aller Konten werden einmal in einen Shared-Memory-Block kopiert; jeder
+    Worker liest seinen Abschnitt direkt daraus, dekodiert mit einem eigenen, beim Start
+    aus dem IDL-Cache geladenen Coder und gibt nur die kompakten Arrays eines `HealthBatch`
+    zurück. Die Event-Loop wartet dabei nur auf Futures und bleibt frei für Transaktionen.
+
+    Args:
+        processes (Optional[int]): Anzahl der Prozesse; Standard ist `os.cpu_count()`.
+        idl_path (str): Pfad der idl.json für die Worker.
+    """
+
+    def __init__(self, processes: Optional[int] = None, idl_path: str = IDL_PATH):
+        self.processes = processes or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_init_worker,
+            initargs=(idl_path,),
+        )
+
+    async def compute_health(
+        self,
+        tables: HealthTables,
+        raw_accounts: Sequence[Tuple[str, bytes]],
+        health_type: HealthType = HealthType.MAINT,
+    ) -> HealthBatch:
+        """
+        Berechnet die Health vieler Konten aus ihren Rohdaten parallel in den Worker-Prozessen.
+
+        Args:
+            tables (HealthTables): Die Lookup-Tabellen der Gruppe.
+            raw_accounts (Sequence[Tuple[str, bytes]]): (PublicKey base58, Kontodaten)-Paare, z.B. aus `raw_accounts_from_program_accounts`.
+            health_type (HealthType): Der Health-Typ.
+
+        Returns:
+            HealthBatch: Die Kennzahlen je Konto in Eingabereihenfolge.
+        """
+        num_accounts = len(raw_accounts)
+        if num_accounts == 0:
+            return concat_health_batches([])
+        pubkeys = [pubkey for pubkey, _ in raw_accounts]
+        shm = pack_accounts([data for _, data in raw_accounts])
+        try:
+            num_tasks = min(num_accounts, self.processes * TASKS_PER_WORKER)
+            bounds = np.linspace(0, num_accounts, num_tasks + 1).astype(int)
+            loop = asyncio.get_running_loop()
+            batches = await asyncio.gather(*(
+                loop.run_in_executor(
+                    self._executor,
+                    _health_task,
+                    shm.name,
+                    num_accounts,
+                    int(start),
+                    int(stop),
+                    pubkeys[start:stop],
+                    tables,
+                    health_type,
+                )
+                for start, stop in zip(bounds[:-1], bounds[1:])
+                if stop > start
+            ))
+        finally:
+            shm.close()
+            shm.unlink()
+        return concat_health_batches(list(batches))
+
+    async def scan_group(
+        self,
+        group: Group,
+        raw_accounts: Sequence[Tuple[str, bytes]],
+        health_type: HealthType = HealthType.MAINT,
+    ) -> Tuple[List[str], HealthBatch]:
+        """
+        Wie `compute_health`, mit aus der Gruppe gebauten Tabellen; gibt zusätzlich die PublicKeys zurück.
+        """
+        batch = await self.compute_health(HealthTables.from_group(group), raw_accounts, health_type)
+        return [pubkey for pubkey, _ in raw_accounts], batch
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'HealthWorkerPool':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
@@ -0,0 +1,319 @@
+# tests/test_numerics.py
+#
+# Hält die numerischen Portierungen an Werten aus den Rust-Tests (programs/mango-v4)
+# und den TS-Specs (ts/client/src/accounts/healthCache.spec.ts) fest.
+
+import numpy as np
+import pytest
+from solana.publickey import PublicKey
+
+from mango_client_py.health import (
+    HealthCache,
+    HealthChanges,
+    HealthTables,
+    simulate_health_ratio,
+    spot_amount_taken_for_health_zero,
+    spot_amounts_taken_for_health_zero,
+)
+from mango_client_py.token_conditional_swap import TokenConditionalSwapArrays, premium_prices
+from mango_client_py.types import (
+    Bank,
+    BookSide,
+    Group,
+    HealthType,
+    MangoAccount,
+    PerpMarket,
+    PerpOrderSide,
+    PerpPosition,
+    Serum3Side,
+    StablePriceModel,
+    TokenConditionalSwap,
+    TokenConditionalSwapType,
+    TokenPosition,
+)
+
+# ----------------------------
+# Hilfsfunktionen
+# ----------------------------
+
+def _bank(token_index: int, weight: float, price: float) -> Bank:
+    # Wie `mockBankAndOracle` (TS): Asset-Gewicht 1 - weight, Liability-Gewicht 1 + weight
+    return Bank(
+        PublicKey(100 + token_index),
+        6,
+        PublicKey(200 + token_index),
+        PublicKey(300 + token_index),
+        token_index=token_index,
+        price=price,
+        maint_asset_weight=1 - weight,
+        init_asset_weight=1 - weight,
+        maint_liab_weight=1 + weight,
+        init_liab_weight=1 + weight,
+    )
+
+
+def _perp_market(base_weight: float, base_lot_size: int, price: float) -> PerpMarket:
+    # Wie `mockPerpMarket` (TS), Settle-Token 0
+    return PerpMarket(
+        0,
+        PublicKey(400),
+        settle_token_index=0,
+        base_lot_size=base_lot_size,
+        quote_lot_size=100,
+        price=price,
+        maint_base_asset_weight=1 - base_weight,
+        init_base_asset_weight=1 - base_weight,
+        maint_base_liab_weight=1 + base_weight,
+        init_base_liab_weight=1 + base_weight,
+        maint_overall_asset_weight=1 - 0.02,
+        init_overall_asset_weight=1 - 0.05,
+    )
+
+
+def _group(banks, perp_markets=()) -> Group:
+    return Group(
+        PublicKey(1),
+        PublicKey(2),
+        banks_map_by_token_index={bank.token_index: [bank] for bank in banks},
+        perp_markets_map_by_market_index={pm.market_index: pm for pm in perp_markets},
+    )
+
+
+def _account(tokens, perps=()) -> MangoAccount:
+    return MangoAccount(
+        PublicKey(3),
+        PublicKey(4),
+        0,
+        0,
+        PublicKey(4),
+        tokens=[TokenPosition(token_index, balance) for token_index, balance in tokens],
+        perps=list(perps),
+    )
+
+# ----------------------------
+# Health-Solver an der Verhältnisgrenze
+# ----------------------------
+
+def test_max_withdraw_uses_deposits_first():
+    # test_max_borrow (health/client.rs): 100 Einlage mit Gewicht 1 -> genau 100 abhebbar
+    group = _group([_bank(0, 0.0, 1.0), _bank(1, 0.2, 2.0)])
+    tables = HealthTables.from_group(group)
+    cache = HealthCache.from_mango_account(group, _account([(0, 100.0)]), tables)
+    assert cache.get_max_withdraw_with_borrow_for_token(tables, 0) == 100.0
+
+
+def test_max_withdraw_borrows_against_collateral():
+    # test_max_borrow (health/client.rs): 50 Token 1 zu Preis 2 mit Gewicht 0.8 ergeben 80 Health
+    group = _group([_bank(0, 0.0, 1.0), _bank(1, 0.2, 2.0)])
+    tables = HealthTables.from_group(group)
+    cache = HealthCache.from_mango_account(group, _account([(0, 0.0), (1, 50.0)]), tables)
+    assert cache.health(HealthType.INIT) == pytest.approx(80.0)
+    assert cache.get_max_withdraw_with_borrow_for_token(tables, 0) == 80.0
+
+
+def test_max_perp_zero_health():
+    # test_max_perp (healthCache.spec.ts): ohne Sicherheiten ist keine Order möglich
+    perp_market = _perp_market(0.3, 100, 2.0)
+    group = _group([_bank(0, 0.0, 1.0), _bank(1, 0.2, 1.5)], [perp_market])
+    tables = HealthTables.from_group(group)
+    cache = HealthCache.from_mango_account(group, _account([(0, 0.0)], [PerpPosition(0)]), tables)
+    assert cache.health(HealthType.INIT) == 0.0
+    assert cache.get_max_perp_for_health_ratio(tables, 0, 2.0, PerpOrderSide.BUY, 50.0) == 0.0
+
+
+@pytest.mark.parametrize('existing_lots', [-5, 0, 3])
+@pytest.mark.parametrize('side', [PerpOrderSide.BUY, PerpOrderSide.SELL])
+@pytest.mark.parametrize('price_factor', [0.8, 1.0, 1.1])
+def test_max_perp_hits_health_ratio(existing_lots, side, price_factor):
+    # test_max_perp (healthCache.spec.ts): das Ergebnis erfüllt das Ziel, ein Lot mehr nicht
+    base_lot_size = 100
+    perp_market = _perp_market(0.3, base_lot_size, 2.0)
+    group = _group([_bank(0, 0.0, 1.0), _bank(1, 0.2, 1.5)], [perp_market])
+    tables = HealthTables.from_group(group)
+    perp = PerpPosition(0, existing_lots, -existing_lots * base_lot_size * 2.0)
+    cache = HealthCache.from_mango_account(group, _account([(0, 3000.0)], [perp]), tables)
+    trade_price = price_factor * perp_market.price
+
+    for ratio in range(1, 101, 7):
+        lots = cache.get_max_perp_for_health_ratio(tables, 0, trade_price, side, float(ratio))
+        changes = HealthChanges(num_scenarios=2).perp_order(0, side, [lots, lots + 1], trade_price)
+        actual_ratio, plus_ratio = simulate_health_ratio(cache, changes, tables)
+        assert ratio <= actual_ratio
+        assert plus_ratio - 0.1 <= ratio
+
+
+@pytest.mark.parametrize('side', [Serum3Side.BUY, Serum3Side.SELL])
+def test_max_serum3_hits_health_ratio(side):
+    group = _group([_bank(0, 0.0, 1.0), _bank(1, 0.2, 2.0)])
+    tables = HealthTables.from_group(group)
+    cache = HealthCache.from_mango_account(group, _account([(0, 1000.0), (1, -100.0)]), tables)
+
+    for ratio in range(1, 101, 7):
+        amount = cache.get_max_serum3_order_for_health_ratio(tables, 1, 0, side, float(ratio))
+        changes = HealthChanges(num_scenarios=2).serum3_order(1, 0, side, [amount, amount + 1])
+        actual_ratio, plus_ratio = simulate_health_ratio(cache, changes, tables)
+        assert ratio <= actual_ratio
+        assert plus_ratio < ratio
+
+
+def test_max_serum3_ask_closed_form():
+    # Verkauf von x Basis: 100 * (760 - 0.8x) / (240 + 2.4x) = 50  =>  x = 320
+    group = _group([_bank(0, 0.0, 1.0), _bank(1, 0.2, 2.0)])
+    tables = HealthTables.from_group(group)
+    cache = HealthCache.from_mango_account(group, _account([(0, 1000.0), (1, -100.0)]), tables)
+    assert cache.get_max_serum3_order_for_health_ratio(tables, 1, 0, Serum3Side.SELL, 50.0) == 320.0
+
+
+def test_perp_max_settle():
+    # 100 Health bei Einlagen mit Gewicht 0.8: erst 125 Einlage, danach Kredit mit Gewicht 1.2
+    assert spot_amount_taken_for_health_zero(100.0, 200.0, 0.8, 1.2) == pytest.approx(125.0)
+    assert spot_amount_taken_for_health_zero(100.0, 50.0, 0.8, 1.2) == pytest.approx(50.0 + 60.0 / 1.2)
+    assert spot_amount_taken_for_health_zero(-1.0, 50.0, 0.8, 1.2) == 0.0
+    np.testing.assert_allclose(
+        spot_amounts_taken_for_health_zero(
+            np.array([100.0, 100.0, -1.0, 30.0]),
+            np.array([200.0, 50.0, 50.0, -10.0]),
+            0.8,
+            1.2,
+        ),
+        [125.0, 100.0, 0.0, 25.0],
+    )
+
+# ----------------------------
+# Stable Price
+# ----------------------------
+
+def _run_stable_price(model: StablePriceModel, start: int, dt: int, steps: int, price) -> int:
+    for i in range(steps):
+        time = start + dt * (i + 1)
+        model.update(time, price(time))
+    return start + dt * steps
+
+
+def test_stable_price_10x():
+    # test_stable_price_10x (state/stable_price.rs)
+    model = StablePriceModel()
+    model.reset_to_price(1.0, 0)
+
+    t = _run_stable_price(model, 0, 60, 60, lambda _: 10.0)
+    assert model.stable_price == pytest.approx(1.8, abs=0.1)
+    assert model.delay_prices[1:] == [1.0] * 23
+    assert model.delay_prices[0] == pytest.approx(1.06, abs=0.01)
+    assert model.last_delay_interval_index == 1
+    assert model.delay_accumulator_time == 0
+    assert model.delay_accumulator_price == 0.0
+
+    t = _run_stable_price(model, t, 10, 6 * 60, lambda _: 10.0)
+    assert model.stable_price == pytest.approx(2.3, abs=0.1)
+    assert model.delay_prices[2:] == [1.0] * 22
+    assert model.delay_prices[0] == pytest.approx(1.06, abs=0.01)
+    assert model.delay_prices[1] == pytest.approx(1.06 * 1.06, abs=0.01)
+    assert model.last_delay_interval_index == 2
+
+    # Überlauf der Delay-Preise nach 25 Stunden
+    _run_stable_price(model, t, 300, 12 * 23, lambda _: 10.0)
+    assert model.stable_price == pytest.approx(7.4, abs=0.1)
+    assert model.delay_prices[0] > model.delay_prices[23] > model.delay_prices[22]
+    assert model.delay_prices[1] < model.delay_prices[0]
+    assert model.delay_prices[1] < model.delay_prices[2]
+    assert model.last_delay_interval_index == 1
+
+
+def test_stable_price_average():
+    # test_stable_price_average (state/stable_price.rs)
+    model = StablePriceModel(delay_growth_limit=10.0)
+    model.reset_to_price(1.0, 0)
+    _run_stable_price(model, 0, 60, 60, lambda t: 2.0 if t > 1800 else 1.0)
+    assert model.delay_prices[0] == pytest.approx(1.5, abs=0.01)
+
+# ----------------------------
+# Funding und Impact-Preise
+# ----------------------------
+
+def _funding_market() -> PerpMarket:
+    # Preise in Lots: 1 Lot = 10 / 100 native Quote pro nativer Basis
+    market = _perp_market(0.1, 100, 2.0)
+    market.quote_lot_size = 10
+    market.impact_quantity = 5
+    market.min_funding = -0.05
+    market.max_funding = 0.05
+    return market
+
+
+def _book(side: PerpOrderSide, prices, quantities) -> BookSide:
+    return BookSide(side, np.array(prices), np.array(quantities))
+
+
+def test_impact_prices():
+    market = _funding_market()
+    bids = _book(PerpOrderSide.BUY, [21, 20, 19], [2, 3, 10])
+    asks = _book(PerpOrderSide.SELL, [22, 23], [1, 3])
+    # Die Bid-Seite erreicht 5 Lots bei 20, die Ask-Seite hat nur 4 Lots
+    assert market.impact_prices(bids, asks) == (pytest.approx(2.0), None)
+
+
+@pytest.mark.parametrize('bid, ask, expected', [
+    (20, 21, 0.025),  # Mittelpreis 2.05 bei Oracle 2.0
+    (30, 32, 0.05),  # 3.1 / 2.0 - 1 = 0.55 wird auf max_funding begrenzt
+    (10, 12, -0.05),  # 1.1 / 2.0 - 1 = -0.45 wird auf min_funding begrenzt
+])
+def test_instantaneous_funding_rate_clamp(bid, ask, expected):
+    market = _funding_market()
+    bids = _book(PerpOrderSide.BUY, [bid], [10])
+    asks = _book(PerpOrderSide.SELL, [ask], [10])
+    assert market.instantaneous_funding_rate(bids, asks) == pytest.approx(expected)
+    assert market.instantaneous_funding_rate_per_second(bids, asks) == pytest.approx(expected / 86400)
+
+
+def test_instantaneous_funding_rate_one_sided():
+    market = _funding_market()
+    deep = _book(PerpOrderSide.BUY, [20], [10])
+    thin = _book(PerpOrderSide.SELL, [21], [1])
+    assert market.instantaneous_funding_rate(deep, thin) == 0.05
+    assert market.instantaneous_funding_rate(_book(PerpOrderSide.BUY, [20], [1]), _book(PerpOrderSide.SELL, [21], [10])) == -0.05
+    assert market.instantaneous_funding_rate(_book(PerpOrderSide.BUY, [], []), thin) == 0.0
+
+# ----------------------------
+# Token Conditional Swaps
+# ----------------------------
+
+def _tcs(tcs_type: TokenConditionalSwapType, **kwargs) -> TokenConditionalSwap:
+    return TokenConditionalSwap(
+        id=0,
+        buy_token_index=0,
+        sell_token_index=1,
+        is_configured=True,
+        expiry_timestamp=10 ** 9,
+        tcs_type=tcs_type,
+        **kwargs,
+    )
+
+
+def test_tcs_premium_price():
+    # premium_price, maker_price und taker_price wie in state/token_conditional_swap.rs
+    fixed = _tcs(TokenConditionalSwapType.FIXED_PREMIUM, price_premium_rate=0.02, maker_fee_rate=0.001, taker_fee_rate=0.002)
+    assert fixed.premium_price(2.0, 1000) == pytest.approx(2.04)
+    assert fixed.maker_price(2.04) == pytest.approx(2.04 * 1.001)
+    assert fixed.taker_price(2.04) == pytest.approx(2.04 * 0.998)
+
+    auction = _tcs(TokenConditionalSwapType.PREMIUM_AUCTION, price_premium_rate=0.02, start_timestamp=1000, duration_seconds=100)
+    assert auction.premium_price(2.0, 1025) == pytest.approx(2.0 * 1.005)
+    assert auction.premium_price(2.0, 1200) == pytest.approx(2.04)
+
+    linear = _tcs(
+        TokenConditionalSwapType.LINEAR_AUCTION,
+        price_lower_limit=1.0,
+        price_upper_limit=3.0,
+        start_timestamp=1000,
+        duration_seconds=100,
+    )
+    assert linear.premium_price(0.0, 1025) == pytest.approx(1.5)
+    assert linear.premium_price(0.0, 1100) == 3.0
+    with pytest.raises(ValueError):
+        linear.premium_price(0.0, 999)
+
+    arrays = TokenConditionalSwapArrays.from_swaps([fixed, auction, linear])
+    np.testing.assert_allclose(
+        premium_prices(arrays, np.array([2.0, 2.0, 0.0]), 1025),
+        [2.04, 2.0 * 1.005, 1.5],
+    )